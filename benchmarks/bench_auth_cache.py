@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark of token verification on authenticated requests.
+
+Sends --requests requests through the app's middleware stack to a route
+depending on get_current_user, with the auth cache cleared before every
+request (what every request cost before, one user lookup), with only the
+Redis tier kept, and fully warm. Reports database statements per request and
+requests per second. Needs the Redis the app is configured with.
+
+    python -m benchmarks.bench_auth_cache --sqlite
+    python -m benchmarks.bench_auth_cache --email test@gmail.com --requests 5000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+
+import src.tasks  # noqa: F401  imports the models in their usual order
+from benchmarks.bench_message_history import setup_sqlite
+from src.app import app
+from src.common.dependencies import create_access_token, get_current_user
+from src.db.config import engine
+from src.services.auth_cache_service import TOKEN_KEY, AuthCacheService
+from src.services.redis_service import RedisService
+
+statements = 0
+
+
+@app.get("/bench/auth")
+async def whoami(user=Depends(get_current_user)):
+    return {"id": user.id}
+
+
+def count_statements(*args):
+    global statements
+    statements += 1
+
+
+async def clear_local():
+    AuthCacheService._local.clear()
+
+
+async def clear_all(token: str):
+    AuthCacheService._local.clear()
+    redis = await RedisService.get_redis()
+    await redis.delete(f"{TOKEN_KEY}{AuthCacheService.token_hash(token)}")
+
+
+async def run(name: str, client: httpx.AsyncClient, token: str, clear, args):
+    global statements
+    latencies = []
+    statements = 0
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        if clear:
+            await clear()
+        sent = time.perf_counter()
+        response = await client.get("/bench/auth")
+        latencies.append((time.perf_counter() - sent) * 1000)
+        response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<6} {statements / args.requests:>5.2f} queries/request  "
+        f"{args.requests / elapsed:>7.0f} req/s  p50 {statistics.median(latencies):>6.2f} ms"
+    )
+
+
+async def main(args):
+    if args.sqlite:
+        bench_engine, _ = await setup_sqlite()
+        email = "agent@chatboq.com"
+    else:
+        bench_engine, email = engine, args.email
+    event.listen(bench_engine.sync_engine, "before_cursor_execute", count_statements)
+    token = create_access_token({"sub": email})
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            print(f"\n{args.requests} authenticated requests")
+            await run("cold", client, token, lambda: clear_all(token), args)
+            await run("redis", client, token, clear_local, args)
+            await run("warm", client, token, None, args)
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against an in-memory SQLite database")
+    parser.add_argument("--email", default="test@gmail.com", help="user to authenticate as without --sqlite")
+    parser.add_argument("--requests", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark of visitor geolocation against the local ip-api stub.
+
+Looks up --visits addresses spread over --networks /24 networks, first the
+previous way (one HTTP call per visit, with a new client each time) and then
+through IPService, whose in-process LRU and Redis caches are keyed by network
+prefix. Reports API calls and lookups per second. Uses the Redis the app is
+configured with; the geoip:* keys it writes are removed first.
+
+    python -m benchmarks.bench_geoip
+    python -m benchmarks.bench_geoip --visits 5000 --networks 200 --latency-ms 50
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from src.config.settings import settings
+from src.services.ip_service import CACHE_KEY, IPService
+from src.services.redis_service import RedisService
+
+from .ipapi_stub import start_stub
+
+
+def addresses(args) -> list[str]:
+    rng = random.Random(args.seed)
+    networks = [f"{rng.randint(11, 99)}.{rng.randint(0, 255)}.{n % 256}" for n in range(args.networks)]
+    return [f"{rng.choice(networks)}.{rng.randint(1, 254)}" for _ in range(args.visits)]
+
+
+async def per_visit(ip: str):
+    async with httpx.AsyncClient(timeout=settings.GEOIP_HTTP_TIMEOUT) as client:
+        resp = await client.get(f"{settings.GEOIP_API_URL}/{ip}")
+        return resp.json()
+
+
+async def run(name: str, lookup, ips: list[str], stub, args):
+    stub.stats.reset()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(ip):
+        async with semaphore:
+            await lookup(ip)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(ip) for ip in ips))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<8} api calls {stub.stats.requests:>6}  {len(ips) / elapsed:>8.0f} lookups/s")
+
+
+async def main(args):
+    stub = start_stub(latency_ms=args.latency_ms)
+    settings.GEOIP_API_URL = f"http://127.0.0.1:{stub.server_port}/json"
+    redis = await RedisService.get_redis()
+    async for key in redis.scan_iter(f"{CACHE_KEY}*"):
+        await redis.delete(key)
+    ips = addresses(args)
+    try:
+        print(
+            f"\n{args.visits} visits from {args.networks} networks, "
+            f"stub latency {args.latency_ms:.0f} ms, {args.concurrency} concurrent"
+        )
+        await run("before", per_visit, ips, stub, args)
+        await run("after", IPService.get_ip_info, ips, stub, args)
+        # another process: the LRU is cold but Redis is not
+        IPService._cache.clear()
+        await run("redis", IPService.get_ip_info, ips, stub, args)
+    finally:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--visits", type=int, default=2000)
+    parser.add_argument("--networks", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
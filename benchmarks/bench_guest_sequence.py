@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark of guest-N numbering on customer creation.
+
+Seeds --customers customers in one organization, then creates --landings
+guests with --concurrency at a time, first the previous way (COUNT(*) of
+the organization's customers, then the insert) and then with
+SequenceService.next. Reports guests per second and how many guest names
+were handed out twice.
+
+    python -m benchmarks.bench_guest_sequence --sqlite
+    python -m benchmarks.bench_guest_sequence --sqlite --customers 500000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+import src.tasks  # noqa: F401  imports the models in their usual order
+import src.db.session as db_session
+import src.services.sequence_service as sequence_service
+from src.db.config import async_session, engine
+from src.models import Customer, OrganizationSequence
+from src.modules.visitor.services import GUEST_SEQUENCE
+from src.services.sequence_service import SequenceService
+
+BATCH = 5000
+
+
+async def seed(session_factory, organization_id: int, user_id: int, count: int):
+    now = datetime.utcnow()
+    async with session_factory() as session:
+        for offset in range(0, count, BATCH):
+            rows = [
+                {
+                    "name": f"guest-{n + 1}",
+                    "organization_id": organization_id,
+                    "created_at": now,
+                    "updated_at": now,
+                    "created_by_id": user_id,
+                    "updated_by_id": user_id,
+                }
+                for n in range(offset, min(offset + BATCH, count))
+            ]
+            await session.execute(insert(Customer), rows)
+        await session.commit()
+    # the migration starts the counter at the customers created so far
+    async with session_factory() as session:
+        await session.execute(
+            insert(OrganizationSequence).values(
+                organization_id=organization_id, name=GUEST_SEQUENCE, value=count,
+                created_at=now, updated_at=now,
+            )
+        )
+        await session.commit()
+
+
+async def create_guest(session_factory, organization_id: int, user_id: int, number: int):
+    async with session_factory() as session:
+        session.add(
+            Customer(
+                name=f"guest-{number}", organization_id=organization_id,
+                created_by_id=user_id, updated_by_id=user_id,
+            )
+        )
+        await session.commit()
+
+
+async def counted(session_factory, organization_id: int, user_id: int):
+    async with session_factory() as session:
+        count = await session.scalar(
+            select(func.count()).select_from(Customer).where(Customer.organization_id == organization_id)
+        )
+    await create_guest(session_factory, organization_id, user_id, count + 1)
+    return count + 1
+
+
+async def sequenced(session_factory, organization_id: int, user_id: int):
+    number = await SequenceService.next(organization_id, GUEST_SEQUENCE)
+    await create_guest(session_factory, organization_id, user_id, number)
+    return number
+
+
+async def run(name: str, create, session_factory, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with semaphore:
+            return await create(session_factory, args.organization_id, args.user_id)
+
+    start = time.perf_counter()
+    numbers = await asyncio.gather(*(one() for _ in range(args.landings)))
+    elapsed = time.perf_counter() - start
+    duplicates = sum(count - 1 for count in Counter(numbers).values())
+    print(f"{name:<8} {args.landings / elapsed:>8.0f} guests/s  duplicate names {duplicates:>5}")
+
+
+async def setup_sqlite():
+    # a file, not :memory:, so concurrent sessions get their own connections
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    sqlite_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 60})
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = async_sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    db_session.async_session = session
+    sequence_service.async_session = session
+    return sqlite_engine, session
+
+
+async def main(args):
+    if args.sqlite:
+        bench_engine, session_factory = await setup_sqlite()
+    else:
+        bench_engine, session_factory = engine, async_session
+    try:
+        if args.sqlite or args.seed:
+            started = time.perf_counter()
+            await seed(session_factory, args.organization_id, args.user_id, args.customers)
+            print(f"seeded {args.customers} customers in {time.perf_counter() - started:.1f}s")
+        print(f"\n{args.landings} landings, {args.concurrency} concurrent")
+        await run("count", counted, session_factory, args)
+        await run("sequence", sequenced, session_factory, args)
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against a temporary SQLite file")
+    parser.add_argument("--seed", action="store_true", help="seed the organization first")
+    parser.add_argument("--organization-id", type=int, default=1)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--landings", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
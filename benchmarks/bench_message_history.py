@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the conversation history read path.
+
+Seeds one conversation with --messages messages (every tenth a reply) and
+compares the previous full load (Message.filter with selectinload on reply_to
+and user) with keyset pages of MessageService.get_messages: the latest page, a
+page in the middle of the history and a page at its start. Reports p50/p99
+latency and rows loaded.
+
+    python -m benchmarks.bench_message_history --sqlite
+    python -m benchmarks.bench_message_history --conversation-id 1 --seed
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlmodel import SQLModel
+
+import src.db.session as db_session
+from src.db.config import async_session, engine
+from src.models import Conversation, Customer, Message, User
+from src.modules.chat.services.message_service import MessageService, encode_cursor
+
+BATCH = 5000
+
+
+async def seed(session_factory, conversation_id: int, user_id: int, count: int):
+    start = datetime.utcnow() - timedelta(seconds=count)
+    async with session_factory() as session:
+        for offset in range(0, count, BATCH):
+            rows = [
+                {
+                    "conversation_id": conversation_id,
+                    "messageId": f"bench-{n}",
+                    "content": f"message {n}",
+                    "user_id": user_id if n % 2 else None,
+                    "created_at": start + timedelta(seconds=n),
+                    "updated_at": start + timedelta(seconds=n),
+                    "created_by_id": user_id,
+                    "updated_by_id": user_id,
+                }
+                for n in range(offset, min(offset + BATCH, count))
+            ]
+            ids = list(await session.scalars(insert(Message).returning(Message.id), rows))
+            # every tenth message replies to the one before it
+            await session.execute(
+                Message.__table__.update()
+                .where(Message.id.in_(ids[10::10]))
+                .values(reply_to_id=Message.id - 1)
+            )
+        await session.commit()
+
+
+async def full_load(conversation_id: int):
+    service = MessageService(organization_id=None)
+    messages = await Message.filter(
+        where={"conversation_id": conversation_id},
+        options=[selectinload(Message.reply_to), selectinload(Message.user)],
+    )
+    return [service.make_msg_payload(msg) for msg in messages]
+
+
+async def page(conversation_id: int, before=None, limit=None):
+    records, _ = await MessageService(organization_id=None).get_messages(
+        conversation_id, before=before, limit=limit
+    )
+    return records
+
+
+async def run(name: str, read, n: int):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        rows = await read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"{name:<14} rows {len(rows):>7}  "
+        f"p50 {statistics.median(latencies):>9.2f} ms  "
+        f"p99 {latencies[max(int(len(latencies) * 0.99) - 1, 0)]:>9.2f} ms"
+    )
+
+
+async def setup_sqlite():
+    sqlite_engine = create_async_engine("sqlite+aiosqlite://")
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = async_sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    db_session.async_session = session
+    async with session() as s:
+        s.add(User(id=1, email="agent@chatboq.com", password="x" * 8, two_fa_secret="", two_fa_auth_url=""))
+        s.add(Customer(id=1, organization_id=1, created_by_id=1, updated_by_id=1))
+        s.add(Conversation(id=1, organization_id=1, customer_id=1, created_by_id=1, updated_by_id=1))
+        await s.commit()
+    return sqlite_engine, session
+
+
+async def cursor_at(session_factory, conversation_id: int, offset: int):
+    async with session_factory() as session:
+        message = await session.scalar(
+            select(Message)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at, Message.id)
+            .offset(offset)
+            .limit(1)
+        )
+    return encode_cursor(message)
+
+
+async def main(args):
+    if args.sqlite:
+        bench_engine, session_factory = await setup_sqlite()
+    else:
+        bench_engine, session_factory = engine, async_session
+    try:
+        if args.sqlite or args.seed:
+            started = time.perf_counter()
+            await seed(session_factory, args.conversation_id, args.user_id, args.messages)
+            print(f"seeded {args.messages} messages in {time.perf_counter() - started:.1f}s")
+
+        middle = await cursor_at(session_factory, args.conversation_id, args.messages // 2)
+        oldest = await cursor_at(session_factory, args.conversation_id, args.limit)
+        cid = args.conversation_id
+        print(f"\npage size {args.limit}, {args.runs} runs")
+        await run("full history", lambda: full_load(cid), max(args.runs // 10, 1))
+        await run("latest page", lambda: page(cid, limit=args.limit), args.runs)
+        await run("middle page", lambda: page(cid, before=middle, limit=args.limit), args.runs)
+        await run("oldest page", lambda: page(cid, before=oldest, limit=args.limit), args.runs)
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against in-memory SQLite")
+    parser.add_argument("--seed", action="store_true", help="seed the conversation first")
+    parser.add_argument("--conversation-id", type=int, default=1)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the chat message write path.
+
+Compares the previous per-row path (Message.create, one MessageAttachment.create
+per file, a find_one to rebuild the payload and the after_insert hook's
+Conversation.update) with Message.create_with_attachments. Reports database
+round trips per message and p50/p99 latency.
+
+    python -m benchmarks.bench_message_write --sqlite
+    python -m benchmarks.bench_message_write --conversation-id 1 --user-id 1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlmodel import SQLModel
+
+import src.db.session as db_session
+from src.db.config import engine
+from src.models import Conversation, Customer, Message, MessageAttachment, User
+from src.modules.chat.services.message_service import MessageService
+
+
+class RoundTrips:
+    def __init__(self, sync_engine):
+        self.count = 0
+        event.listen(sync_engine, "before_cursor_execute", self.on_execute)
+        event.listen(sync_engine, "commit", self.on_commit)
+
+    def on_execute(self, *args):
+        self.count += 1
+
+    def on_commit(self, *args):
+        self.count += 1
+
+
+def attachment(n: int) -> dict:
+    return {"file_url": f"https://cdn/{n}.png", "file_name": f"{n}.png", "file_type": "image/png"}
+
+
+async def legacy_write(data: dict, files: list[dict]):
+    message = await Message.create(**data)
+    for file in files:
+        await MessageAttachment.create(
+            message_id=message.id,
+            created_by_id=message.created_by_id,
+            updated_by_id=message.updated_by_id,
+            **file,
+        )
+    record = await Message.find_one(
+        {"id": message.id},
+        options=[selectinload(Message.reply_to), selectinload(Message.user)],
+    )
+    payload = MessageService(organization_id=None).make_msg_payload(record)
+    # what the after_insert hook did for every message
+    await Conversation.update(message.conversation_id, attributes={"last_message": message.to_json()})
+    return payload
+
+
+async def bulk_write(data: dict, files: list[dict]):
+    message, rows, user, reply_to = await Message.create_with_attachments(
+        attachments=files, **data
+    )
+    return MessageService.build_msg_payload(message, user, reply_to, rows)
+
+
+async def run(name: str, write, data: dict, files: list[dict], counter: RoundTrips, n: int):
+    latencies = []
+    start_trips = counter.count
+    for _ in range(n):
+        start = time.perf_counter()
+        await write(data, files)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    trips = (counter.count - start_trips) / n
+    print(
+        f"{name:<8} round trips/message {trips:>5.1f}  "
+        f"p50 {statistics.median(latencies):>7.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:>7.2f} ms"
+    )
+
+
+async def setup_sqlite():
+    sqlite_engine = create_async_engine("sqlite+aiosqlite://")
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = async_sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    db_session.async_session = session
+    async with session() as s:
+        s.add(User(id=1, email="agent@chatboq.com", password="x" * 8, two_fa_secret="", two_fa_auth_url=""))
+        s.add(Customer(id=1, organization_id=1, created_by_id=1, updated_by_id=1))
+        s.add(Conversation(id=1, organization_id=1, customer_id=1, created_by_id=1, updated_by_id=1))
+        await s.commit()
+    return sqlite_engine
+
+
+async def main(args):
+    bench_engine = await setup_sqlite() if args.sqlite else engine
+    counter = RoundTrips(bench_engine.sync_engine)
+    data = {
+        "content": "Thanks, I have attached the screenshots",
+        "conversation_id": args.conversation_id,
+        "user_id": args.user_id,
+        "messageId": "bench",
+        "created_by_id": args.user_id,
+        "updated_by_id": args.user_id,
+    }
+    try:
+        for count in (0, 3):
+            files = [attachment(n) for n in range(count)]
+            print(f"\n{count} attachments, {args.messages} messages")
+            await run("before", legacy_write, data, files, counter, args.messages)
+            await run("after", bulk_write, data, files, counter, args.messages)
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against in-memory SQLite")
+    parser.add_argument("--conversation-id", type=int, default=1)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--messages", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the organization lookup behind the /customers domain check.
+
+Seeds --organizations organizations and issues --lookups get_org calls,
+--concurrency at a time, for identifiers drawn with a skew towards a few
+busy widgets, --unknown of them for identifiers that do not exist. Runs the
+previous lookup (GET twice on a hit, nothing cached on a miss) and
+CORSCacheService.get_org, each from a cold cache, and reports lookups per
+second, database queries and Redis GETs. Needs the Redis the app is
+configured with.
+
+    python -m benchmarks.bench_org_cache --sqlite
+    python -m benchmarks.bench_org_cache --sqlite --lookups 50000 --unknown 0.5
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import event, insert
+
+import src.tasks  # noqa: F401  imports the models in their usual order
+from benchmarks.bench_message_history import setup_sqlite
+from src.db.config import async_session, engine
+from src.models import Organization
+from src.services.cors_cache_service import CACHE_KEY, CORSCacheService
+from src.services.redis_service import RedisService
+
+counts = {"queries": 0, "gets": 0}
+
+
+def count_query(*args):
+    counts["queries"] += 1
+
+
+async def previous_get_org(org_id: str):
+    """CORSCacheService.get_org before the cache layer"""
+    redis = await RedisService.get_redis()
+    cache_key = f"{CACHE_KEY}{org_id}"
+    org = (await redis.get(cache_key)).decode("utf-8") if await redis.get(cache_key) else None
+    if org:
+        return json.loads(org)
+    org = await Organization.find_one({"identifier": org_id})
+    if org:
+        await redis.set(cache_key, json.dumps(org.to_json(), default=str), ex=600)
+        return org.to_json()
+    return None
+
+
+async def seed(session_factory, count: int):
+    now = datetime.utcnow()
+    async with session_factory() as session:
+        await session.execute(
+            insert(Organization),
+            [
+                {
+                    "name": f"org {n}", "slug": f"org-{n}", "domain": f"https://org{n}.example",
+                    "email_alias": f"org{n}@chatboq.com", "contact_email": f"org{n}@chatboq.com",
+                    "identifier": f"org-{n}",
+                    "created_by_id": 1, "updated_by_id": 1, "created_at": now, "updated_at": now,
+                }
+                for n in range(count)
+            ],
+        )
+        await session.commit()
+
+
+def sample(args) -> list[str]:
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(args.organizations)]
+    known = rng.choices(range(args.organizations), weights=weights, k=args.lookups)
+    return [
+        f"unknown-{rng.randrange(args.organizations)}" if rng.random() < args.unknown else f"org-{n}"
+        for n in known
+    ]
+
+
+async def clear():
+    redis = await RedisService.get_redis()
+    keys = await redis.keys(f"{CACHE_KEY}*")
+    if keys:
+        await redis.delete(*keys)
+    CORSCacheService._local.clear()
+
+
+async def run(name: str, get_org, identifiers: list[str], args):
+    await clear()
+    counts.update(queries=0, gets=0)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(identifier: str):
+        async with semaphore:
+            return await get_org(identifier)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(identifier) for identifier in identifiers))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<8} {len(identifiers) / elapsed:>8.0f} lookups/s  "
+        f"db queries {counts['queries']:>6}  redis GETs {counts['gets']:>6}"
+    )
+
+
+async def main(args):
+    if args.sqlite:
+        bench_engine, session_factory = await setup_sqlite()
+        await seed(session_factory, args.organizations)
+    else:
+        bench_engine, session_factory = engine, async_session
+    event.listen(bench_engine.sync_engine, "before_cursor_execute", count_query)
+    redis = await RedisService.get_redis()
+    redis_get = redis.get
+
+    async def counted_get(*a, **kw):
+        counts["gets"] += 1
+        return await redis_get(*a, **kw)
+
+    redis.get = counted_get
+    identifiers = sample(args)
+    print(f"\n{args.lookups} lookups, {args.unknown:.0%} unknown, {args.concurrency} concurrent")
+    try:
+        await run("previous", previous_get_org, identifiers, args)
+        await run("cached", CORSCacheService.get_org, identifiers, args)
+    finally:
+        redis.get = redis_get
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against an in-memory SQLite database")
+    parser.add_argument("--organizations", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--unknown", type=float, default=0.2, help="share of unknown identifiers")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
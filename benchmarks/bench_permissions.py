@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the permission checks and the permission-group endpoints.
+
+Seeds one organization with --roles roles over the permission catalog and
+--members members holding one or two roles each, then times --calls of:
+
+- a has_permissions check, querying the member's role permissions per call
+  as a check without the index has to, and through the compiled index;
+- GET and POST /permission-groups, the previous handlers reloading the
+  groups, permissions and role permissions per call, and the current ones;
+- validate_role_data's permission checks for a role of every permission,
+  one query per permission before, none with the catalog.
+
+Reports calls per second and database queries per call.
+
+    python -m benchmarks.bench_permissions --sqlite
+    python -m benchmarks.bench_permissions --sqlite --members 2000 --calls 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, insert, select
+
+import src.tasks  # noqa: F401  imports the models in their usual order
+from benchmarks.bench_message_history import setup_sqlite
+from src.common.context import TenantContext
+from src.common.dependencies import _validate_permission_group, _validate_permissions_exist
+from src.common.permissions import has_permissions
+from src.db.config import engine
+from src.db.session import db_session
+from src.models import (
+    Organization,
+    OrganizationMember,
+    OrganizationMemberRole,
+    OrganizationRole,
+    PermissionGroup,
+    Permissions,
+    RolePermission,
+    User,
+)
+from src.modules.staff_management.routers.permission_group import (
+    get_permission_groups,
+    get_permission_groups_with_role_perms,
+)
+from src.modules.staff_management.schemas.permission_group import PermissionOutSchema
+from src.services.permission_service import PermissionService
+
+ORGANIZATION_ID = 1
+GROUPS = 4
+PERMISSIONS_PER_GROUP = 8
+
+queries = 0
+
+
+def count_query(*args):
+    global queries
+    queries += 1
+
+
+async def seed(session_factory, args):
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    audit = {"created_by_id": 1, "updated_by_id": 1, "created_at": now, "updated_at": now}
+    permission_ids = range(1, GROUPS * PERMISSIONS_PER_GROUP + 1)
+    async with session_factory() as session:
+        await session.execute(
+            insert(Organization),
+            [{
+                "id": ORGANIZATION_ID, "name": "bench", "slug": "bench", "domain": "https://bench.example",
+                "email_alias": "bench@chatboq.com", "contact_email": "bench@chatboq.com",
+                "identifier": "bench", **audit,
+            }],
+        )
+        await session.execute(
+            insert(PermissionGroup),
+            [{"id": g, "name": f"Group {g}", "created_at": now, "updated_at": now} for g in range(1, GROUPS + 1)],
+        )
+        await session.execute(
+            insert(Permissions),
+            [
+                {"id": p, "name": f"Permission {p}", "group_id": (p - 1) // PERMISSIONS_PER_GROUP + 1,
+                 "created_at": now, "updated_at": now}
+                for p in permission_ids
+            ],
+        )
+        await session.execute(
+            insert(OrganizationRole),
+            [
+                {"id": r, "name": f"role {r}", "identifier": f"role-{r}", "organization_id": ORGANIZATION_ID, **audit}
+                for r in range(1, args.roles + 1)
+            ],
+        )
+        await session.execute(
+            insert(RolePermission),
+            [
+                {
+                    "role_id": r, "permission_id": p, "is_viewable": True,
+                    "is_changeable": rng.random() < 0.5, "is_deletable": rng.random() < 0.25, **audit,
+                }
+                for r in range(1, args.roles + 1)
+                for p in rng.sample(permission_ids, len(permission_ids) // 2)
+            ],
+        )
+        await session.execute(
+            insert(User),
+            [
+                {"id": u, "email": f"member{u}@chatboq.com", "password": "x" * 8,
+                 "two_fa_secret": "", "two_fa_auth_url": "", "created_at": now, "updated_at": now}
+                for u in range(2, args.members + 2)
+            ],
+        )
+        await session.execute(
+            insert(OrganizationMember),
+            [
+                {"id": m, "user_id": m + 1, "organization_id": ORGANIZATION_ID, **audit}
+                for m in range(1, args.members + 1)
+            ],
+        )
+        await session.execute(
+            insert(OrganizationMemberRole),
+            [
+                {"member_id": m, "role_id": r, **audit}
+                for m in range(1, args.members + 1)
+                for r in rng.sample(range(1, args.roles + 1), rng.randint(1, 2))
+            ],
+        )
+        await session.commit()
+
+
+async def previous_check(user, required: list[str]) -> list[str]:
+    """The member's permissions looked up in the database on every check"""
+    names = {name for name, _, _ in (perm.partition(":") for perm in required)}
+    async with db_session(read=True) as session:
+        rows = (
+            await session.execute(
+                select(
+                    Permissions.name,
+                    RolePermission.is_viewable,
+                    RolePermission.is_changeable,
+                    RolePermission.is_deletable,
+                )
+                .join(RolePermission, RolePermission.permission_id == Permissions.id)
+                .join(OrganizationMemberRole, OrganizationMemberRole.role_id == RolePermission.role_id)
+                .join(OrganizationMember, OrganizationMember.id == OrganizationMemberRole.member_id)
+                .where(
+                    OrganizationMember.organization_id == ORGANIZATION_ID,
+                    OrganizationMember.user_id == user.id,
+                    Permissions.name.in_(names),
+                )
+            )
+        ).all()
+    granted = set()
+    for name, viewable, changeable, deletable in rows:
+        granted |= {f"{name}:view"} if viewable else set()
+        granted |= {f"{name}:change"} if changeable else set()
+        granted |= {f"{name}:delete"} if deletable else set()
+    return [
+        perm for perm in required
+        if (perm if ":" in perm else f"{perm}:view") not in granted
+    ]
+
+
+async def previous_permission_groups(role_id=None):
+    """GET /permission-groups, or POST with a role_id, before the catalog"""
+    groups = await PermissionGroup.filter()
+    all_permissions = await Permissions.filter()
+    role_perms = await RolePermission.filter(where={"role_id": role_id}) if role_id else []
+    perms_by_group_id = {}
+    for perm in all_permissions:
+        perms_by_group_id.setdefault(perm.group_id, []).append(perm)
+    response = {
+        group.name: [PermissionOutSchema.model_validate(perm) for perm in perms_by_group_id.get(group.id, [])]
+        for group in groups
+    }
+    if role_id:
+        response["role_permissions"] = [
+            {
+                "permission_id": rp.permission_id,
+                "is_changeable": rp.is_changeable,
+                "is_deletable": rp.is_deletable,
+                "is_viewable": rp.is_viewable,
+            }
+            for rp in role_perms
+        ]
+    return response
+
+
+async def previous_validate(permissions: list, group_id: int):
+    for perm in permissions:
+        if not await Permissions.find_one(where={"id": perm.permission_id}):
+            raise HTTPException(status_code=404)
+    for perm in permissions:
+        permission = await Permissions.find_one(where={"id": perm.permission_id})
+        if permission.group_id != group_id:
+            raise HTTPException(status_code=400)
+
+
+async def current_validate(permissions: list, group_id: int):
+    await _validate_permissions_exist(permissions)
+    await _validate_permission_group(permissions, group_id)
+
+
+async def run(name: str, call, args):
+    global queries
+    queries = 0
+    start = time.perf_counter()
+    for n in range(args.calls):
+        await call(n)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<9} {args.calls / elapsed:>9.0f} calls/s  {queries / args.calls:>6.2f} queries/call")
+
+
+async def main(args):
+    if args.sqlite:
+        bench_engine, session_factory = await setup_sqlite()
+        await seed(session_factory, args)
+    else:
+        bench_engine = engine
+    event.listen(bench_engine.sync_engine, "before_cursor_execute", count_query)
+    TenantContext.set(ORGANIZATION_ID)
+
+    rng = random.Random(args.seed)
+    users = [
+        SimpleNamespace(id=rng.randrange(2, args.members + 2), attributes={"organization_id": ORGANIZATION_ID})
+        for _ in range(1024)
+    ]
+    required = ["Permission 3", "Permission 12:change"]
+    check = has_permissions(required)
+
+    async def indexed_check(user):
+        try:
+            await check(current_user=user)
+            return []
+        except HTTPException:
+            return required
+
+    # both checks agree before anything is timed
+    for user in users[:200]:
+        assert bool(await previous_check(user, required)) == bool(await indexed_check(user))
+    # and so do the responses, as encoded
+    assert jsonable_encoder(await previous_permission_groups()) == jsonable_encoder(await get_permission_groups())
+    for role_id in range(1, args.roles + 1):
+        previous = await previous_permission_groups(role_id)
+        current = await get_permission_groups_with_role_perms(role_id)
+        assert jsonable_encoder(previous) == jsonable_encoder(current)
+    PermissionService._orgs.clear()
+    PermissionService._catalog.clear()
+
+    role_permissions = [
+        SimpleNamespace(permission_id=p, is_viewable=True, is_changeable=False, is_deletable=False)
+        for p in range(1, PERMISSIONS_PER_GROUP + 1)
+    ]
+    try:
+        print(f"\nhas_permissions({required}), {args.members} members, {args.roles} roles, {args.calls} calls")
+        await run("query", lambda n: previous_check(users[n % len(users)], required), args)
+        await run("index", lambda n: indexed_check(users[n % len(users)]), args)
+
+        print(f"\nGET /permission-groups, {args.calls} calls")
+        await run("previous", lambda n: previous_permission_groups(), args)
+        await run("catalog", lambda n: get_permission_groups(), args)
+
+        print(f"\nPOST /permission-groups, {args.calls} calls")
+        await run("previous", lambda n: previous_permission_groups(n % args.roles + 1), args)
+        await run("index", lambda n: get_permission_groups_with_role_perms(n % args.roles + 1), args)
+
+        print(f"\nvalidate_role_data permissions, {len(role_permissions)} per role, {args.calls} calls")
+        await run("previous", lambda n: previous_validate(role_permissions, 1), args)
+        await run("catalog", lambda n: current_validate(role_permissions, 1), args)
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against a seeded in-memory SQLite database")
+    parser.add_argument("--roles", type=int, default=20)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
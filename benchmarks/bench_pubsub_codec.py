@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the pub/sub codecs on chat message payloads.
+
+Builds payloads with MessageService.make_msg_payload (the same shape
+get_message_payload publishes on the message channel) and compares
+encode/decode throughput of the legacy listener path against the codecs.
+
+    python -m benchmarks.bench_pubsub_codec
+"""
+import json
+import timeit
+
+from src.config.redis import codec as codec_module
+from src.config.redis.codec import PubSubCodec
+from src.models import Message, User
+from src.modules.chat.services.message_service import MessageService
+from src.websocket.constants.chat_event_constants import receive_message
+
+ROUNDS = 20_000
+
+
+def build_payload(content_size: int) -> dict:
+    user = User(id=7, email="agent@chatboq.com", name="Support Agent", image=None)
+    reply_to = Message(
+        id=41,
+        conversation_id=3,
+        messageId="c2f0a2a8",
+        content="Can you share the order number?",
+        user_id=7,
+        created_by_id=7,
+        updated_by_id=7,
+    )
+    message = Message(
+        id=42,
+        conversation_id=3,
+        messageId="5d8e71f4",
+        content="x" * content_size,
+        customer_id=11,
+        user_id=7,
+        reply_to_id=41,
+        created_by_id=7,
+        updated_by_id=7,
+    )
+    message.user = user
+    message.reply_to = reply_to
+
+    payload = MessageService(organization_id=1).make_msg_payload(message)
+    payload["sid"] = "Jx8b0qfS1VbX2kXbAAAB"
+    payload["event"] = receive_message
+    payload["customer_id"] = 11
+    payload["organization_id"] = 1
+    payload["is_customer"] = False
+    return payload
+
+
+def legacy_decode(data: bytes) -> dict:
+    """The decode path the listener used before the codec layer"""
+    payload = {"raw": json.loads(data.decode("utf-8"))}
+    payload = payload.get("raw")
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return payload
+
+
+def bench(name: str, encode, decode, payload: dict):
+    data = encode(payload)
+    assert decode(data)["id"] == payload["id"]
+    encode_s = timeit.timeit(lambda: encode(payload), number=ROUNDS)
+    decode_s = timeit.timeit(lambda: decode(data), number=ROUNDS)
+    print(
+        f"{name:<16} {len(data):>7} B  "
+        f"encode {ROUNDS / encode_s:>10,.0f}/s  decode {ROUNDS / decode_s:>10,.0f}/s"
+    )
+
+
+def main():
+    for content_size in (64, 1024, 8000):
+        payload = build_payload(content_size)
+        print(f"\nmessage content {content_size} chars")
+        bench(
+            "legacy json",
+            lambda p: json.dumps(p).encode("utf-8"),
+            legacy_decode,
+            payload,
+        )
+
+        json_codec = PubSubCodec("json")
+        label = "orjson" if codec_module.orjson else "json (stdlib)"
+        bench(label, json_codec.encode, json_codec.decode, payload)
+
+        if codec_module.msgpack:
+            msgpack_codec = PubSubCodec("msgpack")
+            bench("msgpack", msgpack_codec.encode, msgpack_codec.decode, payload)
+        else:
+            print("msgpack          not installed")
+
+
+if __name__ == "__main__":
+    main()
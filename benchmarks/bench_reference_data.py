@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the countries, timezones and phone codes endpoints.
+
+Calls each handler --calls times the previous way (query, then serialize
+the rows into a JSONResponse) and through the ReferenceDataService
+snapshot, with and without a matching If-None-Match. Reports calls per
+second, database queries per call and whether the body sent is the
+snapshot's own bytes.
+
+    python -m benchmarks.bench_reference_data --sqlite
+    python -m benchmarks.bench_reference_data --calls 5000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+from starlette.requests import Request
+
+import src.tasks  # noqa: F401  imports the models in their usual order
+from benchmarks.bench_message_history import setup_sqlite
+from src.db.config import engine
+from src.models import Country, PhoneCode, Timezone
+from src.modules.organizations.router import get_countries, get_phone_codes, get_timezones
+from src.seed.phone_code import seed_phone_codes
+from src.seed.timezone_country import seed_countries, seed_timezones
+from src.services.reference_data_service import ReferenceDataService
+from src.utils.response import CustomResponse as cr
+
+queries = 0
+
+
+def count_query(*args):
+    global queries
+    queries += 1
+
+
+async def previous_countries(request):
+    countries = await Country.filter()
+    return cr.success(
+        data={
+            "countries": [
+                {
+                    "id": country.id,
+                    "name": country.name,
+                    "code": country.iso_code_2,
+                    "iso_code_2": country.iso_code_2,
+                    "iso_code_3": country.iso_code_3,
+                    "phone_code": country.phone_code,
+                }
+                for country in countries
+            ]
+        },
+        message="Countries retrieved successfully",
+    )
+
+
+async def previous_timezones(request):
+    timezones = await Timezone.filter(where={}, related_items=[selectinload(Timezone.country)])
+    return cr.success(
+        data={
+            "timezones": [
+                {
+                    "id": tz.id,
+                    "name": tz.name,
+                    "display_name": tz.display_name,
+                    "country_id": tz.country_id,
+                    "country_code": tz.country.iso_code_2,
+                    "country_name": tz.country.name if tz.country else None,
+                }
+                for tz in timezones
+            ]
+        },
+        message="Timezones retrieved successfully",
+    )
+
+
+async def previous_phone_codes(request):
+    phone_codes = await PhoneCode.get_all()
+    return cr.success(data=jsonable_encoder(phone_codes), message="Phone code retreived successfully")
+
+
+def make_request(path: str, etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "headers": headers, "query_string": b""})
+
+
+async def run(name: str, handler, request: Request, args, payload=None):
+    global queries
+    queries = 0
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        response = await handler(request)
+    elapsed = time.perf_counter() - start
+    # the snapshot's bytes object itself is sent, nothing is encoded or copied
+    body = "shared" if payload and response.body is payload.body else "encoded"
+    print(
+        f"  {name:<10} {args.calls / elapsed:>9.0f} calls/s  "
+        f"{queries / args.calls:>5.2f} queries/call  status {response.status_code}  "
+        f"{len(response.body):>6} bytes {body if response.body else ''}"
+    )
+
+
+async def main(args):
+    if args.sqlite:
+        bench_engine, _ = await setup_sqlite()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await seed_countries()
+            await seed_timezones()
+            await seed_phone_codes()
+    else:
+        bench_engine = engine
+    event.listen(bench_engine.sync_engine, "before_cursor_execute", count_query)
+    snapshot = await ReferenceDataService.get()
+    endpoints = [
+        ("/organizations/countries", previous_countries, get_countries, snapshot.countries),
+        ("/organizations/timezones", previous_timezones, lambda request: get_timezones(request, None), snapshot.timezones),
+        ("/organizations/phone-codes", previous_phone_codes, get_phone_codes, snapshot.phone_codes),
+    ]
+    try:
+        for path, previous, handler, payload in endpoints:
+            print(f"\n{path}, {args.calls} calls")
+            await run("previous", previous, make_request(path), args)
+            await run("snapshot", handler, make_request(path), args, payload)
+            await run("304", handler, make_request(path, payload.etag), args)
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against a seeded in-memory SQLite database")
+    parser.add_argument("--calls", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
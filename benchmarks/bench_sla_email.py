@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the SLA breach email fan-out against the local SendGrid stub.
+
+Compares the per-recipient path (one send_ticket_task_email per recipient,
+each with a new SendGrid client and its own ticket log row) with the batched
+path (one send_ticket_task_batch_email per ticket, recipients as
+personalizations, one log row). Runs the actors' coroutines in process and
+reports API calls, log rows and emails per second.
+
+    python -m benchmarks.bench_sla_email --sqlite
+    python -m benchmarks.bench_sla_email --sqlite --tickets 200 --recipients 25 --latency-ms 50
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+import src.db.session as db_session
+import src.modules.sendgrid.services as sendgrid_services
+import src.tasks.ticket_task as ticket_task
+from src.common.context import UserContext
+from src.config.settings import settings
+from src.db.config import engine
+from src.modules.ticket.enums import TicketLogActionEnum
+from src.modules.ticket.models.ticket_log import TicketLog
+
+from .sendgrid_stub import start_stub
+
+FROM_EMAIL = ("support@acme.chatboq.com", "Acme")
+
+
+def recipients(ticket_id: int, count: int) -> list[str]:
+    return [f"agent{n}.t{ticket_id}@acme.test" for n in range(count)]
+
+
+async def per_recipient(ticket_id: int, emails: list[str]):
+    for email in emails:
+        # every call used to build its own client
+        sendgrid_services._client = None
+        await ticket_task.send_ticket_task_email.fn.__wrapped__(
+            subject="SLA breach",
+            recipients=email,
+            body_html="<p>75% of the response time has elapsed</p>",
+            from_email=FROM_EMAIL,
+            ticket_id=ticket_id,
+            organization_id=1,
+            mail_type=TicketLogActionEnum.SLA_BREACH_EMAIL_SENT,
+        )
+
+
+async def batched(ticket_id: int, emails: list[str]):
+    await ticket_task.send_ticket_task_batch_email.fn.__wrapped__(
+        subject="SLA breach",
+        recipients=emails,
+        body_html="<p>75% of the response time has elapsed</p>",
+        from_email=FROM_EMAIL,
+        ticket_id=ticket_id,
+        organization_id=1,
+        mail_type=TicketLogActionEnum.SLA_BREACH_EMAIL_SENT,
+    )
+
+
+async def log_rows() -> int:
+    async with db_session.async_session() as session:
+        return await session.scalar(select(func.count()).select_from(TicketLog))
+
+
+async def run(name: str, send, stub, args):
+    stub.stats.reset()
+    rows = await log_rows()
+    start = time.perf_counter()
+    for ticket_id in range(1, args.tickets + 1):
+        await send(ticket_id, recipients(ticket_id, args.recipients))
+    elapsed = time.perf_counter() - start
+    emails = args.tickets * args.recipients
+    print(
+        f"{name:<8} api calls {stub.stats.requests:>6}  "
+        f"log rows {await log_rows() - rows:>6}  "
+        f"{emails / elapsed:>8.0f} emails/s"
+    )
+
+
+async def setup_sqlite():
+    sqlite_engine = create_async_engine("sqlite+aiosqlite://")
+    # nullable in the migrated schema: workers log without an updating user
+    TicketLog.__table__.c.updated_by_id.nullable = True
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    db_session.async_session = async_sessionmaker(
+        bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    return sqlite_engine
+
+
+async def main(args):
+    stub = start_stub(latency_ms=args.latency_ms)
+    settings.SENDGRID_API_HOST = f"http://127.0.0.1:{stub.server_port}"
+    settings.SENDGRID_API_KEY = "stub"
+    sendgrid_services._client = None
+    # the ticket log rows are attributed to the acting user
+    UserContext.set(args.user_id)
+    bench_engine = await setup_sqlite() if args.sqlite else engine
+    try:
+        print(
+            f"\n{args.tickets} tickets x {args.recipients} recipients, "
+            f"stub latency {args.latency_ms:.0f} ms"
+        )
+        await run("before", per_recipient, stub, args)
+        await run("after", batched, stub, args)
+        if stub.stats.rejected:
+            print(f"stub rejected {stub.stats.rejected} requests")
+    finally:
+        await bench_engine.dispose()
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against in-memory SQLite")
+    parser.add_argument("--tickets", type=int, default=100)
+    parser.add_argument("--recipients", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--user-id", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
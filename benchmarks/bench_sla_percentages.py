@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the SLA warning checks for a large set of open tickets.
+
+Compares the per-ticket path (calculate_sla_response_time_percentage and
+calculate_sla_resolution_time_percentage for every ticket, then one
+TicketAlert lookup per warning) with the batch path (calculate_sla_percentages
+and warning_levels against one current time, then sent_alerts prefetching the
+alerts of the whole batch). Alert lookups of the per-ticket path are timed on a
+sample of --lookups tickets and extrapolated.
+
+    python -m benchmarks.bench_sla_percentages --sqlite
+    python -m benchmarks.bench_sla_percentages --tickets 100000
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+import src.db.session as db_session
+import src.tasks  # noqa: F401  resolves the notification factory import cycle
+from src.db.config import engine
+from src.modules.ticket.models.ticket import TicketAlert
+from src.modules.ticket.services.sla import np, sla_service
+
+BATCH = 5000
+HOUR = 3600
+
+
+def make_tickets(count: int, now: int):
+    random.seed(count)
+    response = [random.choice((1, 2, 4, 8)) * HOUR for _ in range(count)]
+    resolution = [r * 6 for r in response]
+    # spread the tickets from just opened to well past their resolution time
+    opened_at = [now - random.randint(0, 2 * r) for r in resolution]
+    return opened_at, response, resolution
+
+
+def per_ticket(opened_at, response, resolution):
+    levels = []
+    for opened, response_time, resolution_time in zip(opened_at, response, resolution):
+        for percentage in (
+            sla_service.calculate_sla_response_time_percentage(response_time, opened),
+            sla_service.calculate_sla_resolution_time_percentage(resolution_time, opened),
+        ):
+            levels.append(
+                sla_service.get_enum_from_range(percentage).value if percentage >= 75 else 0
+            )
+    return levels
+
+
+def batch(opened_at, response, resolution):
+    response_pct, resolution_pct = sla_service.calculate_sla_percentages(
+        opened_at, response, resolution
+    )
+    return sla_service.warning_levels(response_pct), sla_service.warning_levels(resolution_pct)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def seed_alerts(session_factory, count: int):
+    async with session_factory() as session:
+        for offset in range(0, count, BATCH):
+            await session.execute(
+                insert(TicketAlert),
+                [
+                    {
+                        "ticket_id": ticket_id,
+                        "alert_type": "response",
+                        "warning_level": 75,
+                        "sent_at": datetime.utcnow(),
+                    }
+                    for ticket_id in range(offset + 1, min(offset + BATCH, count) + 1, 2)
+                ],
+            )
+        await session.commit()
+
+
+async def setup_sqlite(count: int):
+    sqlite_engine = create_async_engine("sqlite+aiosqlite://")
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = async_sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    db_session.async_session = session
+    await seed_alerts(session, count)
+    return sqlite_engine
+
+
+async def lookups(args):
+    sample = random.sample(range(1, args.tickets + 1), min(args.lookups, args.tickets))
+    start = time.perf_counter()
+    for ticket_id in sample:
+        await TicketAlert.find_one(
+            where={"ticket_id": ticket_id, "alert_type": "response", "warning_level": 75}
+        )
+    per_lookup = (time.perf_counter() - start) * 1000 / len(sample)
+    print(
+        f"before  {per_lookup * args.tickets:>10.1f} ms  "
+        f"({args.tickets} lookups, {per_lookup:.3f} ms each over a sample of {len(sample)})"
+    )
+
+    start = time.perf_counter()
+    sent = await sla_service.sent_alerts(range(1, args.tickets + 1))
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"after   {elapsed:>10.1f} ms  ({len(sent)} alerts prefetched)")
+
+
+async def main(args):
+    # the per-ticket path logs at INFO; keep it off the console as in production
+    logging.getLogger("src.modules.ticket.services.sla").setLevel(logging.WARNING)
+    now = int(datetime.utcnow().timestamp())
+    opened_at, response, resolution = make_tickets(args.tickets, now)
+
+    print(f"\nPercentages and warning levels, {args.tickets} tickets (numpy: {np is not None})")
+    before, before_ms = timed(per_ticket, opened_at, response, resolution)
+    (response_levels, resolution_levels), after_ms = timed(batch, opened_at, response, resolution)
+    after = [
+        int(level)
+        for pair in zip(response_levels, resolution_levels)
+        for level in pair
+    ]
+    assert before == after, "batch levels differ from the per-ticket levels"
+    print(f"before  {before_ms:>10.1f} ms")
+    print(f"after   {after_ms:>10.1f} ms  ({sum(1 for level in after if level)} warnings)")
+
+    bench_engine = await setup_sqlite(args.tickets) if args.sqlite else engine
+    try:
+        print(f"\nSent alert lookups, {args.tickets} tickets")
+        await lookups(args)
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against in-memory SQLite")
+    parser.add_argument("--tickets", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the visit log User-Agent parsing.
+
+Draws --calls user agents from a corpus of real browser, app and crawler
+strings with a Zipf-like skew (--skew), as visits are dominated by a few
+browsers, and times the previous split(" ") fields, parse_user_agent with
+its cache cleared before every call, and parse_user_agent cached. Prints the
+parsed fields of the corpus with --show.
+
+    python -m benchmarks.bench_user_agent
+    python -m benchmarks.bench_user_agent --calls 200000 --show
+"""
+import argparse
+import random
+import time
+
+from src.utils.user_agent import parse_user_agent
+
+CORPUS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/24.0 Chrome/117.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/124.0.6367.88 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 OPR/109.0.0.0",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7 Build/TQ3A.230901.001) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.82 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 12; SM-X200) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.118 Safari/537.36",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/21E219 [FBAN/FBIOS;FBAV/460.0.0.46.107;FBBV/590522412]",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_3 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 Instagram 326.0.3.26.93 (iPhone14,5; iOS 17_3; en_US)",
+    "Mozilla/5.0 (Linux; U; Android 11; en-US; RMX2185 Build/RP1A.201005.001) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/100.0.4896.58 UCBrowser/13.4.0.1306 Mobile Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 YaBrowser/24.4.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 6.1; WOW64; Trident/7.0; rv:11.0) like Gecko",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) FxiOS/125.0 Mobile/15E148 Safari/605.1.15",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm) Chrome/116.0.1938.76 Safari/537.36",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/124.0.0.0 Safari/537.36",
+    "curl/8.4.0",
+    "PostmanRuntime/7.37.3",
+]
+
+
+def split_fields(user_agent: str):
+    """The previous parsing, guarded against short strings"""
+    parts = user_agent.split(" ")
+    return (parts + [None] * 4)[:4]
+
+
+def sample(args) -> list[str]:
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) ** args.skew for rank in range(len(CORPUS))]
+    return rng.choices(CORPUS, weights=weights, k=args.calls)
+
+
+def run(name: str, parse, agents: list[str]):
+    start = time.perf_counter()
+    for agent in agents:
+        parse(agent)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {elapsed / len(agents) * 1e6:>8.2f} us/call  {len(agents) / elapsed:>10.0f} calls/s")
+
+
+def uncached(agent: str):
+    parse_user_agent.cache_clear()
+    return parse_user_agent(agent)
+
+
+def main(args):
+    if args.show:
+        for agent in CORPUS:
+            print(f"{str(tuple(parse_user_agent(agent))):<72} {agent[:60]}")
+    agents = sample(args)
+    print(f"\n{args.calls} calls over {len(CORPUS)} user agents, skew {args.skew}")
+    run("split", split_fields, agents)
+    run("uncached", uncached, agents)
+    parse_user_agent.cache_clear()
+    run("cached", parse_user_agent, agents)
+    info = parse_user_agent.cache_info()
+    print(f"cache hits {info.hits}  misses {info.misses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--show", action="store_true", help="print the parsed corpus")
+    main(parser.parse_args())
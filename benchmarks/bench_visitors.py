@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the /customers/visitors read path.
+
+Seeds --customers customers with --visits visit logs each and compares the
+previous full load (every visit log of the organization through raw SQL,
+visit counts and location buckets in Python, then the RECENTLY_REGISTERED
+filter scanning the rows once per visitor) with the first keyset page of
+get_visitors_page plus get_visitors_by_location, and with a page further
+down. Reports p50 latency, rows returned and peak Python memory.
+
+    python -m benchmarks.bench_visitors --sqlite
+    python -m benchmarks.bench_visitors --sqlite --customers 5000 --visits 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+import src.tasks  # noqa: F401  imports the models in their usual order
+import src.db.session as db_session
+from src.db.config import async_session, engine
+from src.enums import VisitorFilter, VisitorSort
+from src.models import Customer, CustomerVisitLogs, User
+from src.modules.visitor.schema import VisitorLogsSchema
+from src.modules.visitor.services import get_visitors_by_location, get_visitors_page
+
+BATCH = 5000
+
+
+async def seed(session_factory, organization_id: int, user_id: int, customers: int, visits: int):
+    now = datetime.utcnow()
+    async with session_factory() as session:
+        rows = [
+            {
+                "name": f"guest-{n}" if n % 4 else f"Visitor {n}",
+                "organization_id": organization_id,
+                "created_at": now - timedelta(hours=n % 96),
+                "updated_at": now,
+                "created_by_id": user_id,
+                "updated_by_id": user_id,
+            }
+            for n in range(customers)
+        ]
+        ids = list(await session.scalars(insert(Customer).returning(Customer.id), rows))
+        logs = (
+            {
+                "customer_id": customer_id,
+                "ip_address": f"10.0.{n % 256}.{v}",
+                "latitude": str(n % 50),
+                "longitude": str(v % 5),
+                "join_at": now - timedelta(minutes=n * visits + v),
+                "left_at": None if (n + v) % 3 == 0 else now,
+                "created_at": now,
+                "updated_at": now,
+                "created_by_id": user_id,
+                "updated_by_id": user_id,
+            }
+            for n, customer_id in enumerate(ids)
+            for v in range(visits)
+        )
+        batch = []
+        for row in logs:
+            batch.append(row)
+            if len(batch) == BATCH:
+                await session.execute(insert(CustomerVisitLogs), batch)
+                batch = []
+        if batch:
+            await session.execute(insert(CustomerVisitLogs), batch)
+        await session.commit()
+
+
+async def full_load(organization_id: int):
+    """The previous handler, filtering on RECENTLY_REGISTERED"""
+    visitors_data = await CustomerVisitLogs.sql(f"""
+    SELECT logs.*, cust.name AS customer_name, cust.email AS customer_email, cust.created_at
+    FROM org_customer_logs AS logs
+    JOIN org_customers AS cust
+      ON logs.customer_id = cust.id
+    WHERE cust.organization_id = {organization_id}
+      AND cust.deleted_at IS NULL
+      AND logs.deleted_at IS NULL
+    ORDER BY logs.join_at DESC
+    """)
+    visit_count, location_count = {}, {}
+    for log in visitors_data:
+        visit_count[log["customer_id"]] = visit_count.get(log["customer_id"], 0) + 1
+        key = (log["latitude"], log["longitude"])
+        location_count[key] = location_count.get(key, 0) + 1
+
+    visitors = []
+    for log in visitors_data:
+        left_at = log["left_at"] and datetime.fromisoformat(log["left_at"])
+        last_active = left_at or datetime.utcnow()
+        visitors.append(
+            VisitorLogsSchema(
+                id=log["id"],
+                customer_id=log["customer_id"],
+                visitor_name=log["customer_name"],
+                status="Active" if left_at is None else "Inactive",
+                last_active=last_active.isoformat(),
+                active_duration=str(last_active - datetime.fromisoformat(log["join_at"])),
+                num_of_visits=visit_count[log["customer_id"]],
+                engagged="YES" if left_at is None else "NO",
+                ip_address=log["ip_address"] or "",
+            )
+        )
+
+    def recently_registered(v):
+        cust = next(c for c in visitors_data if c["customer_id"] == v.customer_id)
+        return (datetime.utcnow() - datetime.fromisoformat(cust["created_at"])).days <= 1
+
+    return [v for v in visitors if recently_registered(v)]
+
+
+async def first_page(organization_id: int, limit: int):
+    visitors, cursors = await get_visitors_page(
+        organization_id, [VisitorFilter.RECENTLY_REGISTERED], limit=limit
+    )
+    await get_visitors_by_location(organization_id)
+    return visitors
+
+
+async def page(organization_id: int, sort_by, after: str, limit: int):
+    visitors, _ = await get_visitors_page(organization_id, sort_by=sort_by, after=after, limit=limit)
+    return visitors
+
+
+async def run(name: str, read, n: int):
+    latencies = []
+    tracemalloc.start()
+    for _ in range(n):
+        start = time.perf_counter()
+        rows = await read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{name:<18} rows {len(rows):>7}  "
+        f"p50 {statistics.median(latencies):>9.2f} ms  "
+        f"peak {peak / 2**20:>8.1f} MiB"
+    )
+
+
+async def setup_sqlite(user_id: int):
+    sqlite_engine = create_async_engine("sqlite+aiosqlite://")
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = async_sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    db_session.async_session = session
+    async with session() as s:
+        s.add(User(id=user_id, email="agent@chatboq.com", password="x" * 8, two_fa_secret="", two_fa_auth_url=""))
+        await s.commit()
+    return sqlite_engine, session
+
+
+async def main(args):
+    if args.sqlite:
+        bench_engine, session_factory = await setup_sqlite(args.user_id)
+    else:
+        bench_engine, session_factory = engine, async_session
+    try:
+        if args.sqlite or args.seed:
+            started = time.perf_counter()
+            await seed(session_factory, args.organization_id, args.user_id, args.customers, args.visits)
+            print(
+                f"seeded {args.customers} customers x {args.visits} visits "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+        org = args.organization_id
+        _, cursors = await get_visitors_page(org, sort_by=VisitorSort.MOST_ENGAGED, limit=args.limit * 10)
+        print(f"\npage size {args.limit}, {args.runs} runs")
+        await run("full load", lambda: full_load(org), 1)
+        await run("first page", lambda: first_page(org, args.limit), args.runs)
+        await run(
+            "most engaged +10",
+            lambda: page(org, VisitorSort.MOST_ENGAGED, cursors["after"], args.limit),
+            args.runs,
+        )
+    finally:
+        await bench_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sqlite", action="store_true", help="run against in-memory SQLite")
+    parser.add_argument("--seed", action="store_true", help="seed the organization first")
+    parser.add_argument("--organization-id", type=int, default=1)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--visits", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ip-api.com JSON endpoint.
+
+Answers GET /json/{ip} like the real API, optionally after --latency-ms, with
+a location derived from the address's /24 so repeated lookups agree.
+Private and reserved addresses get the API's failure body. Counts requests
+so the geolocation cache can be measured offline. Point the app at it with
+
+    GEOIP_API_URL=http://127.0.0.1:8026/json
+
+    python -m benchmarks.ipapi_stub --port 8026 --latency-ms 50
+"""
+import argparse
+import ipaddress
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CITIES = [
+    ("Kathmandu", "Nepal", 27.7172, 85.324),
+    ("Berlin", "Germany", 52.52, 13.405),
+    ("Austin", "United States", 30.2672, -97.7431),
+    ("Singapore", "Singapore", 1.3521, 103.8198),
+    ("Sao Paulo", "Brazil", -23.5505, -46.6333),
+]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+
+
+def locate(ip: str) -> dict:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return {"status": "fail", "message": "invalid query"}
+    if not address.is_global:
+        return {"status": "fail", "message": "private range"}
+    network = ipaddress.ip_network(f"{address}/{24 if address.version == 4 else 48}", strict=False)
+    city, country, lat, lon = CITIES[zlib.crc32(str(network).encode()) % len(CITIES)]
+    return {"status": "success", "city": city, "country": country, "lat": lat, "lon": lon}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "ipapi-stub"
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if not path.startswith("/json/"):
+            return self.reply(404, b"")
+        with self.server.stats.lock:
+            self.server.stats.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.reply(200, json.dumps(locate(path[len("/json/"):])).encode())
+
+    def reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port: int = 0, latency_ms: float = 0) -> ThreadingHTTPServer:
+    """Serves the stub from a daemon thread; the bound port is server.server_port"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.stats = Stats()
+    server.latency = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8026)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    stub = start_stub(args.port, args.latency_ms)
+    print(f"ip-api stub on http://127.0.0.1:{stub.server_port}/json")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"requests {stub.stats.requests}")
+    except KeyboardInterrupt:
+        stub.shutdown()
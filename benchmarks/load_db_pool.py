@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Load test sweeping the database pool size against the ticket and chat
+endpoints.
+
+For every --sizes value it starts the app with DB_POOL_SIZE set (and
+DB_DEBUG_HEADER on), logs in, and runs --concurrency clients issuing
+--requests requests per endpoint. Reports throughput, p50/p99 latency, the
+p99 of the per-request pool wait from x-db-stats, and the pool counters from
+/health/db-pool. Needs the database and Redis the app is configured with.
+
+    python -m benchmarks.load_db_pool --sizes 5,10,20,40 --concurrency 50
+    python -m benchmarks.load_db_pool --base-url http://localhost:8000 --token ...
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ENDPOINTS = ["/tickets/", "/agent-chat/conversations", "/tickets/customers"]
+
+
+def pool_wait(response: httpx.Response) -> float:
+    for item in response.headers.get("x-db-stats", "").split(";"):
+        key, _, value = item.partition("=")
+        if key.strip() == "pool-wait-ms":
+            return float(value)
+    return 0.0
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def login(client: httpx.AsyncClient, args) -> str:
+    if args.token:
+        return args.token
+    response = await client.post(
+        "/auth/login", json={"email": args.email, "password": args.password}
+    )
+    response.raise_for_status()
+    return response.json()["data"]["access_token"]
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("app did not start")
+
+
+async def hammer(client: httpx.AsyncClient, path: str, args):
+    latencies, waits, errors = [], [], 0
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            waits.append(pool_wait(response))
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {path:<28} {args.requests / elapsed:>7.0f} req/s  "
+        f"p50 {statistics.median(latencies) if latencies else 0:>7.1f} ms  "
+        f"p99 {percentile(latencies, 0.99):>7.1f} ms  "
+        f"pool wait p99 {percentile(waits, 0.99):>7.1f} ms  errors {errors}"
+    )
+
+
+async def run(base_url: str, args):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await wait_ready(client)
+        token = await login(client, args)
+        client.headers["Authorization"] = f"Bearer {token}"
+        for path in args.endpoints:
+            await hammer(client, path, args)
+        pool = (await client.get("/health/db-pool")).json()
+        print(
+            f"  pool size {pool.get('size')} overflow {pool.get('overflow')}/"
+            f"{pool.get('max_overflow')}  checkouts {pool['checkouts']}  "
+            f"wait p99 {pool['wait_ms_p99']} ms max {pool['wait_ms_max']} ms  "
+            f"timeouts {pool['timeouts']}"
+        )
+
+
+def spawn(size: int, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DB_POOL_SIZE": str(size),
+        "DB_MAX_OVERFLOW": str(args.max_overflow),
+        "DB_DEBUG_HEADER": "true",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:socket_app", "--port", str(args.port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def main(args):
+    if args.base_url:
+        print(f"\n{args.base_url}, {args.concurrency} clients")
+        await run(args.base_url, args)
+        return
+    for size in args.sizes:
+        print(f"\npool size {size}, max overflow {args.max_overflow}, {args.concurrency} clients")
+        process = spawn(size, args)
+        try:
+            await run(f"http://127.0.0.1:{args.port}", args)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=lambda value: [int(v) for v in value.split(",")], default=[5, 10, 20, 40])
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000, help="per endpoint")
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--base-url", help="run once against a running app instead of spawning it")
+    parser.add_argument("--token")
+    parser.add_argument("--email", default="test@gmail.com")
+    parser.add_argument("--password", default="test12345")
+    asyncio.run(main(parser.parse_args()))
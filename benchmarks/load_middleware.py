@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Throughput of the middleware stack under uvicorn.
+
+Starts the app (or uses --base-url), logs in, and runs --concurrency
+clients issuing --requests authenticated requests to /health, which only
+goes through the middlewares, and to /auth/me, which also runs the route's
+query. Reports requests per second and p50/p99 latency. Needs the database
+and Redis the app is configured with; run it on two checkouts to compare.
+
+    python -m benchmarks.load_middleware
+    python -m benchmarks.load_middleware --workers 4 --concurrency 100
+    python -m benchmarks.load_middleware --base-url http://localhost:8000 --token ...
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_db_pool import login, percentile
+
+ENDPOINTS = ["/health", "/auth/me"]
+
+
+async def wait_started(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.5)
+    raise RuntimeError("app did not start")
+
+
+async def hammer(client: httpx.AsyncClient, path: str, args):
+    latencies, errors = [], 0
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {path:<12} {args.requests / elapsed:>7.0f} req/s  "
+        f"p50 {statistics.median(latencies) if latencies else 0:>7.1f} ms  "
+        f"p99 {percentile(latencies, 0.99):>7.1f} ms  errors {errors}"
+    )
+
+
+async def run(base_url: str, args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await wait_started(client)
+        token = await login(client, args)
+        client.headers["Authorization"] = f"Bearer {token}"
+        # warm up the token cache and the connections
+        await asyncio.gather(*(client.get(ENDPOINTS[0]) for _ in range(args.concurrency)))
+        for path in args.endpoints:
+            await hammer(client, path, args)
+
+
+def spawn(args) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "src.main:socket_app",
+            "--port", str(args.port), "--workers", str(args.workers), "--no-access-log",
+        ],
+        env=os.environ,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def main(args):
+    print(f"\n{args.concurrency} clients, {args.requests} requests per endpoint")
+    if args.base_url:
+        await run(args.base_url, args)
+        return
+    process = spawn(args)
+    try:
+        await run(f"http://127.0.0.1:{args.port}", args)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5000, help="per endpoint")
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--base-url", help="run against a running app instead of spawning it")
+    parser.add_argument("--token")
+    parser.add_argument("--email", default="test@gmail.com")
+    parser.add_argument("--password", default="test12345")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Load test of the SLA alert fan-out over Socket.IO.
+
+Connects --receivers users to the SLA namespace of a server backed by the
+Redis client manager, with publishes counted instead of sent, and sends
+--alerts alerts both ways: the previous loop of one emit per receiver room
+and TicketSLANameSpace.broadcast_message, which multicasts to all the rooms.
+Reports Redis publishes and packets encoded per alert, and packets delivered.
+
+    python -m benchmarks.load_sla_alerts --alerts 1000 --receivers 20
+"""
+import argparse
+import asyncio
+import time
+
+import socketio
+from socketio import packet
+
+import src.socket_config  # noqa: F401  imports the namespaces in their usual order
+from src.websocket.constants.chat_namespace_constants import TICKET_SLA_NAMESPACE
+from src.websocket.namespace.ticket.sla_namespace import TicketSLANameSpace
+
+
+class Counters:
+    def __init__(self):
+        self.publishes = 0
+        self.encoded = 0
+        self.delivered = 0
+
+    def reset(self):
+        self.publishes = self.encoded = self.delivered = 0
+
+
+def build_server(counters: Counters) -> socketio.AsyncServer:
+    manager = socketio.AsyncRedisManager("redis://localhost:6379", write_only=True)
+
+    async def publish(data):
+        counters.publishes += 1
+
+    manager._publish = publish
+    sio = socketio.AsyncServer(async_mode="asgi", client_manager=manager)
+
+    class CountingPacket(packet.Packet):
+        def encode(self):
+            counters.encoded += 1
+            return super().encode()
+
+    async def send(eio_sid, eio_pkt):
+        counters.delivered += 1
+
+    sio.packet_class = CountingPacket
+    sio._send_eio_packet = send
+    return sio
+
+
+async def connect(sio: socketio.AsyncServer, receivers: int) -> list[int]:
+    users = list(range(1, receivers + 1))
+    for user_id in users:
+        sid = await sio.manager.connect(f"eio-{user_id}", TICKET_SLA_NAMESPACE)
+        sio.manager.basic_enter_room(sid, TICKET_SLA_NAMESPACE, f"user:{user_id}")
+    return users
+
+
+def alert(n: int) -> dict:
+    return {
+        "message": "75% of the response time has elapsed",
+        "payload": {"id": n, "title": f"Ticket {n}", "status": "open", "assignees": []},
+        "alert_type": "response",
+        "level": 75,
+    }
+
+
+async def per_room(sio, namespace, n: int, receivers: list[int]):
+    data = alert(n)
+    for uid in receivers:
+        await sio.emit("ticket_sla_alert", data, room=f"user:{uid}", namespace=TICKET_SLA_NAMESPACE)
+
+
+async def multicast(sio, namespace, n: int, receivers: list[int]):
+    data = alert(n)
+    await namespace.broadcast_message(
+        payload=data["payload"],
+        message=data["message"],
+        receivers_id=receivers,
+        alert_type=data["alert_type"],
+        level=data["level"],
+    )
+
+
+async def run(name: str, send, sio, namespace, counters: Counters, receivers, args):
+    counters.reset()
+    start = time.perf_counter()
+    for n in range(args.alerts):
+        await send(sio, namespace, n, receivers)
+    # deliveries are scheduled as tasks by the manager
+    await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<10} publishes/alert {counters.publishes / args.alerts:>5.1f}  "
+        f"encodes/alert {counters.encoded / args.alerts:>5.1f}  "
+        f"delivered {counters.delivered:>7}  "
+        f"{args.alerts / elapsed:>8.0f} alerts/s"
+    )
+
+
+async def main(args):
+    counters = Counters()
+    sio = build_server(counters)
+    namespace = TicketSLANameSpace()
+    sio.register_namespace(namespace)
+    receivers = await connect(sio, args.receivers)
+    # the creator is often one of the assignees as well
+    receivers.append(receivers[0])
+
+    print(f"\n{args.alerts} alerts to {args.receivers} receivers")
+    await run("per room", per_room, sio, namespace, counters, receivers, args)
+    await run("multicast", multicast, sio, namespace, counters, receivers, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alerts", type=int, default=1000)
+    parser.add_argument("--receivers", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
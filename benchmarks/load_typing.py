@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Load test of the typing aggregator.
+
+Simulates many sockets typing in bursts and counts the Redis publishes the
+chat namespaces would issue with and without coalescing. Timings are scaled
+down by --scale so a run takes a few seconds.
+
+    python -m benchmarks.load_typing --sessions 200 --scale 0.1
+"""
+import argparse
+import asyncio
+import random
+from collections import Counter
+
+from src.config.settings import settings
+from src.websocket.services.typing_aggregator import TypingAggregator
+
+
+class PublishCounter:
+    def __init__(self):
+        self.channels = Counter()
+
+    async def __call__(self, channel: str, message: dict):
+        self.channels[channel] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.channels.values())
+
+
+async def session(aggregator: TypingAggregator, raw: PublishCounter, index: int, args):
+    sid = f"sid-{index}"
+    message = {
+        "sid": sid,
+        "conversation_id": index % args.conversations,
+        "organization_id": 1,
+        "is_customer": index % 2 == 0,
+    }
+    keystroke = 60 / args.wpm / 5 * args.scale  # ~5 keystrokes per word
+    for _ in range(args.bursts):
+        for n in range(random.randint(10, 60)):
+            typed = {**message, "message": "x" * n}
+            await raw(channel="typing", message=typed)
+            await aggregator.typing(sid, typed)
+            await asyncio.sleep(keystroke * random.uniform(0.5, 1.5))
+        # most clients send stop_typing, some never do
+        if random.random() < args.stop_ratio:
+            await raw(channel="stop", message=message)
+            await aggregator.stop(sid, message["conversation_id"])
+        await asyncio.sleep(random.uniform(2, 6) * args.scale)
+
+
+async def main(args):
+    raw = PublishCounter()
+    coalesced = PublishCounter()
+    aggregator = TypingAggregator(
+        coalesced,
+        window=settings.TYPING_WINDOW_SECONDS * args.scale,
+        idle_timeout=settings.TYPING_IDLE_TIMEOUT_SECONDS * args.scale,
+    )
+
+    await asyncio.gather(
+        *(session(aggregator, raw, index, args) for index in range(args.sessions))
+    )
+    # let the trailing events and idle expiries flush
+    await asyncio.sleep(2 * settings.TYPING_IDLE_TIMEOUT_SECONDS * args.scale)
+
+    print(f"sessions:        {args.sessions}")
+    print(f"without stage:   {raw.total} publishes")
+    print(f"with aggregator: {coalesced.total} publishes {dict(coalesced.channels)}")
+    print(f"reduction:       {raw.total / max(coalesced.total, 1):.1f}x")
+    print(f"still typing:    {aggregator.active()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=3)
+    parser.add_argument("--wpm", type=int, default=60)
+    parser.add_argument("--stop-ratio", type=float, default=0.7)
+    parser.add_argument("--scale", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
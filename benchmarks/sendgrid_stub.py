@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the SendGrid v3 mail/send endpoint.
+
+Accepts POST /v3/mail/send like the real API (202, empty body), optionally
+after --latency-ms, and counts requests and personalizations so email
+throughput can be measured offline. Point the app at it with
+
+    SENDGRID_API_HOST=http://127.0.0.1:8025 SENDGRID_API_KEY=stub
+
+    python -m benchmarks.sendgrid_stub --port 8025 --latency-ms 50
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.personalizations = 0
+        self.rejected = 0
+
+    def reset(self):
+        with self.lock:
+            self.requests = self.personalizations = self.rejected = 0
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "sendgrid-stub"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path != "/v3/mail/send":
+            return self.reply(404)
+        try:
+            personalizations = json.loads(body)["personalizations"]
+        except (ValueError, KeyError):
+            personalizations = None
+        stats = self.server.stats
+        with stats.lock:
+            stats.requests += 1
+            if not personalizations or len(personalizations) > 1000:
+                stats.rejected += 1
+            else:
+                stats.personalizations += len(personalizations)
+        if not personalizations or len(personalizations) > 1000:
+            return self.reply(400)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.reply(202)
+
+    def reply(self, status: int):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port: int = 0, latency_ms: float = 0) -> ThreadingHTTPServer:
+    """Serves the stub from a daemon thread; the bound port is server.server_port"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.stats = Stats()
+    server.latency = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    stub = start_stub(args.port, args.latency_ms)
+    print(f"SendGrid stub on http://127.0.0.1:{stub.server_port}")
+    try:
+        while True:
+            time.sleep(10)
+            stats = stub.stats
+            print(
+                f"requests {stats.requests}  personalizations {stats.personalizations}"
+                f"  rejected {stats.rejected}"
+            )
+    except KeyboardInterrupt:
+        stub.shutdown()
@@ -14,6 +14,7 @@ class BaseMigration:
     table_name: str
     fields: List
     added_column: List
+    added_index: List
     create_new_table: bool
     revision: str
     down_revision: str
@@ -23,6 +24,7 @@ class BaseMigration:
         self.down_revision = down_revision
         self.fields = []
         self.added_column = []
+        self.added_index = []
         self.create_whole_table = True  # by default set the create table true
 
     def add_column(self, col: sa.Column):
@@ -31,11 +33,17 @@ class BaseMigration:
         """
         self.added_column.append(col)
 
+    def index(self, name: str, *columns: str, **kwargs):
+        """
+        This function is used to add an index on existing columns
+        """
+        self.added_index.append((name, list(columns), kwargs))
+
     def upgrade(self) -> None:
         """
         This function is going to create a table
         """
-        if not self.table_name or len(self.fields) == 0:
+        if not self.table_name or (len(self.fields) == 0 and not self.added_index):
             raise OperationalError(
                 "table name and fields must be set", params=None, orig=None
             )
@@ -45,6 +53,8 @@ class BaseMigration:
 
         for col in self.added_column:
             op.add_column(self.table_name, col)
+        for name, columns, kwargs in self.added_index:
+            op.create_index(name, self.table_name, columns, **kwargs)
         return None
 
     def downgrade(self) -> None:
@@ -57,6 +67,8 @@ class BaseMigration:
             op.drop_table(self.table_name)
             return None
 
+        for name, _, _ in reversed(self.added_index):
+            op.drop_index(name, table_name=self.table_name)
         for col in reversed(self.added_column):  # FIFO
             op.drop_column(self.table_name, col.name)
         return None
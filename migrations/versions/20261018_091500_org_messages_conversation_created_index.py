@@ -0,0 +1,44 @@
+"""org messages conversation created_at index
+
+Revision ID: 20261018_091500
+Revises: 20250831_074107
+Create Date: 2026-10-18 09:15:00.000000
+
+"""
+
+from migrations.base import BaseMigration
+from typing import Sequence, Union
+
+revision: str = "20261018_091500"
+down_revision: Union[str, Sequence[str], None] = "20250831_074107"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+class OrgMessagesConversationCreatedIndexMigration(BaseMigration):
+    table_name = "org_messages"
+
+    def __init__(self):
+        super().__init__(revision="20261018_091500", down_revision="20250831_074107")
+        self.create_whole_table = False
+        # keyset pagination of a conversation's history on (created_at, id)
+        self.index(
+            "ix_org_messages_conversation_created_id",
+            "conversation_id",
+            "created_at",
+            "id",
+        )
+
+
+def upgrade() -> None:
+    """
+    Function to create a table
+    """
+    OrgMessagesConversationCreatedIndexMigration().upgrade()
+
+
+def downgrade() -> None:
+    """
+    Function to drop a table
+    """
+    OrgMessagesConversationCreatedIndexMigration().downgrade()
@@ -0,0 +1,55 @@
+"""org customer visit log indexes
+
+Revision ID: 20261018_120000
+Revises: 20261018_091500
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from migrations.base import BaseMigration
+from typing import Sequence, Union
+
+revision: str = "20261018_120000"
+down_revision: Union[str, Sequence[str], None] = "20261018_091500"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+class OrgCustomerLogsIndexMigration(BaseMigration):
+    table_name = "org_customer_logs"
+
+    def __init__(self):
+        super().__init__(revision="20261018_120000", down_revision="20261018_091500")
+        self.create_whole_table = False
+        # visit counts per customer and the join from the customers
+        self.index("ix_org_customer_logs_customer_join", "customer_id", "join_at")
+        # latest visits first, keyset paginated on (join_at, id)
+        self.index("ix_org_customer_logs_join_id", "join_at", "id")
+
+
+class OrgCustomersVisitorSortIndexMigration(BaseMigration):
+    table_name = "org_customers"
+
+    def __init__(self):
+        super().__init__(revision="20261018_120000", down_revision="20261018_091500")
+        self.create_whole_table = False
+        # Newest / Oldest sorts and the recently registered filter
+        self.index("ix_org_customers_org_created_id", "organization_id", "created_at", "id")
+        # A-Z / Z-A sorts
+        self.index("ix_org_customers_org_name", "organization_id", "name")
+
+
+def upgrade() -> None:
+    """
+    Function to create a table
+    """
+    OrgCustomerLogsIndexMigration().upgrade()
+    OrgCustomersVisitorSortIndexMigration().upgrade()
+
+
+def downgrade() -> None:
+    """
+    Function to drop a table
+    """
+    OrgCustomersVisitorSortIndexMigration().downgrade()
+    OrgCustomerLogsIndexMigration().downgrade()
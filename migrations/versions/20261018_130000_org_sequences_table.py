@@ -0,0 +1,56 @@
+"""org sequences table
+
+Revision ID: 20261018_130000
+Revises: 20261018_120000
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from migrations.base import BaseMigration
+from typing import Sequence, Union
+
+revision: str = "20261018_130000"
+down_revision: Union[str, Sequence[str], None] = "20261018_120000"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+class OrgSequencesMigration(BaseMigration):
+    table_name = "org_sequences"
+
+    def __init__(self):
+        super().__init__(revision="20261018_130000", down_revision="20261018_120000")
+        self.create_whole_table = True
+        self.base_columns()
+        self.foreign("organization_id", "sys_organizations", nullable=False)
+        self.string("name", length=50, nullable=False)
+        self.integer("value", nullable=False, server_default="0")
+        self.fields.append(
+            sa.UniqueConstraint("organization_id", "name", name="uniq_org_sequence_name")
+        )
+
+
+def upgrade() -> None:
+    """
+    Function to create a table
+    """
+    OrgSequencesMigration().upgrade()
+    # guest-N numbering continues from the customers created so far
+    op.execute(
+        """
+        INSERT INTO org_sequences (organization_id, name, value, created_at, updated_at)
+        SELECT organization_id, 'guest', count(*), now(), now()
+        FROM org_customers
+        GROUP BY organization_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """
+    Function to drop a table
+    """
+    OrgSequencesMigration().downgrade()
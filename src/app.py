@@ -6,7 +6,7 @@ from starlette.middleware.cors import CORSMiddleware
 from src.common.dependencies import get_user_by_token
 from src.config.broadcast import broadcast
 from src.config.settings import settings
-from src.middleware import AuthMiddleware, DomainMiddleware
+from src.middleware import AuthMiddleware, DomainMiddleware, UnitOfWorkMiddleware
 
 
 # Replace with your friend's IP or use "*" for all origins (less secure)
@@ -20,6 +20,10 @@ app = FastAPI(
 )
 
 
+# Request unit of work, added first so it is the innermost middleware and
+# shares the endpoint's task
+app.add_middleware(UnitOfWorkMiddleware)
+
 # CORS middleware
 
 app.add_middleware(
@@ -1,8 +1,7 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from cachetools import TTLCache
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
@@ -10,10 +9,8 @@ from src.common.context import TenantContext, UserContext
 from src.config.settings import settings
 from src.modules.auth.models import User
 from src.modules.organizations.models import OrganizationRole
-from src.modules.staff_management.models import Permissions
-
-# Initialize cache with 5-minute TTL and 1000-item capacity
-user_cache = TTLCache(maxsize=1000, ttl=300)
+from src.services.auth_cache_service import AuthCacheService
+from src.services.permission_service import PermissionService
 
 security = HTTPBearer()
 
@@ -21,23 +18,28 @@ bearer_scheme = HTTPBearer()
 
 
 async def get_user_by_token(token: str):
+    """
+    User of the access token, None when it is invalid, expired or logged out.
+    Resolved once per token and cached, see AuthCacheService.
+    """
+    entry = await AuthCacheService.get(token)
+    if entry is not None:
+        return AuthCacheService.to_user(entry)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=settings.ALGORITHM)
-
-        if token in user_cache:
-            return user_cache[token]
-
-        user_email: str = payload.get("sub")
-
-        user = await User.find_one(where={"email": user_email})
-
-        return user
-    except Exception as e:
+    except JWTError as e:
         print("expired", e)
         return None
 
+    user = await User.find_one(where={"email": payload.get("sub")})
+    if user:
+        await AuthCacheService.set(token, user, payload["exp"])
+    return user
+
 
 async def validate_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     isEmailVerifyCheck: Optional[bool] = True,
     isTwoFaVerifyCheck: Optional[bool] = True,
@@ -58,7 +60,8 @@ async def validate_user(
             else credentials.credentials
         )
 
-        user = await get_user_by_token(token)
+        # resolved by the AuthMiddleware already on non exempt paths
+        user = getattr(request.state, "user", None) or await get_user_by_token(token)
 
         if user is None:
             raise credentials_exception
@@ -85,8 +88,6 @@ async def validate_user(
         #         status_code=status.HTTP_401_UNAUTHORIZED, detail="Two FA not "
         #     )
 
-        user_cache[token] = user  # Cache the user object
-
         # setting the user_id to the user_context
         UserContext.set(user.id)
 
@@ -103,18 +104,21 @@ async def validate_user(
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
-    return await validate_user(credentials=credentials)
+    return await validate_user(request, credentials=credentials)
 
 
 def get_current_user_factory(
     isEmailVerifyCheck: bool = False, isTwoFaVerifyCheck: bool = False
 ):
     async def current_user(
+        request: Request,
         credentials: HTTPAuthorizationCredentials = Depends(security),
     ):
         return await validate_user(
+            request,
             credentials=credentials,
             isEmailVerifyCheck=isEmailVerifyCheck,
             isTwoFaVerifyCheck=isTwoFaVerifyCheck or False,
@@ -133,12 +137,14 @@ def get_bearer_token(
     )
 
 
-def update_user_cache(token: str, user: User):
-    user_cache[token] = user
+async def update_user_cache(token: str, user: User):
+    """Caches the changed user for the token, dropping the user's other tokens"""
+    await AuthCacheService.replace(token, user, jwt.get_unverified_claims(token)["exp"])
 
 
-def invalidate_user_cache(token: str):
-    user_cache.pop(token, None)
+async def invalidate_user_cache(token: str):
+    """Logs the token out: it no longer resolves to a user until it expires"""
+    await AuthCacheService.revoke(token, jwt.get_unverified_claims(token)["exp"])
 
 
 def create_access_token(
@@ -178,8 +184,7 @@ async def _validate_permissions_exist(permissions: list):
     Ensure all permissions exist in the database.
     """
     for perm in permissions:
-        permission = await Permissions.find_one(where={"id": perm.permission_id})
-        if not permission:
+        if await PermissionService.permission_group(perm.permission_id) is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No such permission with id {perm.permission_id}",
@@ -191,8 +196,7 @@ async def _validate_permission_group(permissions: list, group_id: int):
     Check that all permissions belong to the correct permission group.
     """
     for perm in permissions:
-        permission = await Permissions.find_one(where={"id": perm.permission_id})
-        if permission.group_id != group_id:
+        if await PermissionService.permission_group(perm.permission_id) != group_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Permission {perm.permission_id} does not belong to group {group_id}",
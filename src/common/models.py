@@ -11,7 +11,7 @@ from sqlmodel import Field, SQLModel, select
 from starlette.status import HTTP_404_NOT_FOUND
 
 from src.common.context import TenantContext, UserContext
-from src.db.config import async_session
+from src.db.session import commit, db_session
 
 T = TypeVar("T")
 
@@ -19,7 +19,7 @@ T = TypeVar("T")
 def case_insensitive(attributes):
     def decorator(func):
         async def wrapper(self, *args, **kwargs):
-            async with async_session() as session:
+            async with db_session() as session:
                 statement = select(type(self))
                 for key, value in kwargs.items():
                     if key in attributes:
@@ -115,12 +115,12 @@ class BaseModel(SQLModel):
 
     @classmethod
     async def get(cls: Type[T], id: int) -> Optional[T]:
-        async with async_session() as session:
+        async with db_session() as session:
             return await session.get(cls, id)
 
     @classmethod
     async def first(cls: Type[T], where: Optional[dict] = None) -> Optional[T]:
-        async with async_session() as session:
+        async with db_session() as session:
             if not where:
                 where = {}
             statement = select(cls)
@@ -137,7 +137,7 @@ class BaseModel(SQLModel):
         where: Optional[dict] = None,
         related_items: Optional[Union[_AbstractLoad, list[_AbstractLoad]]] = None,
     ) -> List[T]:
-        async with async_session() as session:
+        async with db_session(read=True) as session:
             if not where:
                 where = {}
             if where is not None:
@@ -156,28 +156,26 @@ class BaseModel(SQLModel):
 
     @classmethod
     async def create(cls: Type[T], **kwargs) -> T:
-        async with async_session() as session:
+        async with db_session() as session:
             obj = cls(**kwargs)
             session.add(obj)
-            await session.commit()
-            await session.refresh(obj)
+            await commit(session, obj)
             return obj
 
     @classmethod
     async def update(cls: Type[T], id: int, **kwargs) -> Optional[T]:
-        async with async_session() as session:
+        async with db_session() as session:
             obj = await session.get(cls, id)
             if obj:
                 for key, value in kwargs.items():
                     setattr(obj, key, value)
                 session.add(obj)
-                await session.commit()
-                await session.refresh(obj)
+                await commit(session, obj)
             return obj
 
     @classmethod
     async def delete(cls: Type[T], where: Optional[dict[Any, Any]] = None) -> None:
-        async with async_session() as session:
+        async with db_session() as session:
             statement = query_statement(
                 cls,
                 where=where,
@@ -189,14 +187,14 @@ class BaseModel(SQLModel):
                 raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Not found")
             if obj:
                 await session.delete(obj)
-                await session.commit()
+                await commit(session)
 
     @classmethod
     async def soft_delete(cls: Type[T], where: Optional[dict[Any, Any]] = None) -> None:
         """
         This function is used for soft delete by setting the current time at deleted_at field
         """
-        async with async_session() as session:
+        async with db_session() as session:
             statement = query_statement(
                 cls,
                 where=where,
@@ -207,8 +205,7 @@ class BaseModel(SQLModel):
                 obj.deleted_at = datetime.now()
                 session.add(obj)
 
-                await session.commit()
-                await session.refresh(obj)
+                await commit(session, obj)
 
     @classmethod
     async def filter(
@@ -240,7 +237,7 @@ class BaseModel(SQLModel):
                     statement = statement.options(item)
             else:
                 statement = statement.options(related_items)
-        async with async_session() as session:
+        async with db_session(read=True) as session:
             result = await session.execute(statement)
             return list(result.scalars().all()) if result else []
 
@@ -265,13 +262,13 @@ class BaseModel(SQLModel):
                     statement = statement.options(item)
             else:
                 statement = statement.options(related_items)
-        async with async_session() as session:
+        async with db_session(read=True) as session:
             result = await session.execute(statement)
             return result.scalars().first() if result else None
 
     @classmethod
     async def sql(cls: Type[T], query: str) -> list[dict]:
-        async with async_session() as session:
+        async with db_session() as session:
             result = await session.execute(sa.text(query))
             rows = result.mappings().all() if result else []
 
@@ -1,6 +1,7 @@
 from src.models import User, OrganizationMember
 from fastapi import Depends, HTTPException, status
 from src.common.dependencies import get_current_user
+from src.services.permission_service import NO_GRANTS, PermissionService
 from typing import List
 
 
@@ -29,9 +30,30 @@ def is_superuser(user: User = Depends(get_current_user)):
 
 
 def has_permissions(required_perms: List[str]):
-    def dependency(current_user=Depends(get_current_user)):
-        # Assume current_user.permissions is List[str]
-        missing = [p for p in required_perms if p not in current_user.permissions]
+    """
+    Requires the permissions, given as "<permission name>" for viewable or
+    "<permission name>:change|delete|view", through the current user's roles
+    in their organization
+    """
+    compiled = {}
+
+    async def dependency(current_user=Depends(get_current_user)):
+        # compiled on first use, names unknown then are looked up again
+        for perm in required_perms:
+            if compiled.get(perm) is None:
+                compiled[perm] = await PermissionService.compile(perm)
+
+        organization_id = (current_user.attributes or {}).get("organization_id")
+        granted = NO_GRANTS
+        if organization_id:
+            index = await PermissionService.for_org(organization_id)
+            granted = index.members.get(current_user.id, NO_GRANTS)
+
+        missing = [
+            perm
+            for perm in required_perms
+            if compiled[perm] is None or not granted.allows(compiled[perm])
+        ]
         if missing:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,81 @@
+import json
+from typing import Any, Optional
+
+from src.config.settings import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional wire format
+    msgpack = None
+
+
+# Header byte of every published payload: high nibble is the wire version,
+# low nibble the format. Payloads without a known header are legacy JSON.
+WIRE_VERSION = 0x10
+JSON_FORMAT = WIRE_VERSION | 0x01
+MSGPACK_FORMAT = WIRE_VERSION | 0x02
+
+
+class PubSubCodec:
+    """
+    Encodes and decodes the pub/sub payloads shared by the publishers and
+    the chat listener.
+    """
+
+    def __init__(self, fmt: Optional[str] = None):
+        fmt = (fmt or settings.PUBSUB_CODEC).lower()
+        if fmt == "msgpack" and msgpack is None:
+            raise RuntimeError("PUBSUB_CODEC=msgpack requires the msgpack package")
+        if fmt not in ("json", "msgpack"):
+            raise ValueError(f"Unsupported pub/sub codec: {fmt}")
+        self.format = fmt
+
+    @staticmethod
+    def _json_dumps(message: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(message, default=str)
+        return json.dumps(message, default=str).encode("utf-8")
+
+    @staticmethod
+    def _json_loads(data: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    def encode(self, message: Any) -> bytes:
+        if self.format == "msgpack":
+            body = msgpack.packb(message, default=str, use_bin_type=True)
+            return bytes((MSGPACK_FORMAT,)) + body
+        return bytes((JSON_FORMAT,)) + self._json_dumps(message)
+
+    def decode(self, data: Any) -> dict:
+        """Decodes a payload exactly once into the dict the subscribers expect"""
+        if isinstance(data, dict):
+            return data
+        if isinstance(data, (int, float)):
+            return {"value": data}
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        try:
+            header = data[0] if data else None
+            if header == MSGPACK_FORMAT:
+                if msgpack is None:
+                    raise ValueError("msgpack payload received without msgpack installed")
+                payload = msgpack.unpackb(data[1:], raw=False)
+            elif header == JSON_FORMAT:
+                payload = self._json_loads(data[1:])
+            else:
+                payload = self._json_loads(data)
+        except Exception:
+            return {"raw": data.decode("utf-8", "replace")}
+
+        return payload if isinstance(payload, dict) else {"raw": payload}
+
+
+codec = PubSubCodec()
@@ -4,6 +4,8 @@ import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
+from src.config.settings import settings
+from src.modules.ticket.services.sla_scheduler import sla_scheduler
 from src.tasks.sla_task import check_sla_breach
 
 logger = logging.getLogger("my_scheduler")
@@ -17,7 +19,11 @@ scheduler = AsyncIOScheduler()
 
 
 async def start_scheduler():
-    scheduler.add_job((check_sla_breach), IntervalTrigger(seconds=10))
+    # index the tickets opened while no scheduler was maintaining the deadlines
+    await sla_scheduler.backfill()
+    scheduler.add_job(
+        (check_sla_breach), IntervalTrigger(seconds=settings.SLA_SCAN_SECONDS)
+    )
     scheduler.start()
 
     await asyncio.Event().wait()
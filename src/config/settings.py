@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     PROJECT_DESCRIPTION: str = "Chatboq Service API"
     DATABASE_URL: str = ""
     ASYNC_DATABASE_URL: str = ""
+    ASYNC_REPLICA_DATABASE_URL: str = ""  # optional read replica for GET requests
     API_PREFIX: str = "/api/v1"
     CELEREY_BROKER_URL: str = "redis://redis:6379"
 
@@ -24,6 +25,35 @@ class Settings(BaseSettings):
     CORS_ORIGINS: List[str] = ["*"]
 
     REDIS_URL: str = "redis://redis:6379/0"
+    CHAT_DISPATCH_WORKERS: int = 8
+    CHAT_DISPATCH_QUEUE_SIZE: int = 1000
+    TYPING_WINDOW_SECONDS: float = 3.0
+    TYPING_IDLE_TIMEOUT_SECONDS: float = 5.0
+    PRESENCE_TTL_SECONDS: int = 120
+    PRESENCE_HEARTBEAT_SECONDS: int = 30
+    PRESENCE_FLUSH_SECONDS: int = 5
+    PRESENCE_FLUSH_LOCK_SECONDS: int = 60  # longest a worker holds the flush before another may take over
+    PUBSUB_CODEC: str = "json"  # json (orjson when installed) or msgpack
+    MESSAGE_PAGE_SIZE: int = 50
+    MESSAGE_PAGE_MAX: int = 200
+    INBOX_PAGE_SIZE: int = 50
+    INBOX_PAGE_MAX: int = 200
+    INBOX_SUMMARY_TTL: int = 300  # seconds a cached conversation summary (customer, members) is served
+    VISITOR_PAGE_SIZE: int = 50
+    VISITOR_PAGE_MAX: int = 200
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10  # connections opened beyond the pool under bursts
+    DB_POOL_TIMEOUT: float = 30  # seconds a request waits for a connection
+    DB_POOL_RECYCLE: int = -1  # seconds before a connection is replaced, -1 never
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection, 0 behind pgbouncer
+    DB_COMMAND_TIMEOUT: float = 0  # asyncpg statement timeout in seconds, 0 none
+    DB_DEBUG_HEADER: bool = False  # adds x-db-stats (sessions, round trips) to responses
+    DB_INSTRUMENTATION: bool = False  # per-request query count, time and repeated statements
+    DB_REPEATED_QUERY_THRESHOLD: int = 3
+    SLA_SCAN_SECONDS: int = 10
+    SLA_SCAN_BATCH: int = 500
+    SLA_RETRY_SECONDS: int = 30
 
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
@@ -52,6 +82,26 @@ class Settings(BaseSettings):
     ENV: str = "development"
     EMAIL_DOMAIN: str = ""
     SENDGRID_API_KEY: str = ""
+    SENDGRID_API_HOST: str = "https://api.sendgrid.com"  # point at a stub server offline
+    SENDGRID_MAX_PERSONALIZATIONS: int = 1000  # provider limit per mail/send call
+    GEOIP_API_URL: str = "http://ip-api.com/json"  # point at a stub server offline
+    GEOIP_MMDB_PATH: str = ""  # GeoLite2-City style .mmdb, looked up before the API
+    GEOIP_HTTP_TIMEOUT: float = 3.0
+    GEOIP_CACHE_SIZE: int = 10000  # network prefixes kept in process
+    GEOIP_CACHE_TTL: int = 86400  # seconds, in process and in Redis
+    GEOIP_PREFIX_V4: int = 24  # addresses sharing a prefix share a location
+    GEOIP_PREFIX_V6: int = 48
+    USER_AGENT_CACHE_SIZE: int = 4096  # parsed User-Agent strings kept in process
+    AUTH_CACHE_SIZE: int = 10000  # resolved tokens kept in process
+    AUTH_CACHE_TTL: int = 300  # seconds a resolved token is trusted, in process and in Redis
+    ORG_CACHE_TTL: int = 600  # seconds an organization is kept in Redis for the domain check
+    ORG_CACHE_NEGATIVE_TTL: int = 60  # seconds an unknown x-org-id is remembered
+    ORG_CACHE_LOCAL_TTL: int = 30  # seconds either is kept in process
+    ORG_CACHE_LOCAL_SIZE: int = 1000
+    REFERENCE_DATA_CHECK_SECONDS: int = 300  # how often countries/timezones/phone codes are checked for changes
+    REFERENCE_DATA_MAX_AGE: int = 3600  # Cache-Control max-age of those endpoints
+    PERMISSION_CACHE_TTL: int = 300  # seconds a compiled permission index is kept in process
+    PERMISSION_CACHE_SIZE: int = 1000  # organizations indexed in process
     SECRET_FERNET_KEY: str = ""
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
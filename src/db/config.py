@@ -4,16 +4,39 @@ from sqlmodel import create_engine
 
 from src.config.settings import settings
 
+from .instrumentation import count_round_trips, instrument
+from .pool import ReplicaQueuePool, engine_options
+
 DATABASE_URL = settings.ASYNC_DATABASE_URL
 SYNC_DATABASE_URL = settings.DATABASE_URL
+REPLICA_DATABASE_URL = settings.ASYNC_REPLICA_DATABASE_URL
+
 
+engine = create_async_engine(url=DATABASE_URL, **engine_options(DATABASE_URL))
 
-engine = create_async_engine(url=DATABASE_URL, pool_size=10)
+count_round_trips(engine)
+if settings.DB_INSTRUMENTATION:
+    instrument(engine)
 
 async_session = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Optional read-only engine, serving the reads of GET requests
+replica_engine = None
+replica_session = None
+if REPLICA_DATABASE_URL:
+    replica_engine = create_async_engine(
+        url=REPLICA_DATABASE_URL,
+        **engine_options(REPLICA_DATABASE_URL, poolclass=ReplicaQueuePool),
+    )
+    count_round_trips(replica_engine)
+    if settings.DB_INSTRUMENTATION:
+        instrument(replica_engine)
+    replica_session = async_sessionmaker(
+        bind=replica_engine, class_=AsyncSession, expire_on_commit=False
+    )
+
 # Create sync engine for Alembic migrations
 sync_engine = create_engine(
     SYNC_DATABASE_URL,
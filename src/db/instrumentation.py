@@ -0,0 +1,110 @@
+import contextvars
+import re
+import time
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+db_stats_ctx = contextvars.ContextVar("db_stats")
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|:\w+")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalizes a statement so the same query with other parameters, literals
+    or IN list lengths gives the same fingerprint
+    """
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _LITERAL.sub("?", statement)
+    statement = _LIST.sub("(?+)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+class DBStats:
+    """Database work of one request: pool checkouts and the time spent
+    waiting for them, round trips, and with instrumentation on, statement
+    count, time and fingerprints"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.round_trips = 0
+        self.pool_wait_ms = 0.0
+        # None without a replica configured
+        self.replica_reads: Optional[int] = None
+        self.queries = 0
+        self.time_ms = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least `threshold` times, likely N+1 loops"""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def header(self, threshold: Optional[int] = None) -> str:
+        value = (
+            f"sessions={self.sessions}; round-trips={self.round_trips}"
+            f"; pool-wait-ms={self.pool_wait_ms:.1f}"
+        )
+        if self.replica_reads is not None:
+            value += f"; replica-reads={self.replica_reads}"
+        if threshold is not None:
+            value += (
+                f"; queries={self.queries}; time-ms={self.time_ms:.1f}"
+                f"; repeated={len(self.repeated(threshold))}"
+            )
+        return value
+
+
+def current_stats() -> Optional[DBStats]:
+    return db_stats_ctx.get(None)
+
+
+def _count(attribute: str):
+    def listener(*args, **kwargs):
+        stats = db_stats_ctx.get(None)
+        if stats is not None:
+            setattr(stats, attribute, getattr(stats, attribute) + 1)
+
+    return listener
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and db_stats_ctx.get(None) is not None:
+        context._db_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = db_stats_ctx.get(None)
+    started = getattr(context, "_db_stats_started", None)
+    if stats is None or started is None:
+        return
+    stats.queries += 1
+    stats.time_ms += (time.perf_counter() - started) * 1000
+    stats.statements[fingerprint(statement)] += 1
+
+
+def count_round_trips(engine: AsyncEngine):
+    """Counts pool checkouts and round trips into the current request's stats"""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine.pool, "checkout", _count("sessions"))
+    event.listen(sync_engine, "before_cursor_execute", _count("round_trips"))
+    event.listen(sync_engine, "commit", _count("round_trips"))
+    event.listen(sync_engine, "rollback", _count("round_trips"))
+
+
+def instrument(engine: AsyncEngine):
+    """Times and fingerprints every statement run for the current request"""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
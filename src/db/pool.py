@@ -0,0 +1,103 @@
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.config.settings import settings
+
+from .instrumentation import db_stats_ctx
+
+# checkout waits kept for the percentiles
+WAIT_SAMPLES = 2048
+
+
+class PoolMetrics:
+    """Checkout waits and timeouts of the engine's pool, since startup"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+    def observe(self, wait_ms: float):
+        self.checkouts += 1
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        self.waits.append(wait_ms)
+        stats = db_stats_ctx.get(None)
+        if stats is not None:
+            stats.pool_wait_ms += wait_ms
+
+    def percentile(self, fraction: float) -> float:
+        if not self.waits:
+            return 0.0
+        waits = sorted(self.waits)
+        return waits[min(int(len(waits) * fraction), len(waits) - 1)]
+
+    def snapshot(self, engine: Optional[AsyncEngine] = None) -> dict:
+        snapshot = {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+            "wait_ms_p50": round(self.percentile(0.5), 3),
+            "wait_ms_p99": round(self.percentile(0.99), 3),
+            "wait_ms_max": round(self.wait_ms_max, 3),
+        }
+        pool = engine.sync_engine.pool if engine is not None else None
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            snapshot.update(
+                size=pool.size(),
+                max_overflow=pool._max_overflow,
+                in_use=pool.checkedout(),
+                idle=pool.checkedin(),
+                # connections opened beyond the pool size, 0 until it is full
+                overflow=max(pool.overflow(), 0),
+            )
+        return snapshot
+
+
+pool_metrics = PoolMetrics()
+replica_pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """The engine's default pool, timing how long each checkout waits"""
+
+    metrics = pool_metrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.observe((time.perf_counter() - start) * 1000)
+        return connection
+
+
+class ReplicaQueuePool(MeteredQueuePool):
+    metrics = replica_pool_metrics
+
+
+def engine_options(url: str, poolclass=MeteredQueuePool) -> dict:
+    """create_async_engine arguments of the pool tuning settings"""
+    options = {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.startswith("postgresql+asyncpg"):
+        connect_args = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+        if settings.DB_COMMAND_TIMEOUT:
+            connect_args["command_timeout"] = settings.DB_COMMAND_TIMEOUT
+        options["connect_args"] = connect_args
+    return options
@@ -0,0 +1,196 @@
+import asyncio
+import contextvars
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .config import async_session, replica_session
+from .instrumentation import DBStats, db_stats_ctx
+
+logger = logging.getLogger(__name__)
+
+# marks the session shared by a request; helpers flush on it and the request commits
+REQUEST_SESSION = "request_session"
+
+# requests whose reads may be served by the replica
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+request_session_ctx = contextvars.ContextVar("request_session")
+
+
+class RequestSession:
+    """
+    Unit of work of one HTTP request.
+
+    The session is opened on first use and shared by every BaseModel helper
+    awaited from the request's own task. It only shares the connection and
+    the transaction: objects are detached after each helper call. Tasks spawned from the request
+    (create_task, gather) copy the contextvar but not the ownership, so they
+    keep opening their own sessions as before.
+
+    Reads of a read-only request go to the replica, when one is configured,
+    until the request writes: from then on it reads its own writes from the
+    primary.
+    """
+
+    def __init__(self, read_only: bool = False):
+        self.owner = asyncio.current_task()
+        self.session: Optional[AsyncSession] = None
+        self.replica: Optional[AsyncSession] = None
+        self.read_only = read_only
+        self.wrote = False
+        self.on_commit: list[Callable[[], Awaitable]] = []
+
+    async def get(self) -> AsyncSession:
+        if self.session is None:
+            self.session = async_session()
+            self.session.info[REQUEST_SESSION] = self
+        return self.session
+
+    def use_replica(self) -> bool:
+        return self.read_only and not self.wrote and replica_session is not None
+
+    async def get_replica(self) -> AsyncSession:
+        if self.replica is None:
+            self.replica = replica_session()
+        return self.replica
+
+    async def finish(self, commit: bool = True):
+        """
+        Commits (or rolls back) the request's work and releases the connections.
+        The unit of work ends here: the after-commit callbacks, and anything
+        the request's task runs afterwards, use sessions of their own.
+        """
+        self.owner = None
+        if self.replica is not None:
+            replica, self.replica = self.replica, None
+            await replica.close()
+        if self.session is None:
+            return
+        session, self.session = self.session, None
+        try:
+            if commit:
+                await session.commit()
+            else:
+                await session.rollback()
+        finally:
+            await session.close()
+        if commit:
+            for callback in self.on_commit:
+                try:
+                    await callback()
+                except Exception:
+                    logger.exception("After commit callback failed")
+
+
+class SessionContext:
+    """
+    Request session context, set by UnitOfWorkMiddleware
+    """
+
+    @classmethod
+    def set(cls, request_session: RequestSession):
+        stats = DBStats()
+        if replica_session is not None:
+            stats.replica_reads = 0
+        db_stats_ctx.set(stats)
+        return request_session_ctx.set(request_session)
+
+    @classmethod
+    def reset(cls, token):
+        request_session_ctx.reset(token)
+
+    @classmethod
+    def get(cls) -> Optional[RequestSession]:
+        """
+        gets the request session if the caller runs in the request's own task
+        """
+        request_session = request_session_ctx.get(None)
+        if request_session is None or request_session.owner is not asyncio.current_task():
+            return None
+        return request_session
+
+    @classmethod
+    def stats(cls) -> Optional[DBStats]:
+        return db_stats_ctx.get(None)
+
+
+def _mark_write(session: Session):
+    request_session = session.info.get(REQUEST_SESSION)
+    if request_session is not None:
+        request_session.wrote = True
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    _mark_write(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(orm_execute_state):
+    # bulk insert/update/delete and textual statements
+    if not orm_execute_state.is_select:
+        _mark_write(orm_execute_state.session)
+
+
+@asynccontextmanager
+async def db_session(read: bool = False) -> AsyncIterator[AsyncSession]:
+    """
+    Yields the current request's session, or a new session outside a request.
+    `read` marks a read-only query the request may send to the replica.
+    """
+    request_session = SessionContext.get()
+    if request_session is not None:
+        if read and request_session.use_replica():
+            session = await request_session.get_replica()
+            stats = db_stats_ctx.get(None)
+            if stats is not None:
+                stats.replica_reads += 1
+        else:
+            session = await request_session.get()
+        try:
+            yield session
+            if session.new or session.dirty or session.deleted:
+                await session.flush()
+        finally:
+            # hand out detached objects like a closed session would, so a
+            # caller keeps the values it read before a later update
+            session.expunge_all()
+        return
+    async with async_session() as session:
+        yield session
+
+
+async def after_commit(callback: Callable[[], Awaitable]):
+    """
+    Awaits the callback once the request's work is committed, right away
+    outside a request. Meant for cache invalidation and jobs reading the
+    request's rows: dropped before the commit, an entry could be filled again
+    from the rows being replaced, and a job could run before its rows exist.
+    """
+    request_session = SessionContext.get()
+    if request_session is not None and request_session.session is not None:
+        request_session.on_commit.append(callback)
+        return
+    await callback()
+
+
+async def commit(session: AsyncSession, *refresh):
+    """
+    Commits and refreshes the given objects outside a request. On a request
+    session it only flushes; the request commits once when it finishes.
+    """
+    if session.info.get(REQUEST_SESSION):
+        await session.flush()
+        for obj in refresh:
+            # only server generated values need a reload after a flush
+            if inspect(obj).expired_attributes:
+                await session.refresh(obj)
+        return
+    await session.commit()
+    for obj in refresh:
+        await session.refresh(obj)
@@ -1,5 +1,7 @@
 from sqlalchemy import event
+from sqlalchemy.orm import object_session
 from src.models import Message ,Conversation # your model
+from src.modules.chat.models.message import LAST_MESSAGE_SAVED
 
 from src.utils.common import do_async_task
 
@@ -15,6 +17,10 @@ async def update_conversation_last_message(message):
 # Example: log when a user is created
 @event.listens_for(Message, "after_insert")
 def after_insert_message(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and session.info.get(LAST_MESSAGE_SAVED):
+        # already written in the same transaction by Message.create_with_attachments
+        return
     do_async_task(update_conversation_last_message, target)
 
     
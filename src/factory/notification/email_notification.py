@@ -40,6 +40,28 @@ class EmailNotification(NotificationInterface):
         except Exception as e:
             logger.exception(e)
 
+    async def send_ticket_batch_email(
+        self,
+        subject: str,
+        from_email: tuple[str, str],
+        recipients: list[str],
+        body_html: str,
+        ticket: Ticket,
+        mail_type: TicketLogActionEnum,
+    ):
+        try:
+            TicketTask.send_ticket_task_batch_email.send(
+                subject=subject,
+                from_email=from_email,
+                recipients=recipients,
+                body_html=body_html,
+                ticket_id=ticket.id,
+                organization_id=ticket.organization_id,
+                mail_type=mail_type,
+            )
+        except Exception as e:
+            logger.exception(e)
+
     async def send_ticket_message_email(
         self,
         subject: str,
@@ -5,9 +5,11 @@ from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from src.app import app
 from src.config.broadcast import broadcast
+from src.db.config import engine, replica_engine
+from src.db.pool import pool_metrics, replica_pool_metrics
 from src.routers import add_routers
 from src.utils.exceptions import add_exceptions_handler
-from src.socket_config import socket_app
+from src.socket_config import chat_dispatcher, socket_app
 from src.events import *
 
 
@@ -57,3 +59,14 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/chat-dispatcher")
+async def chat_dispatcher_metrics():
+    return chat_dispatcher.metrics()
+
+
+@app.get("/health/db-pool")
+async def db_pool_metrics():
+    metrics = pool_metrics.snapshot(engine)
+    if replica_engine is not None:
+        metrics["replica"] = replica_pool_metrics.snapshot(replica_engine)
+    return metrics
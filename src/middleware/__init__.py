@@ -1,3 +1,4 @@
  
 from .auth_middleware import AuthMiddleware
-from .domain_middleware import DomainMiddleware
\ No newline at end of file
+from .domain_middleware import DomainMiddleware
+from .session_middleware import UnitOfWorkMiddleware
\ No newline at end of file
@@ -1,90 +1,85 @@
 import logging
+import re
 from typing import List, Optional
 
-import jwt
-from jwt.exceptions import ExpiredSignatureError
+from fastapi import status
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from src.common.context import TenantContext, UserContext
-from src.config.settings import settings
-from src.modules.auth.models import User
 from src.utils.response import CustomResponse as cr
 
 logger = logging.getLogger(__name__)
 
 
-from fastapi import HTTPException, Request, status
-from starlette.middleware.base import BaseHTTPMiddleware
+def prefix_pattern(paths: Optional[List[str]]) -> Optional[re.Pattern]:
+    """One regex matching any path that starts with one of the prefixes"""
+    if not paths:
+        return None
+    # longest first so alternatives sharing a start don't shadow each other
+    prefixes = sorted(set(paths), key=len, reverse=True)
+    return re.compile("|".join(re.escape(prefix) for prefix in prefixes))
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, get_user_by_token, extemp_paths: Optional[List[str]]):
-        super().__init__(app)
+class AuthMiddleware:
+    """
+    Resolves the bearer token of every HTTP request outside the exempt paths
+    and answers 401 when it does not resolve to a user. The user is kept on
+    request.state.user for the route dependencies, and its id and
+    organization are set on the user and tenant contexts.
+    """
+
+    def __init__(self, app: ASGIApp, get_user_by_token, extemp_paths: Optional[List[str]]):
+        self.app = app
         self.get_user_by_token = (
             get_user_by_token  # async function to get user from token
         )
         self.extemp_paths = extemp_paths
+        self.exempt = prefix_pattern(extemp_paths)
 
-    async def dispatch(self, request: Request, call_next):
-        print(f"Request path: {request.url.path}")
-
-        if request.method == "OPTIONS":
-            return await call_next(request)
-
-
-        # skip protected or extempted paths
-        if self.extemp_paths and any(
-            request.url.path.startswith(path) for path in self.extemp_paths
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or (self.exempt and self.exempt.match(scope["path"]))
         ):
-            print(f"Exempting path: {request.url.path}")
-            return await call_next(request)
-
-        try:
-            auth_header = request.headers.get("Authorization", None)
-            if not auth_header or not auth_header.startswith("Bearer"):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Missing or invalid Authorization header",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            token = auth_header.split(" ")[1]
-            try:
-                payload = jwt.decode(
-                    token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-                )
-                user_email: str = payload.get("sub", None)
-                user = await User.find_one(where={"email": user_email})
-
-                if not user:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="User not found",
-                        headers={"WWW-Authenticate": "Bearer"},
-                    )
-                UserContext.set(user.id)
-                organization_id = user.attributes.get("organization_id")
-                if organization_id:
-                    TenantContext.set(organization_id)
-                    # Set X-Org-Id header for downstream middleware
-                    request.scope["headers"].append(
-                        (b"x-org-id", str(organization_id).encode())
-                    )
-                else:
-                    TenantContext.set(None)
+            await self.app(scope, receive, send)
+            return
 
-                response = await call_next(request)
-                return response
-            except ExpiredSignatureError as e:
-                logging.error(e)
-                return cr.error(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    message="Authentication failed",
-                    data=str(e),
-                )
+        auth_header = Headers(scope=scope).get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer"):
+            response = cr.error(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                message="Authentication required",
+                data="Missing or invalid Authorization header",
+            )
+            await response(scope, receive, send)
+            return
 
+        try:
+            # one resolution per request, reused by the route dependencies
+            user = await self.get_user_by_token(auth_header.split(" ")[1])
         except Exception as e:
-            logging.error(e)
-            return cr.error(
+            logger.error(e)
+            user = None
+        if not user:
+            response = cr.error(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                message="Authentication required",
-                data=str(e),
+                message="Authentication failed",
+                data="Invalid, expired or revoked token",
             )
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["user"] = user
+        UserContext.set(user.id)
+        organization_id = (user.attributes or {}).get("organization_id")
+        TenantContext.set(organization_id)
+        if organization_id:
+            # Set X-Org-Id header for downstream middleware
+            scope["headers"] = [
+                *scope["headers"],
+                (b"x-org-id", str(organization_id).encode()),
+            ]
+
+        await self.app(scope, receive, send)
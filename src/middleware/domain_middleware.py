@@ -1,15 +1,22 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Response
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from src.common.context import TenantContext
 from src.services.cors_cache_service import CORSCacheService
 
 
-class DomainMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, allowed_domains=None):
-        super().__init__(app)
+class DomainMiddleware:
+    """
+    Rejects browser requests from origins outside allowed_domains. Requests
+    to the public /customers endpoints may also come from the domain of the
+    organization named by their x-org-id header, which becomes the tenant.
+    """
 
-        self.allowed_domains = allowed_domains or [
+    def __init__(self, app: ASGIApp, allowed_domains=None):
+        self.app = app
+
+        self.allowed_domains = set(allowed_domains or [
             "http://localhost:3000",
             "http://127.0.0.1:3000",
             "http://127.0.0.1:8000",
@@ -17,43 +24,36 @@ class DomainMiddleware(BaseHTTPMiddleware):
             "http://192.168.1.68:8000",
             "https://api.chatboq.com",
             "https://portal.chatboq.com",
-        ]
+        ])
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Skip domain validation for OPTIONS requests (handled by CORS)
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
 
-        origin = request.headers.get("origin")
-        path = request.url.path
+        headers = Headers(scope=scope)
+        origin = headers.get("origin")
 
         if not origin:
-            return await call_next(request)
-
-        print(f"Request origin: {origin}")
+            await self.app(scope, receive, send)
+            return
 
         # check if path is /customers then check if org_id is present in header
-        if path.startswith("/customers"):
-            org_id = request.headers.get("x-org-id")
-            print(f"org_id {org_id}")
+        if scope["path"].startswith("/customers"):
+            org_id = headers.get("x-org-id")
             if org_id:
                 org = await CORSCacheService.get_org(org_id)
-                print(f"org {org}")
-                if org:
-                    if origin in self.allowed_domains:
-                        TenantContext.set(org.get("id"))
-                        return await call_next(request)
-
-                    if org and org.get("domain") == origin:
-                        TenantContext.set(org.get("id"))
-                        return await call_next(request)
-
-            return Response("Forbidden: Domain not allowed", status_code=403)
+                if org and (origin in self.allowed_domains or org.get("domain") == origin):
+                    TenantContext.set(org.get("id"))
+                    await self.app(scope, receive, send)
+                    return
 
-    
         # Check if origin is in allowed domains
-        if origin in self.allowed_domains:
-            return await call_next(request)
+        elif origin in self.allowed_domains:
+            await self.app(scope, receive, send)
+            return
 
         # If we get here, domain is not allowed
-        return Response("Forbidden: Domain not allowed", status_code=403)
+        response = Response("Forbidden: Domain not allowed", status_code=403)
+        await response(scope, receive, send)
@@ -0,0 +1,87 @@
+import logging
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.settings import settings
+from src.db.session import READ_ONLY_METHODS, RequestSession, SessionContext
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWorkMiddleware:
+    """
+    Gives every HTTP request one database session that the BaseModel helpers
+    join. The work is committed once, right before the response starts, and
+    rolled back when the request fails or answers with an error status.
+
+    Must be the innermost middleware so it runs in the endpoint's task.
+
+    GET requests read from the replica when ASYNC_REPLICA_DATABASE_URL is set,
+    see RequestSession.
+
+    With DB_INSTRUMENTATION on, every request also logs one db_stats line
+    with its query count, DB time and the statements it repeated.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_session = RequestSession(read_only=scope["method"] in READ_ONLY_METHODS)
+        token = SessionContext.set(request_session)
+        finished = False
+        status_code = None
+        started = time.perf_counter()
+        threshold = (
+            settings.DB_REPEATED_QUERY_THRESHOLD if settings.DB_INSTRUMENTATION else None
+        )
+
+        async def send_wrapper(message: Message):
+            nonlocal finished, status_code
+            if message["type"] == "http.response.start" and not finished:
+                finished = True
+                status_code = message["status"]
+                await request_session.finish(commit=status_code < 400)
+                if settings.DB_DEBUG_HEADER:
+                    stats = SessionContext.stats()
+                    headers = [(b"x-db-stats", stats.header(threshold).encode())]
+                    if threshold is not None:
+                        headers += [
+                            (b"x-db-repeated", f"{count}x {statement[:200]}".encode())
+                            for statement, count in stats.repeated(threshold)[:3]
+                        ]
+                    message["headers"] = [*message.get("headers", []), *headers]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                await request_session.finish(commit=False)
+            if threshold is not None:
+                self.log(scope, status_code, started, threshold)
+            SessionContext.reset(token)
+
+    @staticmethod
+    def log(scope: Scope, status_code, started: float, threshold: int):
+        stats = SessionContext.stats()
+        repeated = stats.repeated(threshold)
+        logger.log(
+            logging.WARNING if repeated else logging.INFO,
+            "db_stats method=%s path=%s status=%s queries=%d db_ms=%.1f "
+            "request_ms=%.1f sessions=%d pool_wait_ms=%.1f repeated=%s",
+            scope["method"],
+            scope["path"],
+            status_code,
+            stats.queries,
+            stats.time_ms,
+            (time.perf_counter() - started) * 1000,
+            stats.sessions,
+            stats.pool_wait_ms,
+            [{"count": count, "statement": statement} for statement, count in repeated],
+        )
@@ -23,6 +23,7 @@ from src.modules.organizations.models import (
     OrganizationInvitationRole,
     OrganizationMemberShift,
     OrganizationMemberAccessLevel,
+    OrganizationSequence,
 )
 
 from src.modules.staff_management.models import (
@@ -62,6 +63,7 @@ __all__ = [
     "OrganizationInvitation",
     "OrganizationInvitationRole",
     "OrganizationMemberShift",
+    "OrganizationSequence",
     "Customer",
     "Conversation",
     "ConversationMember",
@@ -11,6 +11,7 @@ from src.common.dependencies import (
     get_bearer_token,
     get_current_user,
     get_current_user_factory,
+    invalidate_user_cache,
     update_user_cache,
 )
 from src.common.utils import (
@@ -22,6 +23,7 @@ from src.common.utils import (
 from src.config.settings import settings
 from src.enums import ProviderEnum
 from src.models import OrganizationInvitation, PhoneCode
+from src.services.auth_cache_service import AuthCacheService
 from src.modules.organizations.models import OrganizationInvitation
 from src.tasks import send_forgot_password_email, send_verification_email
 from src.utils.common import is_production_env
@@ -108,7 +110,10 @@ async def user_login(schema: LoginSchema):
 
 
 @router.post("/logout")
-async def logout(user=Depends(get_current_user_factory())):
+async def logout(
+    user=Depends(get_current_user_factory()),
+    token: str = Depends(get_bearer_token),
+):
     token_data = await RefreshToken.find_one(where={"user_id": user.id, "active": True})
 
     if not token_data:
@@ -121,6 +126,7 @@ async def logout(user=Depends(get_current_user_factory())):
         )
     # Mark the token as inactive
     await RefreshToken.update(token_data.id, active=False)
+    await invalidate_user_cache(token)
 
     return cr.success(
         data={"message": "Logged out successfully"}, message="Logout successful"
@@ -244,7 +250,7 @@ async def verify_email_token(body: VerifyEmailTokenSchema):
     tokens = await create_token(user)
     print(f"user {user}")
 
-    update_user_cache(tokens.get("access_token"), user)
+    await update_user_cache(tokens.get("access_token"), user)
 
     return cr.success(
         data={
@@ -271,6 +277,7 @@ async def reset_password(body: ResetPasswordSchema, user=Depends(get_current_use
     new_hashed_password = hash_password(body.new_password)
 
     await User.update(user.id, password=new_hashed_password)
+    await AuthCacheService.invalidate_user(user.id)
 
     # Here you would typically send a reset link to the user's email
     return cr.success(data={"message": "Password reset successfully"})
@@ -349,6 +356,7 @@ async def forgot_password_verify(body: ForgotPasswordVerifySchema):
     # Update the user's password
 
     await User.update(user.id, password=hash_password(body.new_password))
+    await AuthCacheService.invalidate_user(user.id)
     return cr.success(data={"message": "Password reset successfully"})
 
 
@@ -388,6 +396,7 @@ async def update_user_profile(
 
     if not updated_user:
         raise UserUpdateFailedException()
+    await AuthCacheService.invalidate_user(updated_user.id)
 
     return cr.success(
         data={"user": updated_user.to_json(schema=UserSchema)},
@@ -465,6 +474,8 @@ async def oauth_callback(request: Request, provider: ProviderEnum):
 
 @router.post("/2fa-otp/generate")
 async def generate_2fa_otp(user=Depends(get_current_user)):
+    # the secret is not kept in the auth cache
+    user = await User.get(user.id)
     if user.two_fa_secret and user.two_fa_auth_url:
         otp_secrete = user.two_fa_secret
         otp_auth_url = user.two_fa_auth_url
@@ -480,6 +491,7 @@ async def generate_2fa_otp(user=Depends(get_current_user)):
         two_fa_auth_url=otp_auth_url,
         two_fa_enabled=True,
     )
+    await AuthCacheService.invalidate_user(user.id)
 
     return cr.success(
         data={"otp_secret": otp_secrete, "otp_auth_url": otp_auth_url},
@@ -507,7 +519,7 @@ async def verify_two_fa(
         return cr.error(message=message)
 
     updated_user = await User.update(user.id, is_2fa_verified=True)
-    update_user_cache(token, updated_user)
+    await update_user_cache(token, updated_user)
     print(f"updated user {updated_user.to_json()}")
 
     # Invalidate the refresh token cache
@@ -517,5 +529,6 @@ async def verify_two_fa(
 @router.post("/2fa-disabled")
 async def disable_two_fa(user=Depends(get_current_user)):
     await User.update(user.id, two_fa_enabled=False)
+    await AuthCacheService.invalidate_user(user.id)
 
     return cr.success(message="2FA disabled successfully")
@@ -5,7 +5,7 @@ from sqlalchemy import Column, JSON
 from sqlalchemy.orm import joinedload
 
 from src.common.models import CommonModel
-from src.db.config import async_session
+from src.db.session import db_session
 from sqlmodel import select
 import uuid
 
@@ -34,8 +34,8 @@ class Conversation(CommonModel, table=True):
     is_resolved: bool = Field(default=False)
 
     @classmethod
-    async def get_list(cls, organization_id: int):
-        async with async_session() as session:
+    async def get_list(cls, organization_id: int, ids: Optional[List[int]] = None):
+        async with db_session() as session:
             statement = (
                 select(cls)
                 .filter(cls.organization_id == organization_id)
@@ -44,44 +44,46 @@ class Conversation(CommonModel, table=True):
                     joinedload(cls.customer),
                 )
             )
+            if ids is not None:
+                statement = statement.filter(cls.id.in_(ids))
             results = await session.execute(statement)
             conversations = results.scalars().unique().all()
             return conversations
 
 
-async def get_conversation_list(organization_id: int):
+def serialize_conversation(conversation: Conversation) -> dict:
+    data = {
+        "id": conversation.id,
+        "name": conversation.name,
+        "customer_id": conversation.customer_id,
+        "customer": conversation.customer.to_json(),
+        "organization_id": conversation.organization_id,
+        "members": [],
+        "created_at": conversation.created_at.isoformat(),
+        "updated_at": conversation.updated_at.isoformat(),
+        "is_resolved": conversation.is_resolved,
+        "attributes": conversation.attributes
+    }
+    members = []
+    for member in conversation.members:
+
+        record = {
+            "id": member.id,
+            "conversation_id": member.conversation_id,
+            "user_id": member.user_id,
+
+        }
+        if(member.user):
+            record["user"] = member.user.to_json()
+        members.append(record)
+    data["members"] = members
+    return data
+
+
+async def get_conversation_list(organization_id: int, ids: Optional[List[int]] = None):
     try:
-        conversations = await Conversation.get_list(organization_id)
-        new_list = []
-    
-        for conversation in conversations:
-            data = {
-                "id": conversation.id,
-                "name": conversation.name,
-                "customer_id": conversation.customer_id,
-                "customer": conversation.customer.to_json(),
-                "organization_id": conversation.organization_id,
-                "members": [],
-                "created_at": conversation.created_at.isoformat(),
-                "updated_at": conversation.updated_at.isoformat(),
-                "is_resolved": conversation.is_resolved,
-                "attributes": conversation.attributes
-            }
-            members = []
-            for member in conversation.members:
-       
-                record = {
-                    "id": member.id,
-                    "conversation_id": member.conversation_id,
-                    "user_id": member.user_id,
-               
-                }
-                if(member.user):
-                    record["user"] = member.user.to_json()
-                members.append(record)
-            data["members"] = members
-            new_list.append(data)
-        return new_list
+        conversations = await Conversation.get_list(organization_id, ids)
+        return [serialize_conversation(conversation) for conversation in conversations]
     except Exception as e:
         print(f"Error getting conversation list: {e}")
         return []
@@ -1,4 +1,7 @@
+from datetime import datetime
 from src.common.models import CommonModel
+from src.db.session import commit, db_session
+from sqlalchemy import Index, insert, update
 from sqlmodel import Field, Relationship
 from typing import Optional, TYPE_CHECKING, List
 
@@ -7,9 +10,16 @@ if TYPE_CHECKING:
     from src.modules.auth.models import User
     from src.models import Message
 
+# set on session.info when the write path already updated the conversation's last_message
+LAST_MESSAGE_SAVED = "last_message_saved"
+
 
 class Message(CommonModel, table=True):
     __tablename__ = "org_messages"  # type:ignore
+    __table_args__ = (
+        # keyset pagination of a conversation's history
+        Index("ix_org_messages_conversation_created_id", "conversation_id", "created_at", "id"),
+    )
     conversation_id: int = Field(foreign_key="org_conversations.id", nullable=False)
     messageId: str = Field(max_length=255, index=True)
     content: str = Field(max_length=8000, index=True)
@@ -39,6 +49,68 @@ class Message(CommonModel, table=True):
 
     replies: List["Message"] = Relationship(back_populates="reply_to")
 
+    @classmethod
+    async def create_with_attachments(
+        cls,
+        attachments: Optional[list[dict]] = None,
+        reopen_conversation: bool = False,
+        **kwargs,
+    ):
+        """
+        Inserts the message, all of its attachments and the conversation's
+        last_message in one transaction. Returns the in-memory message, the
+        inserted attachments and the related user and reply_to rows so the
+        outbound payload can be built without reading the message back.
+        """
+        from src.models import Conversation, User
+
+        async with db_session() as session:
+            message = cls(**kwargs)
+            session.add(message)
+            session.info[LAST_MESSAGE_SAVED] = True
+            try:
+                await session.flush()
+            finally:
+                # the session may be the request's, shared with other inserts
+                session.info.pop(LAST_MESSAGE_SAVED, None)
+
+            rows = []
+            if attachments:
+                result = await session.scalars(
+                    insert(MessageAttachment).returning(MessageAttachment),
+                    [
+                        {
+                            "message_id": message.id,
+                            "file_url": file.get("file_url") or file.get("url"),
+                            "file_name": file.get("file_name"),
+                            "file_type": file.get("file_type"),
+                            "created_by_id": message.created_by_id,
+                            "updated_by_id": message.updated_by_id,
+                        }
+                        for file in attachments
+                    ],
+                )
+                rows = list(result)
+
+            values = {
+                "attributes": {"last_message": message.to_json()},
+                "updated_at": datetime.utcnow(),
+            }
+            if reopen_conversation:
+                values["is_resolved"] = False
+            await session.execute(
+                update(Conversation)
+                .where(Conversation.id == message.conversation_id)
+                .values(**values)
+            )
+
+            user = await session.get(User, message.user_id) if message.user_id else None
+            reply_to = (
+                await session.get(cls, message.reply_to_id) if message.reply_to_id else None
+            )
+            await commit(session)
+            return message, rows, user, reply_to
+
 
 class MessageAttachment(CommonModel, table=True):
     __tablename__ = "org_message_attachments"  # type:ignore
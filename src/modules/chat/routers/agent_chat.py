@@ -1,13 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from typing import Optional
 from src.utils.response import CustomResponse as cr
 from src.models import Conversation,  Message
 from src.models import Customer
 from src.common.context import UserContext, TenantContext
 from ..schema import MessageSchema, EditMessageSchema
 
+from ..services.inbox_service import InboxService
 from ..services.message_service import MessageService
 
-from ..models.conversation import get_conversation_list
 from src.models import ConversationMember
 
 from src.websocket.services.conversation_service import ConversationService
@@ -19,13 +20,18 @@ from src.models import ConversationMember
 router = APIRouter()
 
 @router.get("/conversations")
-async def get_conversations():
-   
+async def get_conversations(
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
     organizationId = TenantContext.get()
+    userId = UserContext.get()
 
-    records = await get_conversation_list(organizationId)
+    records, cursors = await InboxService.page(
+        organizationId, userId, before=before, limit=limit
+    )
 
-    return cr.success(data=records)
+    return cr.stream(records, cursors=cursors)
 
 @router.put("/conversations/{conversation_id}/joined")
 async def joined_conversation(conversation_id: int):
@@ -49,6 +55,8 @@ async def joined_conversation(conversation_id: int):
     if not record:
         return cr.error(message="Failed to join conversation")
 
+    await InboxService.invalidate(organizationId, conversation_id)
+
     return cr.success(data=record.to_json())
 
 
@@ -84,7 +92,12 @@ async def conversation_detail(conversation_id: int):
 
 
 @router.get("/conversations/{conversation_id}/messages")
-async def get_conversation_messages(conversation_id: int):
+async def get_conversation_messages(
+    conversation_id: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
     organizationId = TenantContext.get()
 
     record = await Conversation.find_one(
@@ -94,11 +107,11 @@ async def get_conversation_messages(conversation_id: int):
     if not record:
         return cr.error(message="Conversation Not found")
     
-    print(f"get conversation messages {conversation_id} and organizationId {organizationId}")
-
-    records = await MessageService(organizationId).get_messages(conversation_id)
+    records, cursors = await MessageService(organizationId).get_messages(
+        conversation_id, before=before, after=after, limit=limit
+    )
 
-    return cr.success(data=records)
+    return cr.stream(records, cursors=cursors)
 
 
 @router.post("/conversations/{conversation_id}/messages")
@@ -143,7 +156,8 @@ async def resolved_conversation(conversation_id: int):
 
     # update the conversation
     record = await Conversation.update(conversation_id, is_resolved=True)
-    
+    await InboxService.invalidate(organizationId, conversation_id)
+
 
     return cr.success(data=record.to_json())
 
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Query
+from typing import Optional
 from src.common.dependencies import get_current_user
-from src.models import Conversation, Customer, Message
+from src.models import Conversation, Customer
+from ..services.message_service import MessageService
 
 
 router = APIRouter()
@@ -29,19 +31,28 @@ async def conversation_detail(conversation_id: int, user=Depends(get_current_use
 
 
 @router.get("/{conversation_id}/customer_messages")
-async def customer_messages(conversation_id: int, limit: int = 20):
-    messages = await Message.filter(
-        where={"conversation_id": conversation_id}, limit=limit
+async def customer_messages(
+    conversation_id: int,
+    limit: int = Query(20, ge=1),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+):
+    messages, cursors = await MessageService(None).get_messages(
+        conversation_id, before=before, after=after, limit=limit
     )
-    return {"messages": messages}
+    return {"messages": messages, "cursors": cursors}
 
 
 @router.get("/{conversation_id}/messages")
 async def user_messages(
-    conversation_id: int, limit: int = 20, user=Depends(get_current_user)
+    conversation_id: int,
+    limit: int = Query(20, ge=1),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    user=Depends(get_current_user),
 ):
-    messages = await Message.filter(
-        where={"conversation_id": conversation_id}, limit=limit
+    messages, cursors = await MessageService(None).get_messages(
+        conversation_id, before=before, after=after, limit=limit
     )
 
-    return {"messages": messages}
+    return {"messages": messages, "cursors": cursors}
@@ -0,0 +1,259 @@
+import json
+import time
+from datetime import timezone
+from functools import partial
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from src.config.settings import settings
+from src.db.session import after_commit, db_session
+from src.models import Conversation
+from src.services.redis_service import RedisService
+
+from ..models.conversation import serialize_conversation
+
+# inbox:{org}                  zset conversation_id -> last activity (epoch seconds)
+# inbox:summary:{org}:{id}     serialized conversation, dropped when it changes and expiring
+#                              after INBOX_SUMMARY_TTL for the customer and member details
+# inbox:last:{org}             hash conversation_id -> last message json
+# inbox:customer_msgs:{org}    hash conversation_id -> customer messages received so far
+# inbox:read:{org}:{user_id}   hash conversation_id -> customer messages the agent had seen
+# inbox:built:{org}            set once the org's zset has been backfilled from the database
+INBOX_KEY = "inbox:"
+SUMMARY_KEY = "inbox:summary:"
+LAST_MESSAGE_KEY = "inbox:last:"
+CUSTOMER_MESSAGES_KEY = "inbox:customer_msgs:"
+READ_KEY = "inbox:read:"
+BUILT_KEY = "inbox:built:"
+
+# Moves the agent's read pointer to the conversation's current message count
+MARK_READ_SCRIPT = """
+local total = redis.call('HGET', KEYS[1], ARGV[1]) or 0
+redis.call('HSET', KEYS[2], ARGV[1], total)
+return total
+"""
+
+
+def _timestamp(value) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _member(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def encode_cursor(score: float, conversation_id) -> str:
+    """Cursor of an inbox position, the activity score and the conversation id"""
+    return f"{score!r}:{_member(conversation_id)}"
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    score, _, member = cursor.rpartition(":")
+    try:
+        if not member.isdigit():
+            raise ValueError(cursor)
+        return float(score), member
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+class InboxService:
+    """
+    Materialized per-organization inbox kept in Redis.
+
+    Message, seen, join and resolve events update it incrementally, so a page
+    costs one ZREVRANGEBYSCORE and a few HMGETs however many conversations the
+    organization has. Summaries are dropped on change and reloaded from the
+    database for the conversations of the page that miss one, and expire
+    after INBOX_SUMMARY_TTL since the customer and member details they embed
+    change without the conversation changing.
+    """
+
+    _mark_read_script = None
+
+    @staticmethod
+    def summary_key(organization_id: int, conversation_id) -> str:
+        return f"{SUMMARY_KEY}{organization_id}:{conversation_id}"
+
+    @staticmethod
+    def read_key(organization_id: int, user_id) -> str:
+        return f"{READ_KEY}{organization_id}:{user_id}"
+
+    @classmethod
+    async def _script(cls):
+        if cls._mark_read_script is None:
+            redis = await RedisService.get_redis()
+            cls._mark_read_script = redis.register_script(MARK_READ_SCRIPT)
+        return cls._mark_read_script
+
+    @classmethod
+    async def on_message(
+        cls,
+        organization_id: int,
+        conversation_id: int,
+        message: dict,
+        is_customer: bool,
+        user_id: Optional[int] = None,
+    ):
+        """A message was saved: bump the conversation and count it as unread for agents"""
+        redis = await RedisService.get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(f"{INBOX_KEY}{organization_id}", {conversation_id: time.time()})
+            pipe.hset(f"{LAST_MESSAGE_KEY}{organization_id}", conversation_id, json.dumps(message))
+            if is_customer:
+                pipe.hincrby(f"{CUSTOMER_MESSAGES_KEY}{organization_id}", conversation_id, 1)
+            await pipe.execute()
+        if user_id:
+            # an agent replying has read the conversation
+            await cls.mark_read(organization_id, conversation_id, user_id)
+
+    @classmethod
+    async def mark_read(cls, organization_id: int, conversation_id: int, user_id: int):
+        script = await cls._script()
+        await script(
+            keys=[
+                f"{CUSTOMER_MESSAGES_KEY}{organization_id}",
+                cls.read_key(organization_id, user_id),
+            ],
+            args=[conversation_id],
+        )
+
+    @classmethod
+    async def invalidate(cls, organization_id: int, conversation_id: int):
+        """
+        The conversation itself changed (resolved, reopened, joined): drops its
+        summary once the change is committed
+        """
+        await after_commit(partial(cls._drop, organization_id, conversation_id))
+
+    @staticmethod
+    async def _drop(organization_id: int, conversation_id: int):
+        redis = await RedisService.get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(InboxService.summary_key(organization_id, conversation_id))
+            pipe.zadd(f"{INBOX_KEY}{organization_id}", {conversation_id: time.time()})
+            await pipe.execute()
+
+    @staticmethod
+    async def _backfill(organization_id: int):
+        """Seeds the org's zset from the database the first time it is read"""
+        redis = await RedisService.get_redis()
+        if await redis.exists(f"{BUILT_KEY}{organization_id}"):
+            return
+
+        async with db_session() as session:
+            rows = (
+                await session.execute(
+                    select(Conversation.id, Conversation.updated_at).where(
+                        Conversation.organization_id == organization_id,
+                        Conversation.deleted_at.is_(None),
+                    )
+                )
+            ).all()
+
+        async with redis.pipeline(transaction=False) as pipe:
+            if rows:
+                # nx keeps the activity already recorded by live events
+                pipe.zadd(
+                    f"{INBOX_KEY}{organization_id}",
+                    {row.id: _timestamp(row.updated_at) for row in rows},
+                    nx=True,
+                )
+            pipe.set(f"{BUILT_KEY}{organization_id}", 1)
+            await pipe.execute()
+
+    @classmethod
+    async def page(
+        cls,
+        organization_id: int,
+        user_id: Optional[int] = None,
+        before: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        """
+        One page of the inbox, most recent activity first, each conversation
+        with the requesting agent's unread_count. `before` is the cursor
+        returned with the previous page.
+        """
+        limit = min(limit or settings.INBOX_PAGE_SIZE, settings.INBOX_PAGE_MAX)
+        await cls._backfill(organization_id)
+
+        redis = await RedisService.get_redis()
+        max_score, bound, last = "+inf", None, None
+        if before:
+            bound, last = decode_cursor(before)
+            # the boundary score is read again, conversations sharing it come
+            # after the last one returned in reverse member order
+            max_score = repr(bound)
+
+        entries, offset = [], 0
+        while len(entries) <= limit:
+            chunk = await redis.zrevrangebyscore(
+                f"{INBOX_KEY}{organization_id}", max_score, "-inf",
+                start=offset, num=limit + 1, withscores=True,
+            )
+            offset += len(chunk)
+            entries += [
+                (member, score)
+                for member, score in chunk
+                if last is None or score != bound or _member(member) < last
+            ]
+            if len(chunk) <= limit:
+                break
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        if not entries:
+            return [], {"before": before, "has_more": False}
+
+        ids = [int(member) for member, _ in entries]
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.mget([cls.summary_key(organization_id, conversation_id) for conversation_id in ids])
+            pipe.hmget(f"{LAST_MESSAGE_KEY}{organization_id}", ids)
+            pipe.hmget(f"{CUSTOMER_MESSAGES_KEY}{organization_id}", ids)
+            if user_id:
+                pipe.hmget(cls.read_key(organization_id, user_id), ids)
+            results = await pipe.execute()
+        summaries, last_messages, totals = results[:3]
+        reads = results[3] if user_id else [None] * len(ids)
+
+        summaries = {
+            conversation_id: json.loads(summary)
+            for conversation_id, summary in zip(ids, summaries)
+            if summary
+        }
+        missing = [conversation_id for conversation_id in ids if conversation_id not in summaries]
+        if missing:
+            loaded = [
+                serialize_conversation(conversation)
+                for conversation in await Conversation.get_list(organization_id, missing)
+            ]
+            summaries.update({record["id"]: record for record in loaded})
+            gone = [conversation_id for conversation_id in missing if conversation_id not in summaries]
+            async with redis.pipeline(transaction=False) as pipe:
+                for record in loaded:
+                    pipe.set(
+                        cls.summary_key(organization_id, record["id"]),
+                        json.dumps(record),
+                        ex=settings.INBOX_SUMMARY_TTL,
+                    )
+                if gone:
+                    # deleted or moved out of the organization
+                    pipe.zrem(f"{INBOX_KEY}{organization_id}", *gone)
+                await pipe.execute()
+
+        records = []
+        for conversation_id, last_message, total, read in zip(ids, last_messages, totals, reads):
+            record = summaries.get(conversation_id)
+            if record is None:
+                continue
+            record = {**record, "attributes": dict(record.get("attributes") or {})}
+            if last_message:
+                record["attributes"]["last_message"] = json.loads(last_message)
+            record["unread_count"] = max(int(total or 0) - int(read or 0), 0)
+            records.append(record)
+
+        return records, {"before": encode_cursor(entries[-1][1], entries[-1][0]), "has_more": has_more}
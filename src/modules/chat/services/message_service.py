@@ -1,8 +1,16 @@
+import base64
+import binascii
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import select, tuple_
+from src.config.settings import settings
+from src.db.session import db_session
 from src.services.redis_service import RedisService
-from src.models import Conversation, Message, MessageAttachment
+from src.models import Conversation, Message, MessageAttachment, User
 from src.utils.response import CustomResponse as cr
 from src.websocket.constants.channel_names import MESSAGE_CHANNEL,CONVERSATION_UNRESOLVED_CHANNEL
 from ..schema import MessageSchema
+from .inbox_service import InboxService
 from typing import Optional
 from sqlalchemy.orm import selectinload
 from src.services.redis_service import RedisService
@@ -10,6 +18,20 @@ from src.websocket.utils.chat_utils import ChatUtils
 from src.websocket.constants.chat_event_constants import edit_message,receive_message,unresolve_conversation
 
 
+def encode_cursor(message) -> str:
+    """Opaque cursor of a message's (created_at, id) position"""
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
 
 
 class MessageService:
@@ -33,44 +55,48 @@ class MessageService:
         return result.decode('utf-8')
 
     def make_msg_payload(self,record): 
+        return self.build_msg_payload(record, record.user, record.reply_to)
+
+    @staticmethod
+    def build_msg_payload(record, user=None, reply_to=None, attachments=None):
         payload = record.to_json()
         
-        if record.user:
+        if user:
             payload["user"] = {
-                "id": record.user.id,
-                "name": record.user.name,
-                "email": record.user.email,
-                "image": record.user.image
+                "id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "image": user.image
             }
         
-        if record.reply_to:
+        if reply_to:
             payload["reply_to"] = {
-                "id": record.reply_to.id,
-                "content": record.reply_to.content,
-                "user_id": record.reply_to.user_id,
+                "id": reply_to.id,
+                "content": reply_to.content,
+                "user_id": reply_to.user_id,
             }
-        
+
+        if attachments:
+            payload["attachments"] = [attachment.to_json() for attachment in attachments]
         
         return payload
-    
 
-    async def get_message_payload(self, messageId:int,customerId:int=None):
+    async def get_sender_sid(self, customerId: int = None):
         from src.websocket.utils.conversation_utils import ConversationUtility
 
-        record = await Message.find_one({
-            "id": messageId,
-        }, options=[selectinload(Message.reply_to), selectinload(Message.user)])
-        
         # Only get user SID if user_id is present (agent messages)
-        skipSid = None
         if self.user_id:
-            skipSid = await ConversationUtility.get_agent_sid(self.user_id)
-        else:
-            skipSid = await ConversationUtility.get_customer_sid(customer_id=customerId)
+            return await ConversationUtility.get_agent_sid(self.user_id)
+        return await ConversationUtility.get_customer_sid(customer_id=customerId)
+    
 
+    async def get_message_payload(self, messageId:int,customerId:int=None):
+        record = await Message.find_one({
+            "id": messageId,
+        }, options=[selectinload(Message.reply_to), selectinload(Message.user)])
         
         payload = self.make_msg_payload(record)
-        payload["sid"] = skipSid
+        payload["sid"] = await self.get_sender_sid(customerId)
         payload["event"] = receive_message
         
         return payload
@@ -86,30 +112,42 @@ class MessageService:
         
         
         data = {
-            **self.payload.dict(),
+            **self.payload.dict(exclude={"attachments"}),
             "user_id": self.user_id,
             "conversation_id": conversation_id,
         }
-        
-        new_message = await Message.create(**data)
 
-        for file in self.payload.attachments:
-            await MessageAttachment.create(message_id=new_message.id, **file.dict())
-        
-       
-        payload = await self.get_message_payload(new_message.id,record.customer_id)
+        # If user_id is None, it's a customer message
+        is_customer = self.user_id is None
+        reopen = is_customer and record.is_resolved
+
+        # message, attachments and last_message are written in one transaction
+        new_message, attachments, user, reply_to = await Message.create_with_attachments(
+            attachments=[file.dict() for file in self.payload.attachments or []],
+            reopen_conversation=reopen,
+            **data,
+        )
+
+        payload = self.build_msg_payload(new_message, user, reply_to, attachments)
+        payload["sid"] = await self.get_sender_sid(record.customer_id)
+        payload["event"] = receive_message
         payload['customer_id'] = record.customer_id
         
         payload['organization_id'] = self.organization_id
         
         # Set is_customer flag based on whether user_id is present
-        # If user_id is None, it's a customer message
-        payload['is_customer'] = self.user_id is None
+        payload['is_customer'] = is_customer
 
-        if payload['is_customer'] and record.is_resolved:
-            conversation = await Conversation.update(conversation_id, is_resolved=False)
+        await InboxService.on_message(
+            self.organization_id, conversation_id, new_message.to_json(), is_customer, self.user_id
+        )
+
+        if reopen:
+            record.is_resolved = False
+            record.attributes = {"last_message": new_message.to_json()}
+            await InboxService.invalidate(self.organization_id, conversation_id)
             await RedisService.redis_publish(
-                channel=CONVERSATION_UNRESOLVED_CHANNEL, message={"conversation_id": conversation_id,"event":unresolve_conversation,**conversation.to_json()}
+                channel=CONVERSATION_UNRESOLVED_CHANNEL, message={"conversation_id": conversation_id,"event":unresolve_conversation,**record.to_json()}
             )
 
         await RedisService.redis_publish(
@@ -143,12 +181,70 @@ class MessageService:
         return updated_record
     
 
-    async def get_messages(self,conversationId:int):
-   
-        messages = await Message.filter(where={"conversation_id": conversationId},options=[selectinload(Message.reply_to), selectinload(Message.user)])
-        records = []
-        for msg in messages:
-            payload = self.make_msg_payload(msg)
-            records.append(payload)
-        
-        return records
+    async def get_messages(
+        self,
+        conversationId: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        """
+        One page of a conversation's history in ascending order, keyset
+        paginated on (created_at, id). Without a cursor the latest page is
+        returned; `before` pages back in time and `after` pages forward.
+        Reply targets and senders of the page are loaded with one query each.
+
+        Returns the payloads and the cursors {"before", "after", "has_more"}.
+        """
+        limit = min(limit or settings.MESSAGE_PAGE_SIZE, settings.MESSAGE_PAGE_MAX)
+        position = tuple_(Message.created_at, Message.id)
+
+        statement = select(Message).where(
+            Message.conversation_id == conversationId, Message.deleted_at.is_(None)
+        )
+        if after:
+            statement = statement.where(position > tuple_(*decode_cursor(after))).order_by(
+                Message.created_at, Message.id
+            )
+        else:
+            if before:
+                statement = statement.where(position < tuple_(*decode_cursor(before)))
+            statement = statement.order_by(Message.created_at.desc(), Message.id.desc())
+
+        async with db_session(read=True) as session:
+            messages = list(await session.scalars(statement.limit(limit + 1)))
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+            if not after:
+                messages.reverse()
+
+            reply_ids = {msg.reply_to_id for msg in messages if msg.reply_to_id}
+            replies = {}
+            if reply_ids:
+                rows = await session.execute(
+                    select(Message.id, Message.content, Message.user_id).where(
+                        Message.id.in_(reply_ids)
+                    )
+                )
+                replies = {row.id: row for row in rows}
+
+            user_ids = {msg.user_id for msg in messages if msg.user_id}
+            users = {}
+            if user_ids:
+                rows = await session.execute(
+                    select(User.id, User.name, User.email, User.image).where(
+                        User.id.in_(user_ids)
+                    )
+                )
+                users = {row.id: row for row in rows}
+
+        records = [
+            self.build_msg_payload(msg, users.get(msg.user_id), replies.get(msg.reply_to_id))
+            for msg in messages
+        ]
+        cursors = {
+            "before": encode_cursor(messages[0]) if messages else before,
+            "after": encode_cursor(messages[-1]) if messages else after,
+            "has_more": has_more,
+        }
+        return records, cursors
@@ -19,8 +19,8 @@ from sqlmodel import (
 from pydantic import EmailStr
 
 
-from src.common.models import CommonModel, TenantModel
-from src.db.config import async_session
+from src.common.models import BaseModel, CommonModel, TenantModel
+from src.db.session import db_session
 from src.modules.organizations.enums import AccessLevel
 
 # from src.modules.auth.models import User
@@ -98,7 +98,7 @@ class Organization(CommonModel, table=True):
 
     @classmethod
     async def get_orgs_by_user_id(cls, user_id: int):
-        async with async_session() as session:
+        async with db_session(read=True) as session:
             statement = (
                 select(cls)
                 .join(OrganizationMember)
@@ -319,3 +319,19 @@ class OrganizationMemberAccessLevel(TenantModel, table=True):
         back_populates="access_levels",
         sa_relationship_kwargs={"passive_deletes": True},
     )
+
+
+class OrganizationSequence(BaseModel, table=True):
+    """
+    Per-organization counters handed out by SequenceService, e.g. the N of
+    guest-N visitor names
+    """
+
+    __tablename__ = "org_sequences"  # type:ignore
+    __table_args__ = (
+        UniqueConstraint("organization_id", "name", name="uniq_org_sequence_name"),
+    )
+
+    organization_id: int = Field(foreign_key="sys_organizations.id", nullable=False)
+    name: str = Field(max_length=50)
+    value: int = Field(default=0, nullable=False)
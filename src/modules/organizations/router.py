@@ -1,7 +1,7 @@
 import email
 import logging
 from os import stat
-from fastapi import APIRouter, Depends, HTTPException, logger, status
+from fastapi import APIRouter, Depends, HTTPException, Request, logger, status
 from datetime import datetime, timedelta
 from sqlalchemy.orm import selectinload
 from src.modules.auth.router import register
@@ -48,6 +48,9 @@ from src.models import (
 
 from src.models.countries import Country
 from src.models.timezones import Timezone
+from src.services.cors_cache_service import CORSCacheService
+from src.services.permission_service import PermissionService
+from src.services.reference_data_service import ReferenceDataService
 from src.tasks import send_invitation_email
 from src.utils.response import CustomResponse as cr
 from src.common.invitations import get_pending_invitation 
@@ -169,6 +172,8 @@ async def create_organization(
         owner_id=user.id,
         email_alias=email_alias,
     )
+    # drop a lookup of the identifier cached as unknown
+    await CORSCacheService.invalidate(organization.identifier)
 
     await OrganizationMember.create(
         organization_id=organization.id, user_id=user.id, is_owner=True
@@ -187,7 +192,7 @@ async def create_organization(
         if not user:
             raise HTTPException(404, "Not found User")
 
-        update_user_cache(token, user)
+        await update_user_cache(token, user)
 
     return cr.success(data=organization.to_json())
 
@@ -296,6 +301,7 @@ async def delete_member(member_id: int, user=Depends(get_current_user)):
             raise HTTPException(status_code=404, detail="Member not found")
 
         await OrganizationMember.soft_delete(where=where)
+        await PermissionService.invalidate(member.organization_id)
 
     except Exception as e:
         logger.exception(e)
@@ -359,6 +365,7 @@ async def update_member(
 
         for role_id in body.role_ids:
             await OrganizationMemberRole.create(member_id=member.id, role_id=role_id)
+        await PermissionService.invalidate(member.organization_id)
 
         for shift in member.shifts:
             await OrganizationMemberShift.delete(where={"id": shift.id})
@@ -438,6 +445,7 @@ async def create_role(body: CreateRoleSchema, user=Depends(get_current_user)):
             id=role.id,
             attributes={"no_of_agents": 0, "permissions": role_permission_ids},
         )
+        await PermissionService.invalidate(role.organization_id)
 
         return cr.success(data=None, message="Role created successfully")
 
@@ -503,6 +511,7 @@ async def update_role(
                 "permissions": role_permission_ids,
             },
         )
+        await PermissionService.invalidate(role.organization_id)
 
         return cr.success(data=None, message="Role Updated Successfully")
 
@@ -584,6 +593,7 @@ async def delete_role(role_id: int, user=Depends(get_current_user)):
     """
     try:
         await OrganizationRole.soft_delete(where={"id": role_id})
+        await PermissionService.invalidate(TenantContext.get())
 
         return cr.success(data={"message": "Role deletion successful"})
     except Exception as e:
@@ -774,75 +784,37 @@ async def accept_invitation(invitation_id: int, token:str):
     return cr.success(data=record)
 
 @router.get("/countries")
-async def get_countries():
+async def get_countries(request: Request):
     """Get all countries for selection"""
     try:
-
-        countries = await Country.filter()
-
-        countries_data = [
-            {
-                "id": country.id,
-                "name": country.name,
-                "code": country.iso_code_2,
-                "iso_code_2": country.iso_code_2,  # US
-                "iso_code_3": country.iso_code_3,  # USA
-                "phone_code": country.phone_code,  # +977
-            }
-            for country in countries
-        ]
-
-        return cr.success(
-            data={"countries": countries_data},
-            message="Countries retrieved successfully",
-        )
+        snapshot = await ReferenceDataService.get()
     except Exception as e:
         return cr.error(message=f"Failed to retrieve countries: {str(e)}")
+    countries = snapshot.countries
+    return cr.cached(request, countries.body, countries.etag, settings.REFERENCE_DATA_MAX_AGE)
 
 
 @router.get("/timezones")
-async def get_timezones(country_id: Optional[int] = None):
+async def get_timezones(request: Request, country_id: Optional[int] = None):
     """Get all timezones, optionally filtered by country_id"""
     try:
-        where_clause = {}
-        if country_id:
-            where_clause["country_id"] = country_id
-
-        timezones = await Timezone.filter(
-            where=where_clause,
-            related_items=[
-                selectinload(Timezone.country)
-            ],  # for loading countries relationship
-        )
-
-        timezones_data = [
-            {
-                "id": tz.id,
-                "name": tz.name,
-                "display_name": tz.display_name,
-                "country_id": tz.country_id,
-                "country_code":tz.country.iso_code_2,
-                "country_name": tz.country.name if tz.country else None,
-            }
-            for tz in timezones
-        ]
-
-        return cr.success(
-            data={"timezones": timezones_data},
-            message="Timezones retrieved successfully",
-        )
-
+        snapshot = await ReferenceDataService.get()
     except Exception as e:
         return cr.error(message=f"Failed to retrieve timezones: {str(e)}")
+    timezones = snapshot.timezones
+    if country_id:
+        timezones = snapshot.timezones_by_country.get(country_id, snapshot.no_timezones)
+    return cr.cached(request, timezones.body, timezones.etag, settings.REFERENCE_DATA_MAX_AGE)
+
 
 @router.get("/phone-codes")
-async def get_phone_codes():
+async def get_phone_codes(request: Request):
     """Get all phone codes"""
-    phone_codes= await PhoneCode.get_all()
+    phone_codes = (await ReferenceDataService.get()).phone_codes
     if not phone_codes:
         return cr.error(message="Failed to retreive phone codes")
-    
-    return cr.success(data=jsonable_encoder(phone_codes), message="Phone code retreived successfully")
+
+    return cr.cached(request, phone_codes.body, phone_codes.etag, settings.REFERENCE_DATA_MAX_AGE)
 
 
 @router.post("/invitation/{invitation_id}/accept")
@@ -940,6 +912,7 @@ async def assign_role(body: AssignRoleSchema, user=Depends(get_current_user)):
 
     if not member_role:
         await OrganizationMemberRole.create(role_id=body.role_id, member_id=member.id)
+        await PermissionService.invalidate(organization_id)
 
     return cr.success(data={"message": "Successfully assign"})
 
@@ -963,6 +936,7 @@ async def remove_assign_role(body: AssignRoleSchema, user=Depends(get_current_us
         raise HTTPException(400, "Role not found")
 
     await OrganizationMemberRole.soft_delete(member_role.id)
+    await PermissionService.invalidate(organization_id)
     return cr.success(data={"message": "Successfully remove role"})
 
 
@@ -1016,6 +990,7 @@ async def update_workspace(body: WorkspaceUpdateSchema, user=Depends(get_current
 
         if not updated_workspace:
             raise HTTPException(status_code=404, detail="Organization not found")
+        await CORSCacheService.invalidate(updated_workspace.identifier)
         
         workspace=updated_workspace.to_json()
         updated_owner= await update_owner_info(updated_workspace.owner_id,body_data)
@@ -1056,11 +1031,12 @@ async def delete_workspace(body: WorkSpaceDelSchema, token: str = Depends(get_be
 
         # Soft delete the organization
         await Organization.soft_delete(where={"id": organization.id})
+        await CORSCacheService.invalidate(organization.identifier)
         
 
         if user.attributes.get("organization_id") == organization.id:
             user = await User.update(userId,attributes={**user.attributes,"organization_id":None})
-            update_user_cache(token, user)
+            await update_user_cache(token, user)
         
 
         return cr.success(
@@ -1125,6 +1101,7 @@ async def update_organization(
         logo=body.logo,
         domain=body.domain,
     )
+    await CORSCacheService.invalidate(record.identifier)
 
     return cr.success(data=record)
 
@@ -1148,6 +1125,6 @@ async def set_organization(
 
     if not organization:
         raise HTTPException(status_code=404, detail="Organization not found")
-    update_user_cache(token, user)
+    await update_user_cache(token, user)
 
     return cr.success(data={"message": "Organization set successfully"})
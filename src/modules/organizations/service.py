@@ -1,6 +1,7 @@
 from .models import OrganizationMember
 from src.modules.auth.models import User
 from src.models import Country, User
+from src.services.auth_cache_service import AuthCacheService
 
 async def lookup_country_by_phone_code(phone_code: str):
     if not phone_code:
@@ -56,4 +57,5 @@ async def update_owner_info(owner_id: int, body_data: dict):
         updated_user=await User.update(owner_id, **owner_update_data)
         if not updated_user:
             return cr.error(message="Failed to update the owner data")
+        await AuthCacheService.invalidate_user(owner_id)
         return updated_user
@@ -1,8 +1,9 @@
 import logging
+from typing import Optional
 
 from cryptography.fernet import Fernet
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Email, Mail
+from sendgrid.helpers.mail import Email, Mail, Personalization, To
 
 from src.config.settings import settings
 
@@ -48,6 +49,17 @@ def get_recent_reply(full_text: str) -> str:
     return "\n".join(recent_lines).strip()
 
 
+_client: Optional[SendGridAPIClient] = None
+
+
+def get_sendgrid_client() -> SendGridAPIClient:
+    """One client per worker process instead of one per email"""
+    global _client
+    if _client is None:
+        _client = SendGridAPIClient(settings.SENDGRID_API_KEY, host=settings.SENDGRID_API_HOST)
+    return _client
+
+
 def send_sendgrid_email(
     from_email: tuple[str, str],
     to_email: str,
@@ -67,7 +79,38 @@ def send_sendgrid_email(
 
         message.reply_to = Email(f"{reply}@reply.{settings.EMAIL_DOMAIN}", "Reply To")
 
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
+        response = get_sendgrid_client().send(message)
     except Exception as e:
         logger.exception(e)
+
+
+def send_sendgrid_batch_email(
+    from_email: tuple[str, str],
+    to_emails: list[str],
+    subject: str,
+    html_content: str,
+    ticket_id: int,
+    org_id: int,
+) -> int:
+    """
+    Sends the same email to every recipient, each in its own personalization
+    so they don't see each other, in as few calls as the provider limit
+    allows. Returns the number of calls made; errors are raised.
+    """
+    reply = encode_ticket(org_id=org_id, ticket_id=ticket_id)
+    limit = settings.SENDGRID_MAX_PERSONALIZATIONS
+    calls = 0
+    for start in range(0, len(to_emails), limit):
+        message = Mail(
+            from_email=Email(from_email[0], from_email[1]),
+            subject=subject,
+            html_content=html_content,
+        )
+        message.reply_to = Email(f"{reply}@reply.{settings.EMAIL_DOMAIN}", "Reply To")
+        for to_email in to_emails[start : start + limit]:
+            personalization = Personalization()
+            personalization.add_to(To(to_email))
+            message.add_personalization(personalization)
+        get_sendgrid_client().send(message)
+        calls += 1
+    return calls
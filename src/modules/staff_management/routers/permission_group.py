@@ -1,30 +1,19 @@
 from typing import Dict, List, Any
 from fastapi import APIRouter, Depends
-from src.models import PermissionGroup, Permissions, RolePermission
+from src.common.context import TenantContext
 from src.modules.staff_management.schemas.permission_group import (
     PermissionOutSchema,
 )
 from src.common.dependencies import get_current_user
+from src.services.permission_service import PermissionService
 
 router = APIRouter()
 
 
 @router.get("/permission-groups", response_model=Dict[str, List[PermissionOutSchema]])
 async def get_permission_groups(current_user=Depends(get_current_user)):
-    groups = await PermissionGroup.filter()
-    all_permissions = await Permissions.filter()
-
-    perms_by_group_id = {}
-    for perm in all_permissions:
-        perms_by_group_id.setdefault(perm.group_id, []).append(perm)
-
-    response = {}
-    for group in groups:
-        perms = perms_by_group_id.get(group.id, [])
-        perms_list = [PermissionOutSchema.model_validate(perm) for perm in perms]
-        response[group.name] = perms_list
-
-    return response
+    catalog = await PermissionService.catalog()
+    return {name: perms for name, perms in catalog.groups}
 
 
 @router.post("/permission-groups", response_model=Dict[str, Any])
@@ -32,45 +21,32 @@ async def get_permission_groups_with_role_perms(
     role_id: int,
     current_user=Depends(get_current_user),
 ):
-    groups = await PermissionGroup.filter()
-    all_permissions = await Permissions.filter()
-    role_perms = await RolePermission.filter(where={"role_id": role_id})
-
-    role_perm_map = {rp.permission_id: rp for rp in role_perms}
+    catalog = await PermissionService.catalog()
+    role_perms = []
+    organization_id = TenantContext.get()
+    if organization_id:
+        index = await PermissionService.for_org(organization_id)
+        role_perms = index.role_permissions.get(role_id, [])
 
-    perms_by_group_id = {}
-    for perm in all_permissions:
-        perms_by_group_id.setdefault(perm.group_id, []).append(perm)
+    role_perm_map = {rp["permission_id"]: rp for rp in role_perms}
 
     response = {}
-    for group in groups:
-        perms = perms_by_group_id.get(group.id, [])
+    for name, perms in catalog.groups:
         perms_list = []
         for perm in perms:
-            schema_data = PermissionOutSchema.model_validate(perm).model_dump()
-
-            rp = role_perm_map.get(perm.id)
+            rp = role_perm_map.get(perm["id"])
             if rp is not None:
-                schema_data.update(
-                    {
-                        "is_changeable": rp.is_changeable,
-                        "is_deletable": rp.is_deletable,
-                        "is_viewable": rp.is_viewable,
-                    }
-                )
+                perm = {
+                    **perm,
+                    "is_changeable": rp["is_changeable"],
+                    "is_deletable": rp["is_deletable"],
+                    "is_viewable": rp["is_viewable"],
+                }
 
-            perms_list.append(PermissionOutSchema(**schema_data))
+            perms_list.append(PermissionOutSchema(**perm))
 
-        response[group.name] = perms_list
+        response[name] = perms_list
 
-    response["role_permissions"] = [
-        {
-            "permission_id": rp.permission_id,
-            "is_changeable": rp.is_changeable,
-            "is_deletable": rp.is_deletable,
-            "is_viewable": rp.is_viewable,
-        }
-        for rp in role_perms
-    ]
+    response["role_permissions"] = [dict(rp) for rp in role_perms]
 
     return response
@@ -1,13 +1,20 @@
 import logging
 from datetime import datetime
+from functools import partial
+from typing import Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
 
 from fastapi import HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
 
-from src.factory.notification import NotificationFactory
-from src.modules.auth.models import User
+from src.db.session import after_commit, db_session
 from src.modules.ticket.enums import (
     TicketAlertTypeEnum,
     TicketLogActionEnum,
@@ -16,6 +23,8 @@ from src.modules.ticket.enums import (
 from src.modules.ticket.models import TicketSLA
 from src.modules.ticket.models.priority import TicketPriority
 from src.modules.ticket.models.ticket import Ticket, TicketAlert
+from src.modules.ticket.services.sla_notifier import SLAEmailBatch
+from src.modules.ticket.services.sla_scheduler import sla_scheduler
 from src.modules.ticket.schemas import (
     CreateSLASchema,
     EditTicketSLASchema,
@@ -26,12 +35,16 @@ from src.modules.ticket.schemas import (
 from src.socket_config import ticket_sla_ns
 from src.utils.common import extract_subset_from_dict
 from src.utils.exceptions.ticket import TicketSLANotFound
-from src.utils.get_templates import get_templates
 from src.utils.response import CustomResponse as cr
 from src.utils.validations import TenantEntityValidator
 
 logger = logging.getLogger(__name__)
 
+# TicketAlert ids per IN query, below the driver's bind parameter limit
+ALERT_PREFETCH_CHUNK = 10000
+
+TIME_LABELS = {"response": "response time", "resolution": "resolution time"}
+
 
 class TicketSLAServices:
     """
@@ -147,7 +160,14 @@ class TicketSLAServices:
                 await tenant.validate(TicketPriority, data["priority_id"])
 
             # updating and logging
-            await TicketSLA.update(sla_id, **data)
+            updated = await TicketSLA.update(sla_id, **data)
+            if "response_time" in data or "resolution_time" in data:
+                await after_commit(
+                    partial(
+                        sla_scheduler.reschedule_sla,
+                        sla_id, updated.response_time, updated.resolution_time,
+                    )
+                )
             await sla.save_to_log(
                 action=TicketLogActionEnum.TICKET_SLA_UPDATED,
                 previous_value=extract_subset_from_dict(sla.to_json(), data),
@@ -233,6 +253,144 @@ class TicketSLAServices:
 
         return int(percentage)
 
+    def calculate_sla_percentages(
+        self,
+        opened_at: Sequence[int],
+        response_times: Sequence[int],
+        resolution_times: Sequence[int],
+        now: Optional[int] = None,
+    ):
+        """
+        Batch version of the two methods above: the response and resolution
+        percentages of many tickets against one current time, in one pass.
+        Opened at times are timestamps in seconds. Returns two int arrays
+        (lists without numpy).
+        """
+        if now is None:
+            now = int(datetime.utcnow().timestamp())
+        if np is None:
+            return (
+                [_percentage(now, o, t) for o, t in zip(opened_at, response_times)],
+                [_percentage(now, o, t) for o, t in zip(opened_at, resolution_times)],
+            )
+
+        elapsed = now - np.asarray(opened_at, dtype=np.int64)
+        percentages = []
+        for durations in (response_times, resolution_times):
+            durations = np.asarray(durations, dtype=np.int64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                percentage = np.trunc(elapsed * 100 / durations)
+            percentage = np.where(elapsed >= durations, 100, percentage)
+            percentages.append(percentage.astype(np.int64))
+        return percentages[0], percentages[1]
+
+    def warning_levels(self, percentages):
+        """
+        Vectorized get_enum_from_range: the warning level reached by each
+        percentage, 0 below the 75% warning
+        """
+        if np is None:
+            return [
+                self.get_enum_from_range(p).value if p >= WarningLevelEnum.WARNING_75 else 0
+                for p in percentages
+            ]
+        percentages = np.asarray(percentages)
+        return np.select(
+            [
+                percentages >= WarningLevelEnum.WARNING_100,
+                percentages >= WarningLevelEnum.WARNING_90,
+                percentages >= WarningLevelEnum.WARNING_75,
+            ],
+            [
+                WarningLevelEnum.WARNING_100.value,
+                WarningLevelEnum.WARNING_90.value,
+                WarningLevelEnum.WARNING_75.value,
+            ],
+            default=0,
+        )
+
+    async def sent_alerts(self, ticket_ids: Iterable[int]) -> set[tuple[int, str, int]]:
+        """
+        (ticket_id, alert_type, warning_level) of the alerts already sent for
+        the tickets, fetched with one IN query per ALERT_PREFETCH_CHUNK tickets
+        """
+        ticket_ids = list(set(ticket_ids))
+        sent = set()
+        if not ticket_ids:
+            return sent
+        async with db_session() as session:
+            for start in range(0, len(ticket_ids), ALERT_PREFETCH_CHUNK):
+                rows = await session.execute(
+                    select(
+                        TicketAlert.ticket_id,
+                        TicketAlert.alert_type,
+                        TicketAlert.warning_level,
+                    ).where(
+                        TicketAlert.ticket_id.in_(
+                            ticket_ids[start : start + ALERT_PREFETCH_CHUNK]
+                        )
+                    )
+                )
+                sent.update(
+                    (ticket_id, str(alert_type), int(level))
+                    for ticket_id, alert_type, level in rows
+                )
+        return sent
+
+    async def sla_breach_notifications(self, checks: Sequence[tuple[Ticket, str]]):
+        """
+        Sends the due warnings of many (ticket, alert_type) pairs: computes
+        every percentage in one batch, looks the sent alerts up once and sends
+        one email per ticket. Tickets must have their sla, assignees and
+        organization loaded. Returns the pairs that failed.
+        """
+        if not checks:
+            return []
+        tickets = [ticket for ticket, _ in checks]
+        response, resolution = self.calculate_sla_percentages(
+            [int(ticket.opened_at.timestamp()) for ticket in tickets],
+            [ticket.sla.response_time for ticket in tickets],
+            [ticket.sla.resolution_time for ticket in tickets],
+        )
+        levels = {
+            "response": self.warning_levels(response),
+            "resolution": self.warning_levels(resolution),
+        }
+        due = [
+            (index, ticket, alert_type)
+            for index, (ticket, alert_type) in enumerate(checks)
+            if levels[alert_type][index]
+        ]
+        sent = await self.sent_alerts(ticket.id for _, ticket, _ in due)
+        emails = SLAEmailBatch()
+
+        failed = []
+        for index, ticket, alert_type in due:
+            percentage = int(
+                response[index] if alert_type == "response" else resolution[index]
+            )
+            try:
+                await self._check_breach(
+                    alert_type,
+                    ticket,
+                    percentage,
+                    TIME_LABELS[alert_type],
+                    sent=sent,
+                    emails=emails,
+                    level=WarningLevelEnum(int(levels[alert_type][index])),
+                )
+            except Exception:
+                logger.exception(
+                    "SLA %s alert failed for ticket %d", alert_type, ticket.id
+                )
+                failed.append((ticket, alert_type))
+        try:
+            await emails.flush()
+        except Exception:
+            # the alerts are recorded already, a retry would not resend them
+            logger.exception("Sending the SLA breach emails failed")
+        return failed
+
     def get_enum_from_range(self, value: int) -> WarningLevelEnum:
         """
         returns the enum on the basis of value
@@ -255,12 +413,20 @@ class TicketSLAServices:
         )
 
     async def _check_breach(
-        self, w_type: str, ticket: Ticket, time_percentage: int, time_label: str
+        self,
+        w_type: str,
+        ticket: Ticket,
+        time_percentage: int,
+        time_label: str,
+        sent: Optional[set] = None,
+        emails: Optional[SLAEmailBatch] = None,
+        level: Optional[WarningLevelEnum] = None,
     ):
+        """`level` is the warning level of the percentage, when computed already"""
         if time_percentage < WarningLevelEnum.WARNING_75:
             return
 
-        breach_level = self.get_enum_from_range(time_percentage)
+        breach_level = level or self.get_enum_from_range(time_percentage)
 
         if breach_level == WarningLevelEnum.WARNING_75:
             await self.handle_warning(
@@ -268,10 +434,26 @@ class TicketSLAServices:
                 ticket,
                 breach_level,
                 f"75% of the {time_label} has elapsed",
+                sent=sent,
+                emails=emails,
+            )
+        elif breach_level == WarningLevelEnum.WARNING_90:
+            await self.handle_warning(
+                w_type,
+                ticket,
+                breach_level,
+                f"90% of the {time_label} has elapsed",
+                sent=sent,
+                emails=emails,
             )
         elif breach_level == WarningLevelEnum.WARNING_100:
             await self.handle_warning(
-                w_type, ticket, breach_level, f"SLA {time_label} has been breached"
+                w_type,
+                ticket,
+                breach_level,
+                f"SLA {time_label} has been breached",
+                sent=sent,
+                emails=emails,
             )
 
     async def handle_warning(
@@ -280,9 +462,13 @@ class TicketSLAServices:
         ticket: Ticket,
         level: WarningLevelEnum,
         message: str,
+        sent: Optional[set] = None,
+        emails: Optional[SLAEmailBatch] = None,
     ):
         """
-        Checks if warning already exists and sends alert and email if not
+        Checks if warning already exists and sends alert and email if not.
+        `sent` is the prefetched result of sent_alerts, sparing the lookup,
+        and `emails` collects the email to be sent with the rest of the batch.
         """
 
         alert_type = (
@@ -291,13 +477,17 @@ class TicketSLAServices:
             else TicketAlertTypeEnum.RESOLUTION.value
         )
 
-        alert_exists = await TicketAlert.find_one(
-            where={
-                "ticket_id": ticket.id,
-                "alert_type": alert_type,
-                "warning_level": level.value,
-            }
-        )
+        key = (ticket.id, alert_type, level.value)
+        if sent is not None:
+            alert_exists = key in sent
+        else:
+            alert_exists = await TicketAlert.find_one(
+                where={
+                    "ticket_id": ticket.id,
+                    "alert_type": alert_type,
+                    "warning_level": level.value,
+                }
+            )
 
         if alert_exists:
             return
@@ -311,7 +501,12 @@ class TicketSLAServices:
             "sent_at": datetime.utcnow(),
         }
         await TicketAlert.create(**data)
-        await self._send_email(ticket, message)
+        if sent is not None:
+            sent.add(key)
+        if emails is not None:
+            emails.add(ticket, message)
+        else:
+            await self._send_email(ticket, message)
 
     async def send_alert_broadcast(
         self, ticket: Ticket, message: str, alert_type: str, level: int
@@ -334,30 +529,9 @@ class TicketSLAServices:
         """
         Sends SLA breach email to ticket assignees + creator.
         """
-        receivers = [assignee.email for assignee in ticket.assignees]
-        creator = await User.find_one(where={"id": ticket.created_by_id})
-        if creator:
-            receivers.append(creator.email)
-
-        html_content = {"message": message, "ticket": ticket}
-        template = await get_templates(
-            name="ticket/sla-breach-email.html", content=html_content
-        )
-        receivers.append("aryanbrahmabytelab@gmail.com")
-        receivers.append("aryantamang@tuicms.edu.np")
-        receivers.append("rajipmahato68@gmail.com")
-
-        logger.info(f"The receivers {receivers} {ticket.sender_domain}")
-        for receiver in receivers:
-            email = NotificationFactory.create("email")
-            await email.send_ticket_email(
-                subject="SLA breach",
-                recipients=receiver,
-                body_html=template,
-                from_email=(ticket.sender_domain, ticket.organization.name),
-                ticket=ticket,
-                mail_type=TicketLogActionEnum.SLA_BREACH_EMAIL_SENT,
-            )
+        emails = SLAEmailBatch()
+        emails.add(ticket, message)
+        await emails.flush()
 
     async def find_ticket_by_sla(self, sla: TicketSLA):
         """
@@ -370,4 +544,10 @@ class TicketSLAServices:
             return None
 
 
+def _percentage(now: int, opened_at: int, duration: int) -> int:
+    if now - opened_at >= duration:
+        return 100
+    return int((now - opened_at) * 100 / duration)
+
+
 sla_service = TicketSLAServices()
@@ -0,0 +1,79 @@
+import logging
+
+from sqlalchemy import select
+
+from src.db.session import db_session
+from src.factory.notification import NotificationFactory
+from src.modules.auth.models import User
+from src.modules.ticket.enums import TicketLogActionEnum
+from src.modules.ticket.models.ticket import Ticket
+from src.utils.get_templates import get_templates
+
+logger = logging.getLogger(__name__)
+
+
+class SLAEmailBatch:
+    """
+    SLA breach emails of one tick.
+
+    Warnings are collected per ticket and sent on flush as one email per
+    ticket, listing every warning it reached in the tick, to its assignees and
+    creator deduplicated. Each email goes out as a single batched SendGrid
+    call and a single ticket log row.
+    """
+
+    def __init__(self):
+        self.tickets: dict[int, Ticket] = {}
+        self.messages: dict[int, list[str]] = {}
+
+    def add(self, ticket: Ticket, message: str):
+        self.tickets[ticket.id] = ticket
+        messages = self.messages.setdefault(ticket.id, [])
+        if message not in messages:
+            messages.append(message)
+
+    async def _creator_emails(self) -> dict[int, str]:
+        creator_ids = {ticket.created_by_id for ticket in self.tickets.values()}
+        async with db_session() as session:
+            rows = await session.execute(
+                select(User.id, User.email).where(User.id.in_(creator_ids))
+            )
+            return dict(rows.all())
+
+    def recipients(self, ticket: Ticket, creators: dict[int, str]) -> list[str]:
+        emails = [assignee.email for assignee in ticket.assignees]
+        emails.append(creators.get(ticket.created_by_id))
+        unique = {}
+        for email in emails:
+            if email:
+                unique.setdefault(email.strip().lower(), email.strip())
+        return list(unique.values())
+
+    async def flush(self) -> int:
+        """Enqueues the collected emails, returns how many were sent"""
+        if not self.tickets:
+            return 0
+        creators = await self._creator_emails()
+        email = NotificationFactory.create("email")
+        sent = 0
+        for ticket_id, ticket in self.tickets.items():
+            recipients = self.recipients(ticket, creators)
+            if not recipients:
+                continue
+            template = await get_templates(
+                name="ticket/sla-breach-email.html",
+                content={"message": "; ".join(self.messages[ticket_id]), "ticket": ticket},
+            )
+            await email.send_ticket_batch_email(
+                subject="SLA breach",
+                recipients=recipients,
+                body_html=template,
+                from_email=(ticket.sender_domain, ticket.organization.name),
+                ticket=ticket,
+                mail_type=TicketLogActionEnum.SLA_BREACH_EMAIL_SENT,
+            )
+            sent += 1
+        logger.info("Sent %d SLA breach emails", sent)
+        self.tickets.clear()
+        self.messages.clear()
+        return sent
@@ -0,0 +1,206 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+from src.db.session import db_session
+from src.services.redis_service import RedisService
+
+from ..enums import TicketAlertTypeEnum, WarningLevelEnum
+
+logger = logging.getLogger(__name__)
+
+# zset "{ticket_id}:{alert_type}:{level}" -> epoch seconds the threshold is reached
+SLA_DEADLINES_KEY = "sla:deadlines"
+
+ALERT_TYPES = (TicketAlertTypeEnum.RESPONSE.value, TicketAlertTypeEnum.RESOLUTION.value)
+LEVELS = (
+    WarningLevelEnum.WARNING_75,
+    WarningLevelEnum.WARNING_90,
+    WarningLevelEnum.WARNING_100,
+)
+
+# Pops up to ARGV[2] thresholds due at ARGV[1] in one round trip
+POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then redis.call('ZREM', KEYS[1], unpack(due)) end
+return due
+"""
+
+
+def _epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def member(ticket_id: int, alert_type: str, level: int) -> str:
+    return f"{ticket_id}:{alert_type}:{int(level)}"
+
+
+class SLAScheduler:
+    """
+    Deadline index of the SLA warnings.
+
+    When a ticket is opened or its SLA changes, the 75%/90%/100% points of its
+    response and resolution time are written to a Redis sorted set scored by
+    the time they are reached. The SLA task only pops the thresholds that are
+    due, so a tick costs in proportion to the alerts it fires.
+    """
+
+    _pop_script = None
+
+    @staticmethod
+    def thresholds(
+        ticket_id: int, opened_at: datetime, response_time: int, resolution_time: int
+    ) -> dict[str, float]:
+        opened = _epoch(opened_at)
+        durations = {
+            TicketAlertTypeEnum.RESPONSE.value: response_time,
+            TicketAlertTypeEnum.RESOLUTION.value: resolution_time,
+        }
+        return {
+            member(ticket_id, alert_type, level): opened + duration * int(level) / 100
+            for alert_type, duration in durations.items()
+            for level in LEVELS
+        }
+
+    async def schedule(
+        self,
+        ticket_id: int,
+        opened_at: Optional[datetime],
+        response_time: int,
+        resolution_time: int,
+    ):
+        """(Re)places every threshold of the ticket"""
+        if opened_at is None:
+            return
+        redis = await RedisService.get_redis()
+        await redis.zadd(
+            SLA_DEADLINES_KEY,
+            self.thresholds(ticket_id, opened_at, response_time, resolution_time),
+        )
+
+    async def schedule_many(self, rows: Iterable, skip: Optional[set] = None):
+        """
+        Schedules (ticket_id, opened_at, response_time, resolution_time) rows,
+        leaving out the members in `skip` (alerts already sent)
+        """
+        deadlines = {}
+        for ticket_id, opened_at, response_time, resolution_time in rows:
+            if opened_at is None:
+                continue
+            deadlines.update(
+                self.thresholds(ticket_id, opened_at, response_time, resolution_time)
+            )
+        for key in skip or ():
+            deadlines.pop(key, None)
+        if not deadlines:
+            return 0
+        redis = await RedisService.get_redis()
+        await redis.zadd(SLA_DEADLINES_KEY, deadlines)
+        return len(deadlines)
+
+    async def reschedule_sla(self, sla_id: int, response_time: int, resolution_time: int):
+        """The SLA's times changed: moves the thresholds of its open tickets"""
+        from src.modules.ticket.models.status import TicketStatus
+        from src.modules.ticket.models.ticket import Ticket
+
+        async with db_session() as session:
+            rows = (
+                await session.execute(
+                    select(Ticket.id, Ticket.opened_at)
+                    .join(TicketStatus, TicketStatus.id == Ticket.status_id)
+                    .where(
+                        Ticket.sla_id == sla_id,
+                        Ticket.opened_at.is_not(None),
+                        Ticket.deleted_at.is_(None),
+                        TicketStatus.status_category != "closed",
+                    )
+                )
+            ).all()
+        return await self.schedule_many(
+            (ticket_id, opened_at, response_time, resolution_time)
+            for ticket_id, opened_at in rows
+        )
+
+    async def unschedule(self, ticket_id: int):
+        """Drops every threshold of a ticket closed or deleted"""
+        redis = await RedisService.get_redis()
+        await redis.zrem(
+            SLA_DEADLINES_KEY,
+            *(member(ticket_id, alert_type, level) for alert_type in ALERT_TYPES for level in LEVELS),
+        )
+
+    async def retry(self, members: Iterable[str], delay: float):
+        """Puts popped thresholds back, due again after `delay` seconds"""
+        members = list(members)
+        if not members:
+            return
+        redis = await RedisService.get_redis()
+        due = time.time() + delay
+        await redis.zadd(SLA_DEADLINES_KEY, {key: due for key in members})
+
+    @classmethod
+    async def _script(cls):
+        if cls._pop_script is None:
+            redis = await RedisService.get_redis()
+            cls._pop_script = redis.register_script(POP_DUE_SCRIPT)
+        return cls._pop_script
+
+    async def pop_due(self, limit: int, now: Optional[float] = None) -> list[tuple[int, str, int]]:
+        """Removes and returns (ticket_id, alert_type, level) of the thresholds reached"""
+        script = await self._script()
+        due = await script(
+            keys=[SLA_DEADLINES_KEY], args=[now or time.time(), limit]
+        )
+        popped = []
+        for key in due:
+            ticket_id, alert_type, level = (
+                key.decode() if isinstance(key, bytes) else key
+            ).split(":")
+            popped.append((int(ticket_id), alert_type, int(level)))
+        return popped
+
+    async def backfill(self):
+        """
+        Indexes the tickets that were opened before the deadline index existed
+        or while Redis lost it. Runs once when the scheduler starts.
+        """
+        from src.modules.ticket.models import TicketSLA
+        from src.modules.ticket.models.status import TicketStatus
+        from src.modules.ticket.models.ticket import Ticket, TicketAlert
+
+        async with db_session() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        Ticket.id,
+                        Ticket.opened_at,
+                        TicketSLA.response_time,
+                        TicketSLA.resolution_time,
+                    )
+                    .join(TicketSLA, TicketSLA.id == Ticket.sla_id)
+                    .join(TicketStatus, TicketStatus.id == Ticket.status_id)
+                    .where(
+                        Ticket.opened_at.is_not(None),
+                        Ticket.deleted_at.is_(None),
+                        TicketStatus.status_category != "closed",
+                    )
+                )
+            ).all()
+            sent = (
+                await session.execute(
+                    select(TicketAlert.ticket_id, TicketAlert.alert_type, TicketAlert.warning_level)
+                    .join(Ticket, Ticket.id == TicketAlert.ticket_id)
+                    .where(Ticket.opened_at.is_not(None), Ticket.deleted_at.is_(None))
+                )
+            ).all()
+
+        scheduled = await self.schedule_many(
+            rows, skip={member(*alert) for alert in sent}
+        )
+        logger.info("SLA backfill indexed %d thresholds of %d tickets", scheduled, len(rows))
+
+
+sla_scheduler = SLAScheduler()
@@ -1,6 +1,7 @@
 import logging
 import secrets
 from datetime import datetime
+from functools import partial
 from typing import Any
 
 from fastapi import HTTPException, status
@@ -9,7 +10,7 @@ from starlette.status import HTTP_400_BAD_REQUEST
 
 from src.common.context import TenantContext, UserContext
 from src.config.settings import settings
-from src.db.config import async_session
+from src.db.session import after_commit, commit, db_session
 from src.factory.notification import NotificationFactory
 from src.modules.auth.models import User
 from src.modules.organizations.models import Organization
@@ -35,6 +36,7 @@ from ..models import (
     TicketStatus,
 )
 from ..schemas import CreateTicketSchema, EditTicketSchema, TicketByStatusSchema
+from ..services.sla_scheduler import sla_scheduler
 from ..services.status import ticket_status_service
 
 logger = logging.getLogger(__name__)
@@ -178,6 +180,8 @@ class TicketServices:
             )
 
             # saving to the log
+            await after_commit(partial(sla_scheduler.unschedule, ticket_id))
+
             await ticket.save_to_log(action=TicketLogActionEnum.TICKET_SOFT_DELETED)
             return cr.success(
                 status_code=status.HTTP_200_OK,
@@ -232,6 +236,15 @@ class TicketServices:
             }
             # updating and saving to the log
             await Ticket.update(id=ticket.id, **payload)
+            sla = await TicketSLA.get(ticket.sla_id) if ticket.sla_id else None
+            if sla:
+                # thresholds of a rolled back confirm would be popped all the same
+                await after_commit(
+                    partial(
+                        sla_scheduler.schedule,
+                        ticket.id, payload["opened_at"], sla.response_time, sla.resolution_time,
+                    )
+                )
             await ticket.save_to_log(
                 action=TicketLogActionEnum.TICKET_CONFIRMED,
                 previous_value=extract_subset_from_dict(ticket.to_json(), payload),
@@ -322,8 +335,9 @@ class TicketServices:
                 print("The new sla", new_sla.id)
                 data["sla_id"] = new_sla.id
                 print("The data sla_id", data["sla_id"])
+            new_status = None
             if "status_id" in data:
-                await tenant.validate(
+                new_status = await tenant.validate(
                     TicketStatus, data["status_id"], check_default=True
                 )
             if "department_id" in data:
@@ -332,14 +346,26 @@ class TicketServices:
             if "assignees" in data:
                 assignees = await self.get_assigned_members_by_id(data["assignees"])
 
-                async with async_session() as session:
+                async with db_session() as session:
                     ticket.assignees = assignees
                     await session.merge(ticket)
-                    await session.commit()
+                    await commit(session)
                     del data["assignees"]
 
             # updating and logging
             await Ticket.update(ticket.id, **data)
+            sla = new_sla if "sla_id" in data else ticket.sla
+            if new_status and new_status.status_category == TicketStatusEnum.CLOSED:
+                # a closed ticket has no deadlines left
+                await after_commit(partial(sla_scheduler.unschedule, ticket.id))
+            elif (new_status or "sla_id" in data) and sla and ticket.opened_at:
+                # placed again on reopening; the alerts already sent are not resent
+                await after_commit(
+                    partial(
+                        sla_scheduler.schedule,
+                        ticket.id, ticket.opened_at, sla.response_time, sla.resolution_time,
+                    )
+                )
             await ticket.save_to_log(
                 action=TicketLogActionEnum.TICKET_UPDATED,
                 previous_value=extract_subset_from_dict(ticket.to_json(), data),
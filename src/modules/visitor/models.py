@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING, List, Optional
 from sqlmodel import Field, Relationship
 from datetime import datetime
 from src.common.models import CommonModel
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, Index, JSON
 
 
 if TYPE_CHECKING:
@@ -15,6 +15,11 @@ if TYPE_CHECKING:
 
 class Customer(CommonModel, table=True):
     __tablename__ = "org_customers"  # type:ignore
+    __table_args__ = (
+        # visitor sorts by registration date and by name
+        Index("ix_org_customers_org_created_id", "organization_id", "created_at", "id"),
+        Index("ix_org_customers_org_name", "organization_id", "name"),
+    )
     name: str = Field(max_length=255, index=True, nullable=True)
     organization_id: int = Field(foreign_key="sys_organizations.id", nullable=False)
     organization: Optional["Organization"] = Relationship(back_populates="customers")
@@ -42,6 +47,11 @@ class Customer(CommonModel, table=True):
 
 class CustomerVisitLogs(CommonModel, table=True):
     __tablename__ = "org_customer_logs"  # type:ignore
+    __table_args__ = (
+        # visit counts per customer, and the latest visits first
+        Index("ix_org_customer_logs_customer_join", "customer_id", "join_at"),
+        Index("ix_org_customer_logs_join_id", "join_at", "id"),
+    )
     ip_address: str = Field(max_length=255, index=True, nullable=True)
     latitude: str = Field(nullable=True)
     longitude: str = Field(nullable=True)
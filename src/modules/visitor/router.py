@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
 from fastapi import Request
 from src.common.dependencies import get_current_user
 from src.models import Conversation, Customer, CustomerVisitLogs, CustomerActivities
 from src.modules.organizations.models import Organization
 from src.utils.response import CustomResponse as cr
-from src.utils.common import get_location
 from src.modules.chat.services.message_service import MessageService
 from src.modules.chat.schema import MessageSchema, EditMessageSchema
 from .schema import CustomerEmailSchema
@@ -13,7 +13,9 @@ from src.websocket.services.conversation_service import ConversationService
 from src.tasks.organization_task import send_customer_welcome_mail
 #customer router
 from src.modules.chat.models.message import Message
-from .services import save_log, filter_and_sort_visitors, get_visitors_data, get_visitors_by_location,build_log_list
+from src.services.sequence_service import SequenceService
+from .services import GUEST_SEQUENCE, save_log, get_visitors_data, get_visitors_by_location, get_visitors_page
+from src.enums import VisitorFilter, VisitorSort
 from .schema import (
     VisitorsResponseSchema,
     VisitorSchema,
@@ -37,14 +39,10 @@ async def create_customer( request: Request):
 
     print(f"create customer api {ip}")
 
-    result = await Customer.sql(
-        f"select count(*) from org_customers where organization_id={organizationId}"
-    )
-    customer_count = result[0]["count"]
-    customer_count += 1
+    guest_number = await SequenceService.next(organizationId, GUEST_SEQUENCE)
 
     customer = await Customer.create(
-        name=f"guest-{customer_count}", ip_address=ip, organization_id=organizationId
+        name=f"guest-{guest_number}", ip_address=ip, organization_id=organizationId
     )
 
  
@@ -56,39 +54,6 @@ async def create_customer( request: Request):
     )
 
 
-async def save_log(ip: str, customer_id: int, request):
-    data = {}
-
-    data = await get_location(ip)
-
-    city = data.get("city")
-    country = data.get("country")
-    latitude = data.get("lat")
-    longitude = data.get("lon")
-
-    user_agent = request.headers.get("User-Agent", "")
-    browser = user_agent.split(" ")[0]
-    os = user_agent.split(" ")[1]
-    device_type = user_agent.split(" ")[2]
-    device = user_agent.split(" ")[3]
-    referral_from = request.headers.get("Referer") or None
-
-    log = await CustomerVisitLogs.create(
-        customer_id=customer_id,
-        ip_address=ip,
-        city=city,
-        country=country,
-        latitude=latitude,
-        longitude=longitude,
-        device=device,
-        browser=browser,
-        os=os,
-        device_type=device_type,
-        referral_from=referral_from,
-    )
-    return log
-
-
 @router.put('/{customer_id}/customer-email')
 async def customer_email_update(customer_id:int,body:CustomerEmailSchema):
     """update customer email"""
@@ -110,43 +75,31 @@ async def customer_email_update(customer_id:int,body:CustomerEmailSchema):
     
 
 @router.get("/visitors")
-async def get_visitors(user=Depends(get_current_user)):
-    """Get all visitor logs for the current organization"""
+async def get_visitors(
+    status: Optional[List[VisitorFilter]] = Query(None),
+    match: Literal["or", "and"] = "or",
+    sort_by: Optional[VisitorSort] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    user=Depends(get_current_user),
+):
+    """Get a page of visitor logs for the current organization"""
     organization_id = TenantContext.get()
 
-    query = f"""
-    SELECT logs.*, cust.name AS customer_name, cust.email AS customer_email, cust.created_at
-    FROM org_customer_logs AS logs
-    JOIN org_customers AS cust
-      ON logs.customer_id = cust.id
-    WHERE cust.organization_id = {organization_id}
-      AND cust.deleted_at IS NULL   
-      AND logs.deleted_at IS NULL 
-    ORDER BY logs.join_at DESC
-    """
-
-    visitors_data = await CustomerVisitLogs.sql(query)
-
-    # Compute number of visits per customer
-    customer_visit_count = {}
-    for log in visitors_data:
-        cid = log["customer_id"]
-        customer_visit_count[cid] = customer_visit_count.get(cid, 0) + 1
+    visitors, cursors = await get_visitors_page(
+        organization_id,
+        status_filters=status,
+        sort_by=sort_by,
+        match_mode=match,
+        after=after,
+        limit=limit,
+    )
 
     # Compute visits by location
-    visitors_by_location=get_visitors_by_location(visitors_data)
-    
-
-    # Build visitors log list
-    visitors=build_log_list(visitors_data,customer_visit_count)
-
-    # Apply filtering and sorting
-    visitors = filter_and_sort_visitors(
-        visitors, visitors_data
-    )
+    visitors_by_location = None if after else await get_visitors_by_location(organization_id)
 
     response_data = VisitorsResponseSchema(
-        visitors=visitors, visitors_by_location=visitors_by_location
+        visitors=visitors, visitors_by_location=visitors_by_location, cursors=cursors
     )
 
     return cr.success(
@@ -254,4 +207,4 @@ async def initialize_conversation(customer_id: int,payload:MessageSchema):
     return cr.success(data={
         "conversation":record.to_json(),
         "message":message
-    })
\ No newline at end of file
+    })
\ No newline at end of file
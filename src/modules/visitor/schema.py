@@ -33,7 +33,9 @@ class VisitorLogsSchema(BaseModel):
 
 class VisitorsResponseSchema(BaseModel):
     visitors: List[VisitorLogsSchema]
-    visitors_by_location: List[LocationSchema]
+    # returned with the first page only
+    visitors_by_location: Optional[List[LocationSchema]] = None
+    cursors: Optional[dict] = None
 
 class ActivitySchema(BaseModel):
     action_type: Optional[Optional[str]]
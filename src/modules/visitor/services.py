@@ -1,160 +1,215 @@
-from .models import CustomerVisitLogs
-from src.services.ip_service import IPService
+import base64
+import binascii
+import json
+from .models import Customer, CustomerVisitLogs
 from typing import List, Optional
-from .schema import VisitorLogsSchema
+from .schema import LocationSchema, VisitorLogsSchema
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from sqlalchemy import and_, false, func, or_, select, tuple_
+from src.config.settings import settings
+from src.db.session import after_commit, db_session
 from .schema import VisitorSchema
 from src.enums import VisitorFilter, VisitorSort
 from src.models import CustomerActivities
+from src.tasks.visitor_task import enrich_visit_log
+from src.utils.user_agent import MAX_USER_AGENT, parse_user_agent
 
-async def save_log(ip: str, customer_id: int, request):
-    data = {}
-
-    data = await IPService.get_ip_info(ip)
-
-    city = data.get("city")
-    country = data.get("country")
-    latitude = data.get("lat")
-    longitude = data.get("lon")
+# SequenceService counter numbering the guest-N visitors of an organization
+GUEST_SEQUENCE = "guest"
 
-    user_agent = request.headers.get("User-Agent", "")
-    browser = user_agent.split(" ")[0]
-    os = user_agent.split(" ")[1]
-    device_type = user_agent.split(" ")[2]
-    device = user_agent.split(" ")[3]
+async def save_log(ip: str, customer_id: int, request):
+    user_agent = request.headers.get("User-Agent", "")[:MAX_USER_AGENT]
+    agent = parse_user_agent(user_agent)
     referral_from = request.headers.get("Referer") or None
 
     log = await CustomerVisitLogs.create(
         customer_id=customer_id,
         ip_address=ip,
-        city=city,
-        country=country,
-        latitude=latitude,
-        longitude=longitude,
-        device=device,
-        browser=browser,
-        os=os,
-        device_type=device_type,
+        device=agent.device,
+        browser=agent.browser,
+        os=agent.os,
+        device_type=agent.device_type,
+        user_agent=user_agent or None,
         referral_from=referral_from,
     )
+    async def locate():
+        # located by the worker, off the request path, once the log is committed
+        enrich_visit_log.send(log.id, ip)
+
+    await after_commit(locate)
     return log
 
-def filter_and_sort_visitors(
-    visitors: List[VisitorLogsSchema],
-    visitors_data: List[dict],
-    status_filters: List[str] = [],
-    sort_by: Optional[str] = None,
+def encode_cursor(sort_key, log_id: int) -> str:
+    """Opaque cursor of a visit log's (sort key, id) position"""
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    raw = json.dumps([sort_key, log_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, kind: type) -> tuple:
+    try:
+        sort_key, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        sort_key = datetime.fromisoformat(sort_key) if kind is datetime else kind(sort_key)
+        return sort_key, int(log_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def visitor_condition(filter_type: VisitorFilter):
+    """SQL condition of a single visitor filter"""
+    if filter_type == VisitorFilter.ACTIVE:
+        return CustomerVisitLogs.left_at.is_(None)
+    if filter_type == VisitorFilter.INACTIVE:
+        return CustomerVisitLogs.left_at.isnot(None)
+    if filter_type == VisitorFilter.ENGAGED:
+        # a visit is engaged while it is active
+        return CustomerVisitLogs.left_at.is_(None)
+    if filter_type == VisitorFilter.GUEST:
+        return Customer.name.like("guest%")
+    if filter_type == VisitorFilter.RECENTLY_REGISTERED:
+        # registered less than two whole days ago
+        return Customer.created_at > datetime.utcnow() - timedelta(days=2)
+    return false()
+
+
+def org_visit_logs(statement, organization_id: int):
+    return statement.join(Customer, Customer.id == CustomerVisitLogs.customer_id).where(
+        Customer.organization_id == organization_id,
+        Customer.deleted_at.is_(None),
+        CustomerVisitLogs.deleted_at.is_(None),
+    )
+
+
+async def get_visitors_page(
+    organization_id: int,
+    status_filters: Optional[List[VisitorFilter]] = None,
+    sort_by: Optional[VisitorSort] = None,
     match_mode: str = "or",
-) -> List[VisitorLogsSchema]:
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+):
     """
-    Filters and sorts visitors based on given criteria
+    One page of the organization's visit logs, filtered and sorted in SQL and
+    keyset paginated on (sort key, id). Without a sort the latest visits come
+    first. `after` is the cursor returned with the previous page.
+
+    Returns the visitors and the cursors {"after", "has_more"}.
     """
-    def matches_filter(v, filter_type: VisitorFilter) -> bool:
-        """Check if a visitor matches a single filter"""
-        if filter_type == VisitorFilter.ACTIVE:
-            return v.status == "Active"
-        if filter_type == VisitorFilter.INACTIVE:
-            return v.status == "Inactive"
-        if filter_type == VisitorFilter.ENGAGED:
-            return v.engagged == "YES"
-        if filter_type == VisitorFilter.GUEST:
-            return v.visitor_name and v.visitor_name.startswith("guest")
-        if filter_type == VisitorFilter.RECENTLY_REGISTERED:
-            cust = next((c for c in visitors_data if c["customer_id"] == v.customer_id), None)
-            if cust and cust.get("created_at"):
-                try:
-                    created_at = datetime.fromisoformat(cust["created_at"])
-                    return (datetime.utcnow() - created_at).days <= 1
-                except ValueError:
-                    return False
-            return False
-        return False
-
-    # -------- FILTER --------
+    limit = min(limit or settings.VISITOR_PAGE_SIZE, settings.VISITOR_PAGE_MAX)
+    visits = None
+
+    if sort_by == VisitorSort.MOST_ENGAGED:
+        visits = org_visit_logs(
+            select(CustomerVisitLogs.customer_id, func.count().label("visits")),
+            organization_id,
+        ).group_by(CustomerVisitLogs.customer_id).subquery()
+        sort_key, descending, kind = visits.c.visits, True, int
+    elif sort_by in (VisitorSort.A_Z, VisitorSort.Z_A):
+        sort_key, descending, kind = func.coalesce(Customer.name, ""), sort_by == VisitorSort.Z_A, str
+    elif sort_by in (VisitorSort.NEWEST, VisitorSort.OLDEST):
+        sort_key, descending, kind = Customer.created_at, sort_by == VisitorSort.NEWEST, datetime
+    else:
+        sort_key, descending, kind = CustomerVisitLogs.join_at, True, datetime
+
+    statement = org_visit_logs(
+        select(
+            CustomerVisitLogs.id,
+            CustomerVisitLogs.customer_id,
+            CustomerVisitLogs.ip_address,
+            CustomerVisitLogs.join_at,
+            CustomerVisitLogs.left_at,
+            Customer.name.label("customer_name"),
+            sort_key.label("sort_key"),
+        ),
+        organization_id,
+    )
+    if visits is not None:
+        statement = statement.join(visits, visits.c.customer_id == CustomerVisitLogs.customer_id)
     if status_filters:
-        filtered = []
-        for v in visitors:
-            matches = [matches_filter(v, f) for f in status_filters]
-            if match_mode == "or" and any(matches):  # if matches at least one filter
-                filtered.append(v)
-            elif match_mode == "and" and all(matches):  # must match all filters
-                filtered.append(v)
-        visitors = filtered
-
-    # -------- SORT --------
-    if sort_by:
-        customer_created_at_map = {
-            c["customer_id"]: datetime.fromisoformat(c["created_at"])
-            for c in visitors_data
-            if c.get("created_at")
-        }
-
-        if sort_by == VisitorSort.A_Z:
-            visitors.sort(key=lambda v: v.visitor_name or "")
-        elif sort_by == VisitorSort.Z_A:
-            visitors.sort(key=lambda v: v.visitor_name or "", reverse=True)
-        elif sort_by == VisitorSort.NEWEST:
-            visitors.sort(
-                key=lambda v: customer_created_at_map.get(v.customer_id, datetime.min),
-                reverse=True,
-            )
-        elif sort_by == VisitorSort.OLDEST:
-            visitors.sort(
-                key=lambda v: customer_created_at_map.get(v.customer_id, datetime.max)
+        conditions = [visitor_condition(f) for f in status_filters]
+        statement = statement.where(and_(*conditions) if match_mode == "and" else or_(*conditions))
+
+    position = tuple_(sort_key, CustomerVisitLogs.id)
+    if after:
+        cursor = tuple_(*decode_cursor(after, kind))
+        statement = statement.where(position < cursor if descending else position > cursor)
+    if descending:
+        statement = statement.order_by(sort_key.desc(), CustomerVisitLogs.id.desc())
+    else:
+        statement = statement.order_by(sort_key, CustomerVisitLogs.id)
+
+    async with db_session(read=True) as session:
+        rows = (await session.execute(statement.limit(limit + 1))).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        if visits is not None:
+            visit_counts = {row.customer_id: row.sort_key for row in rows}
+        elif rows:
+            # only the customers on the page are counted
+            counts = await session.execute(
+                select(CustomerVisitLogs.customer_id, func.count())
+                .where(
+                    CustomerVisitLogs.customer_id.in_({row.customer_id for row in rows}),
+                    CustomerVisitLogs.deleted_at.is_(None),
+                )
+                .group_by(CustomerVisitLogs.customer_id)
             )
-        elif sort_by == VisitorSort.MOST_ENGAGED:
-            visitors.sort(key=lambda v: v.num_of_visits, reverse=True)
-
-    return visitors
-
-    
-
-def build_log_list(visitors_data,customer_visit_count):
-    visitors=[]
-    for log in visitors_data:
-        customer_id = log.get("customer_id")
-        join_at = datetime.fromisoformat(log["join_at"])
-        left_at = log.get("left_at")
-        if left_at:
-            left_at = datetime.fromisoformat(left_at)
-        last_active = left_at or datetime.utcnow()
-        active_duration = last_active - join_at
-        status = "Active" if left_at is None else "Inactive"
-        engaged = "YES" if status == "Active" else "NO"
-
+            visit_counts = dict(counts.all())
+        else:
+            visit_counts = {}
+
+    now = datetime.utcnow()
+    visitors = []
+    for row in rows:
+        last_active = row.left_at or now
+        visit_status = "Active" if row.left_at is None else "Inactive"
         visitors.append(
             VisitorLogsSchema(
-                id=log["id"],
-                customer_id=customer_id,
-                visitor_name=log["customer_name"],
-                status=status,
+                id=row.id,
+                customer_id=row.customer_id,
+                visitor_name=row.customer_name,
+                status=visit_status,
                 last_active=last_active.isoformat(),
-                active_duration=str(active_duration),
-                num_of_visits=customer_visit_count[customer_id],
-                engagged=engaged,
-                ip_address=log.get("ip_address") or "",
+                active_duration=str(last_active - row.join_at),
+                num_of_visits=visit_counts.get(row.customer_id, 0),
+                engagged="YES" if visit_status == "Active" else "NO",
+                ip_address=row.ip_address or "",
             )
         )
-    
-    return visitors
-
-
-def get_visitors_by_location(visitor_data):
-    location_count = {}     
-    for log in visitor_data:
-        key = (log.get("latitude"), log.get("longitude"))
-        if key not in location_count:
-            location_count[key] = 0
-        location_count[key] += 1
-
-    visitors_by_location = [
-        {"latitude": lat, "longitude": lon, "count": count}
-        for (lat, lon), count in location_count.items()
-        if lat is not None and lon is not None
-    ]
 
-    return visitors_by_location
+    cursors = {
+        "after": encode_cursor(rows[-1].sort_key, rows[-1].id) if rows else after,
+        "has_more": has_more,
+    }
+    return visitors, cursors
+
+
+async def get_visitors_by_location(organization_id: int) -> List[LocationSchema]:
+    """Visit logs of the organization counted per (latitude, longitude)"""
+    statement = org_visit_logs(
+        select(
+            CustomerVisitLogs.latitude,
+            CustomerVisitLogs.longitude,
+            func.count().label("count"),
+        ),
+        organization_id,
+    ).where(
+        CustomerVisitLogs.latitude.isnot(None),
+        CustomerVisitLogs.longitude.isnot(None),
+    ).group_by(CustomerVisitLogs.latitude, CustomerVisitLogs.longitude)
+
+    async with db_session(read=True) as session:
+        rows = await session.execute(statement)
+        return [
+            LocationSchema(latitude=row.latitude, longitude=row.longitude, count=row.count)
+            for row in rows
+        ]
 
 async def get_visitors_data(visit_log,customer):
     engaged = "YES" if visit_log and visit_log.left_at is None else "NO"
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+from cachetools import TTLCache
+from sqlalchemy import DateTime
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.config.settings import settings
+from src.db.session import after_commit
+from src.modules.auth.models import User
+
+from .redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# auth:token:{sha256 of the token} -> json {"user", "is_2fa_verified", "exp"},
+# or {"revoked": true} once the token is logged out
+TOKEN_KEY = "auth:token:"
+# auth:user-tokens:{user_id} -> set of the token hashes cached for the user
+USER_TOKENS_KEY = "auth:user-tokens:"
+# token hashes to drop from every worker's in-process cache
+INVALIDATE_CHANNEL = "auth:invalidate"
+
+# never written to the cache
+SECRET_FIELDS = {"password", "two_fa_secret"}
+
+REVOKED = {"revoked": True}
+
+DATETIME_FIELDS = [column.name for column in User.__table__.columns if isinstance(column.type, DateTime)]
+
+
+class AuthCacheService:
+    """
+    Token -> user resolution cache shared by the auth middleware, the
+    request dependencies and the socket namespaces.
+
+    Entries live in an in-process TTL cache and in Redis, keyed by the SHA-256
+    of the token so raw tokens are never stored, and expire with the token or
+    after AUTH_CACHE_TTL, whichever is first. Logging out, changing the
+    password or the profile invalidates the user's entries in Redis and
+    publishes their hashes so the other workers drop them too.
+    """
+
+    _local = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+
+    @staticmethod
+    def token_hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    async def get(cls, token: str) -> Optional[dict]:
+        """
+        Cached entry of the token, None on a miss. A logged out token gives
+        REVOKED.
+        """
+        token_hash = cls.token_hash(token)
+        entry = cls._local.get(token_hash)
+        if entry is None:
+            try:
+                redis = await RedisService.get_redis()
+                raw = await redis.get(f"{TOKEN_KEY}{token_hash}")
+            except Exception:
+                logger.exception("Auth cache read failed")
+                return None
+            if raw is None:
+                return None
+            entry = json.loads(raw)
+            cls._local[token_hash] = entry
+        if entry.get("revoked"):
+            return entry
+        if entry["exp"] <= time.time():
+            cls._local.pop(token_hash, None)
+            return None
+        return entry
+
+    @staticmethod
+    def to_user(entry: dict) -> Optional[User]:
+        """A detached User of the entry, None for a revoked token"""
+        if entry.get("revoked"):
+            return None
+        # a new instance per call, so one request's changes don't leak into
+        # the next
+        user = User(**entry["user"])
+        for field in DATETIME_FIELDS:
+            value = getattr(user, field)
+            if isinstance(value, str):
+                setattr(user, field, datetime.fromisoformat(value))
+        user.is_2fa_verified = entry["is_2fa_verified"]
+        make_transient_to_detached(user)
+        return user
+
+    @classmethod
+    async def set(cls, token: str, user: User, exp: float):
+        ttl = int(min(settings.AUTH_CACHE_TTL, exp - time.time()))
+        if ttl <= 0:
+            return
+        token_hash = cls.token_hash(token)
+        entry = {
+            "user": user.model_dump(mode="json", exclude=SECRET_FIELDS),
+            "is_2fa_verified": user.is_2fa_verified,
+            "exp": exp,
+        }
+        cls._local[token_hash] = entry
+        try:
+            redis = await RedisService.get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(f"{TOKEN_KEY}{token_hash}", json.dumps(entry), ex=ttl)
+                pipe.sadd(f"{USER_TOKENS_KEY}{user.id}", token_hash)
+                pipe.expire(f"{USER_TOKENS_KEY}{user.id}", settings.AUTH_CACHE_TTL)
+                await pipe.execute()
+        except Exception:
+            logger.exception("Auth cache write failed")
+
+    @classmethod
+    async def revoke(cls, token: str, exp: float):
+        """Marks the token logged out until it expires"""
+        token_hash = cls.token_hash(token)
+        cls._local[token_hash] = REVOKED
+        ttl = int(exp - time.time())
+        redis = await RedisService.get_redis()
+        if ttl > 0:
+            await redis.set(f"{TOKEN_KEY}{token_hash}", json.dumps(REVOKED), ex=ttl)
+        await redis.publish(INVALIDATE_CHANNEL, token_hash)
+
+    @classmethod
+    async def invalidate_user(cls, user_id: int):
+        """
+        Drops every cached token of the user once the change is committed, to
+        be resolved from the database again
+        """
+        await after_commit(partial(cls._drop_user, user_id))
+
+    @classmethod
+    async def replace(cls, token: str, user: User, exp: float):
+        """Caches the changed user for the token once committed, dropping its other tokens"""
+
+        async def replace():
+            await cls._drop_user(user.id)
+            await cls.set(token, user, exp)
+
+        await after_commit(replace)
+
+    @classmethod
+    async def _drop_user(cls, user_id: int):
+        redis = await RedisService.get_redis()
+        key = f"{USER_TOKENS_KEY}{user_id}"
+        hashes = [h.decode() if isinstance(h, bytes) else h for h in await redis.smembers(key)]
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.delete(key, *(f"{TOKEN_KEY}{token_hash}" for token_hash in hashes))
+            for token_hash in hashes:
+                pipe.publish(INVALIDATE_CHANNEL, token_hash)
+            await pipe.execute()
+        for token_hash in hashes:
+            cls._local.pop(token_hash, None)
+
+    @classmethod
+    async def listen(cls):
+        """Drops the token hashes published by other workers from the in-process cache"""
+        while True:
+            try:
+                redis = await RedisService.get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        token_hash = message["data"]
+                        if isinstance(token_hash, bytes):
+                            token_hash = token_hash.decode()
+                        # a revoked tombstone is re-read from Redis on the next lookup
+                        cls._local.pop(token_hash, None)
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Auth cache listener failed, resubscribing")
+                # entries missed meanwhile expire after AUTH_CACHE_TTL
+                cls._local.clear()
+                await asyncio.sleep(1)
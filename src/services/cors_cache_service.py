@@ -1,40 +1,108 @@
-from .redis_service import RedisService
+import asyncio
+import json
+import logging
+from functools import partial
+from typing import Optional
+
+from cachetools import TTLCache
+
+from src.config.settings import settings
+from src.db.session import after_commit
 from src.models import Organization
 
+from .redis_service import RedisService
 
-import json
+logger = logging.getLogger(__name__)
 
-CACHE_TTL = 600  # 10 minutes
+# org:{identifier} -> json organization, or null for an unknown identifier
+CACHE_KEY = "org:"
+
+# marks an identifier known not to exist, as None means not cached
+MISSING = object()
 
 
 class CORSCacheService:
+    """
+    Organization lookups by identifier for the public /customers endpoints.
 
-    @staticmethod
-    async def get_org(org_id: str):
-        redis = await RedisService.get_redis()
+    Organizations are cached in process for ORG_CACHE_LOCAL_TTL and in Redis
+    for ORG_CACHE_TTL, unknown identifiers for ORG_CACHE_NEGATIVE_TTL. A miss
+    is loaded once however many requests wait for the same identifier.
+    Changes to an organization invalidate it in Redis; other workers see them
+    once their short-lived local copy expires.
+    """
+
+    _local = TTLCache(maxsize=settings.ORG_CACHE_LOCAL_SIZE, ttl=settings.ORG_CACHE_LOCAL_TTL)
+    _loading: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    async def get_org(cls, org_id: str) -> Optional[dict]:
         if not org_id:
             return None
 
-        cache_key = f"org:{org_id}"
-        
-        # Try to get from Redis
-        org = (await redis.get(cache_key)).decode('utf-8') if await redis.get(cache_key) else None
+        org = cls._local.get(org_id)
+        if org is not None:
+            return None if org is MISSING else org
 
-        if org:
-            return json.loads(org)
+        loading = cls._loading.get(org_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
 
-        # Fetch from DB if not in cache
-        org = await Organization.find_one({"identifier": org_id})
+        loading = asyncio.get_running_loop().create_future()
+        cls._loading[org_id] = loading
+        try:
+            org = await cls._load(org_id)
+        except Exception as e:
+            loading.set_exception(e)
+            # retrieved so an exception nobody waited for isn't logged
+            loading.exception()
+            raise
+        else:
+            loading.set_result(org)
+        finally:
+            cls._loading.pop(org_id, None)
 
-        if org:
-            # Store in Redis with TTL
-            await redis.set(cache_key, json.dumps(org.to_json()), ex=CACHE_TTL)
-            return org.to_json()
+        cls._local[org_id] = MISSING if org is None else org
+        return org
 
-        return None
-    
     @staticmethod
-    async def update_org_domain(org_id:str,org:dict):
+    async def _load(org_id: str) -> Optional[dict]:
+        redis = await RedisService.get_redis()
+        cache_key = f"{CACHE_KEY}{org_id}"
+        try:
+            cached = await redis.get(cache_key)
+        except Exception:
+            logger.exception("Organization cache read failed")
+            cached = None
+        if cached is not None:
+            return json.loads(cached)
+
+        organization = await Organization.find_one({"identifier": org_id})
+        org = organization.to_json() if organization else None
+        ttl = settings.ORG_CACHE_TTL if org else settings.ORG_CACHE_NEGATIVE_TTL
+        try:
+            await redis.set(cache_key, json.dumps(org, default=str), ex=ttl)
+        except Exception:
+            logger.exception("Organization cache write failed")
+        return org
+
+    @classmethod
+    async def update_org_domain(cls, org_id: str, org: dict):
+        redis = await RedisService.get_redis()
+        await redis.set(f"{CACHE_KEY}{org_id}", json.dumps(org, default=str), ex=settings.ORG_CACHE_TTL)
+        cls._local[org_id] = org
+
+    @classmethod
+    async def invalidate(cls, org_id: Optional[str]):
+        """
+        Drops the organization once the change is committed, to be loaded
+        again on its next request
+        """
+        if org_id:
+            await after_commit(partial(cls._drop, org_id))
 
+    @classmethod
+    async def _drop(cls, org_id: str):
+        cls._local.pop(org_id, None)
         redis = await RedisService.get_redis()
-        await redis.set(f"org:{org_id}", json.dumps(org), ex=CACHE_TTL)
+        await redis.delete(f"{CACHE_KEY}{org_id}")
@@ -1,30 +1,122 @@
+import ipaddress
+import json
+import logging
+from typing import Optional
+
 import httpx
+from cachetools import TTLCache
+
+from src.config.settings import settings
+
+from .redis_service import RedisService
+
+try:
+    import maxminddb
+except ImportError:  # pragma: no cover - optional offline database
+    maxminddb = None
+
+logger = logging.getLogger(__name__)
+
+# geoip:{network prefix} -> json location, empty for unknown ranges
+CACHE_KEY = "geoip:"
+
+EMPTY = {"city": None, "country": None, "latitude": None, "longitude": None}
 
 
 class IPService:
+    """
+    Geolocation of visitor IPs.
+
+    Lookups go through an in-process LRU and then Redis, both keyed by the
+    network prefix of the address since locations are not finer than that.
+    Misses are resolved from the offline mmdb database when GEOIP_MMDB_PATH is
+    set, and from the HTTP API otherwise. Private and reserved addresses are
+    never looked up.
+    """
+
+    _cache = TTLCache(maxsize=settings.GEOIP_CACHE_SIZE, ttl=settings.GEOIP_CACHE_TTL)
+    _reader = None
+    _client: Optional[httpx.AsyncClient] = None
+
     @staticmethod
-    def get_ip_info(ip_address: str) -> dict:
-        """Get geolocation and ISP info for IP address"""
-        print("ip ", ip_address)
-        # test_ip = '49.244.92.113'
-        resp = httpx.get(
-            f"http://ip-api.com/json/{ip_address}?fields=status,message,lat,lon,city,country"
-        )
-        data = resp.json()
+    def prefix(ip: str) -> Optional[str]:
+        """Cache key of the address, None when it cannot be geolocated"""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if not address.is_global:
+            return None
+        bits = settings.GEOIP_PREFIX_V4 if address.version == 4 else settings.GEOIP_PREFIX_V6
+        return str(ipaddress.ip_network(f"{address}/{bits}", strict=False))
 
-        if data.get("status") != "success":
-            return {
-                "ip": ip_address,
-                "latitude": "",
-                "longitude": "",
-                "city": "",
-                "country": "",
-            }
+    @classmethod
+    async def get_ip_info(cls, ip: str) -> Optional[dict]:
+        """
+        Location of the address as {"city", "country", "latitude",
+        "longitude"}, the values None when unknown. Returns None when the API
+        could not be reached, so the caller may retry later.
+        """
+        prefix = cls.prefix(ip)
+        if prefix is None:
+            return dict(EMPTY)
+        info = cls._cache.get(prefix)
+        if info is not None:
+            return info
+
+        redis = await RedisService.get_redis()
+        cached = await redis.get(f"{CACHE_KEY}{prefix}")
+        if cached:
+            info = json.loads(cached)
+        else:
+            info = cls._from_mmdb(ip)
+            if info is None:
+                info = await cls._from_api(ip)
+            if info is None:
+                return None
+            await redis.set(f"{CACHE_KEY}{prefix}", json.dumps(info), ex=settings.GEOIP_CACHE_TTL)
+        cls._cache[prefix] = info
+        return info
+
+    @classmethod
+    def _from_mmdb(cls, ip: str) -> Optional[dict]:
+        if not settings.GEOIP_MMDB_PATH:
+            return None
+        if cls._reader is None:
+            if maxminddb is None:
+                raise RuntimeError("GEOIP_MMDB_PATH requires the maxminddb package")
+            cls._reader = maxminddb.open_database(settings.GEOIP_MMDB_PATH)
+        record = cls._reader.get(ip)
+        if not record:
+            return None
+        location = record.get("location", {})
+        return {
+            "city": record.get("city", {}).get("names", {}).get("en"),
+            "country": record.get("country", {}).get("names", {}).get("en"),
+            "latitude": location.get("latitude"),
+            "longitude": location.get("longitude"),
+        }
 
+    @classmethod
+    async def _from_api(cls, ip: str) -> Optional[dict]:
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(timeout=settings.GEOIP_HTTP_TIMEOUT)
+        try:
+            resp = await cls._client.get(
+                f"{settings.GEOIP_API_URL}/{ip}",
+                params={"fields": "status,message,lat,lon,city,country"},
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except (httpx.HTTPError, ValueError) as exc:
+            logger.warning(f"Geolocation of {ip} failed: {exc}")
+            return None
+
+        if data.get("status") != "success":
+            return dict(EMPTY)
         return {
-            "ip": ip_address,
-            "latitude": data["lat"],
-            "longitude": data["lon"],
-            "city": data["city"],
-            "country": data["country"],
+            "city": data.get("city"),
+            "country": data.get("country"),
+            "latitude": data.get("lat"),
+            "longitude": data.get("lon"),
         }
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+from functools import partial
+from typing import NamedTuple, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import select
+
+from src.config.settings import settings
+from src.db.session import after_commit, db_session
+from src.modules.organizations.models import (
+    OrganizationMember,
+    OrganizationMemberRole,
+    OrganizationRole,
+)
+from src.modules.staff_management.models import PermissionGroup, Permissions, RolePermission
+
+from .redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# organization ids whose index every worker drops
+INVALIDATE_CHANNEL = "permissions:invalidate"
+
+VIEW = "view"
+CHANGE = "change"
+DELETE = "delete"
+
+
+class Catalog(NamedTuple):
+    """The permission groups and permissions, the same for every organization"""
+
+    # (group name, [{"id", "name", "group_id"}]) in query order
+    groups: list[tuple[str, list[dict]]]
+    # lowercased permission name -> permission id
+    ids: dict[str, int]
+    # permission id -> group id
+    group_of: dict[int, int]
+
+
+class Grants(NamedTuple):
+    """
+    Bitmasks of the permissions viewable, changeable and deletable, bit n
+    standing for the permission with id n
+    """
+
+    view: int = 0
+    change: int = 0
+    delete: int = 0
+
+    def __or__(self, other: "Grants") -> "Grants":
+        return Grants(self.view | other.view, self.change | other.change, self.delete | other.delete)
+
+    def allows(self, required: "Grants") -> bool:
+        return (
+            self.view & required.view == required.view
+            and self.change & required.change == required.change
+            and self.delete & required.delete == required.delete
+        )
+
+
+NO_GRANTS = Grants()
+
+
+class OrgPermissions(NamedTuple):
+    # role id -> the role's RolePermission rows as dicts
+    role_permissions: dict[int, list[dict]]
+    roles: dict[int, Grants]
+    # user id -> union of the grants of the member's roles
+    members: dict[int, Grants]
+
+
+class PermissionService:
+    """
+    Compiled permission index.
+
+    Each role of an organization compiles to one Grants of three bitmasks,
+    and each member to the union of their roles' grants, so an authorization
+    check is a few integer ANDs.
+    Organizations are indexed on first use and kept in process for
+    PERMISSION_CACHE_TTL; role and member role edits drop the organization's
+    index in every worker once committed.
+    """
+
+    _catalog = TTLCache(maxsize=1, ttl=settings.PERMISSION_CACHE_TTL)
+    _orgs = TTLCache(maxsize=settings.PERMISSION_CACHE_SIZE, ttl=settings.PERMISSION_CACHE_TTL)
+
+    @classmethod
+    async def catalog(cls, reload: bool = False) -> Catalog:
+        catalog = None if reload else cls._catalog.get(None)
+        if catalog is None:
+            catalog = cls._catalog[None] = await cls._build_catalog()
+        return catalog
+
+    @staticmethod
+    async def _build_catalog() -> Catalog:
+        groups = await PermissionGroup.filter()
+        permissions = await Permissions.filter()
+
+        by_group: dict[int, list[dict]] = {}
+        for perm in permissions:
+            by_group.setdefault(perm.group_id, []).append(
+                {"id": perm.id, "name": perm.name, "group_id": perm.group_id}
+            )
+        return Catalog(
+            groups=[(group.name, by_group.get(group.id, [])) for group in groups],
+            ids={perm.name.lower(): perm.id for perm in permissions},
+            group_of={perm.id: perm.group_id for perm in permissions},
+        )
+
+    @classmethod
+    async def permission_group(cls, permission_id: int) -> Optional[int]:
+        """Group of the permission, None when it does not exist"""
+        group_id = (await cls.catalog()).group_of.get(permission_id)
+        if group_id is None:
+            # seeded since the catalog was loaded
+            group_id = (await cls.catalog(reload=True)).group_of.get(permission_id)
+        return group_id
+
+    @classmethod
+    async def for_org(cls, organization_id: int) -> OrgPermissions:
+        index = cls._orgs.get(organization_id)
+        if index is None:
+            index = cls._orgs[organization_id] = await cls._build_org(organization_id)
+        return index
+
+    @classmethod
+    async def _build_org(cls, organization_id: int) -> OrgPermissions:
+        async with db_session(read=True) as session:
+            role_permissions = (
+                await session.execute(
+                    select(
+                        RolePermission.role_id,
+                        RolePermission.permission_id,
+                        RolePermission.is_viewable,
+                        RolePermission.is_changeable,
+                        RolePermission.is_deletable,
+                    )
+                    .join(OrganizationRole, OrganizationRole.id == RolePermission.role_id)
+                    .where(
+                        OrganizationRole.organization_id == organization_id,
+                        OrganizationRole.deleted_at.is_(None),
+                        RolePermission.deleted_at.is_(None),
+                    )
+                )
+            ).all()
+            member_roles = (
+                await session.execute(
+                    select(OrganizationMember.user_id, OrganizationMemberRole.role_id)
+                    .join(OrganizationMember, OrganizationMember.id == OrganizationMemberRole.member_id)
+                    .where(
+                        OrganizationMember.organization_id == organization_id,
+                        OrganizationMember.deleted_at.is_(None),
+                        OrganizationMemberRole.deleted_at.is_(None),
+                    )
+                )
+            ).all()
+
+        rows: dict[int, list[dict]] = {}
+        roles: dict[int, Grants] = {}
+        for role_id, permission_id, viewable, changeable, deletable in role_permissions:
+            rows.setdefault(role_id, []).append(
+                {
+                    "permission_id": permission_id,
+                    "is_changeable": changeable,
+                    "is_deletable": deletable,
+                    "is_viewable": viewable,
+                }
+            )
+            if permission_id is None:
+                continue
+            mask = 1 << permission_id
+            roles[role_id] = roles.get(role_id, NO_GRANTS) | Grants(
+                mask if viewable else 0,
+                mask if changeable else 0,
+                mask if deletable else 0,
+            )
+
+        members: dict[int, Grants] = {}
+        for user_id, role_id in member_roles:
+            members[user_id] = members.get(user_id, NO_GRANTS) | roles.get(role_id, NO_GRANTS)
+        return OrgPermissions(rows, roles, members)
+
+    @classmethod
+    async def compile(cls, required: str) -> Optional[Grants]:
+        """
+        Grants needed for "<permission name>" (viewable) or
+        "<permission name>:change|delete|view", None when it names no permission
+        """
+        name, _, action = required.partition(":")
+        permission_id = (await cls.catalog()).ids.get(name.strip().lower())
+        action = action.strip().lower() or VIEW
+        if permission_id is None or action not in (VIEW, CHANGE, DELETE):
+            return None
+        mask = 1 << permission_id
+        return Grants(
+            mask if action == VIEW else 0,
+            mask if action == CHANGE else 0,
+            mask if action == DELETE else 0,
+        )
+
+    @classmethod
+    async def invalidate(cls, organization_id: Optional[int]):
+        """Drops the organization's index in every worker once the change is committed"""
+        if organization_id:
+            await after_commit(partial(cls._drop, organization_id))
+
+    @classmethod
+    async def _drop(cls, organization_id: int):
+        cls._orgs.pop(organization_id, None)
+        redis = await RedisService.get_redis()
+        await redis.publish(INVALIDATE_CHANNEL, str(organization_id))
+
+    @classmethod
+    async def listen(cls):
+        """Drops the organization indexes invalidated by other workers"""
+        while True:
+            try:
+                redis = await RedisService.get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            cls._orgs.pop(int(message["data"]), None)
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Permission index listener failed, resubscribing")
+                cls._orgs.clear()
+                await asyncio.sleep(1)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Integer, column, update, values
+
+from src.config.settings import settings
+from src.db.config import async_session
+
+from .redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# presence:pending:{kind} -> hash(id -> state) written on every connect/disconnect;
+# renamed to presence:flushing:{kind} while a flush is in progress so a crash
+# mid-flush leaves the batch in Redis for the next flush.
+PENDING_KEY = "presence:pending:"
+FLUSHING_KEY = "presence:flushing:"
+# token of the worker flushing; one flusher at a time across the app workers
+FLUSH_LOCK_KEY = "presence:flush-lock"
+
+USERS = "users"
+CUSTOMERS = "customers"
+
+# Moves the pending states to the flushing key unless a batch is left there,
+# and returns the batch, in one step
+TAKE_BATCH_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then return {} end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# Deletes the keys only while the lock is still held with the token
+DELETE_IF_OWNER_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then return 0 end
+for i = 2, #KEYS do redis.call('DEL', KEYS[i]) end
+return 1
+"""
+
+
+class PresenceService:
+    """
+    Write-behind buffer for the is_online/last_seen columns.
+
+    Socket handlers only record the latest state in Redis; the flusher writes
+    each batch to Postgres with one UPDATE per table. Every app worker runs a
+    flusher, the one holding the flush lock does the round.
+    """
+
+    _take_script = None
+    _delete_script = None
+
+    @classmethod
+    async def _scripts(cls):
+        if cls._take_script is None:
+            redis = await RedisService.get_redis()
+            cls._take_script = redis.register_script(TAKE_BATCH_SCRIPT)
+            cls._delete_script = redis.register_script(DELETE_IF_OWNER_SCRIPT)
+        return cls._take_script, cls._delete_script
+
+    @staticmethod
+    async def _mark(kind: str, entity_id: int, is_online: bool):
+        redis = await RedisService.get_redis()
+        state = {"is_online": is_online, "last_seen": datetime.utcnow().isoformat()}
+        await redis.hset(f"{PENDING_KEY}{kind}", str(entity_id), json.dumps(state))
+
+    @staticmethod
+    async def set_user_online(user_id: int, is_online: bool):
+        await PresenceService._mark(USERS, user_id, is_online)
+
+    @staticmethod
+    async def set_customer_online(customer_id: int, is_online: bool):
+        await PresenceService._mark(CUSTOMERS, customer_id, is_online)
+
+    @classmethod
+    async def _take_batch(cls, kind: str) -> dict:
+        """
+        Moves the pending states to the flushing key and returns them. A batch
+        left over from a failed flush is returned first, untouched.
+        """
+        take, _ = await cls._scripts()
+        batch = await take(keys=[f"{PENDING_KEY}{kind}", f"{FLUSHING_KEY}{kind}"])
+        return {
+            int(batch[i]): json.loads(batch[i + 1]) for i in range(0, len(batch), 2)
+        }
+
+    @staticmethod
+    async def _write_batch(kind: str, batch: dict):
+        from src.models import Customer, User
+
+        if kind == USERS:
+            rows = values(
+                column("id", Integer),
+                column("is_online", Boolean),
+                column("last_seen", DateTime),
+                name="presence",
+            ).data(
+                [
+                    (entity_id, state["is_online"], datetime.fromisoformat(state["last_seen"]))
+                    for entity_id, state in batch.items()
+                ]
+            )
+            statement = (
+                update(User)
+                .where(User.id == rows.c.id)
+                .values(is_online=rows.c.is_online, last_seen=rows.c.last_seen)
+            )
+        else:
+            rows = values(
+                column("id", Integer), column("is_online", Boolean), name="presence"
+            ).data([(entity_id, state["is_online"]) for entity_id, state in batch.items()])
+            statement = (
+                update(Customer)
+                .where(Customer.id == rows.c.id)
+                .values(is_online=rows.c.is_online)
+            )
+
+        async with async_session() as session:
+            await session.execute(
+                statement, execution_options={"synchronize_session": False}
+            )
+            await session.commit()
+
+    @classmethod
+    async def flush(cls) -> int:
+        """
+        Writes the buffered presence to the database; returns the rows
+        flushed, 0 when another worker is flushing
+        """
+        redis = await RedisService.get_redis()
+        token = uuid.uuid4().hex
+        if not await redis.set(
+            FLUSH_LOCK_KEY, token, nx=True, ex=settings.PRESENCE_FLUSH_LOCK_SECONDS
+        ):
+            return 0
+
+        _, delete_if_owner = await cls._scripts()
+        flushed = 0
+        try:
+            for kind in (USERS, CUSTOMERS):
+                batch = await cls._take_batch(kind)
+                if not batch:
+                    continue
+                await cls._write_batch(kind, batch)
+                # a flush outliving its lock leaves the batch to the next owner,
+                # which writes the same states again
+                await delete_if_owner(keys=[FLUSH_LOCK_KEY, f"{FLUSHING_KEY}{kind}"], args=[token])
+                flushed += len(batch)
+        finally:
+            # releases the lock, unless it expired and another worker holds it
+            await delete_if_owner(keys=[FLUSH_LOCK_KEY, FLUSH_LOCK_KEY], args=[token])
+        return flushed
+
+
+async def presence_flusher():
+    """Periodically flushes the presence buffer; flushes once more when cancelled"""
+    try:
+        while True:
+            await asyncio.sleep(settings.PRESENCE_FLUSH_SECONDS)
+            try:
+                await PresenceService.flush()
+            except Exception:
+                logger.exception("Presence flush failed, keeping the batch for retry")
+    finally:
+        try:
+            await PresenceService.flush()
+        except Exception:
+            logger.exception("Final presence flush failed, batch left in Redis")
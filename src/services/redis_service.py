@@ -1,5 +1,5 @@
+from src.config.redis.codec import codec
 from src.config.redis.redis_listener import get_redis
-import json
 
 
 class RedisService:
@@ -16,7 +16,7 @@ class RedisService:
         redis_client = await get_redis()
 
         try:
-            result = await redis_client.publish(channel, json.dumps(message))
+            result = await redis_client.publish(channel, codec.encode(message))
             print(f"📡 Published to Redis channel '{channel}': {result} subscribers")
             return result
         except Exception as e:
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import logging
+from typing import NamedTuple, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from src.config.settings import settings
+from src.db.session import db_session
+from src.models import Country, PhoneCode, Timezone
+from src.utils.response import CustomResponse as cr
+
+logger = logging.getLogger(__name__)
+
+COUNTRIES_MESSAGE = "Countries retrieved successfully"
+TIMEZONES_MESSAGE = "Timezones retrieved successfully"
+PHONE_CODES_MESSAGE = "Phone code retreived successfully"
+
+
+class Payload(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class Snapshot(NamedTuple):
+    version: str
+    countries: Payload
+    timezones: Payload
+    # country_id -> the timezones of the country
+    timezones_by_country: dict[int, Payload]
+    no_timezones: Payload
+    # None while no phone codes are seeded
+    phone_codes: Optional[Payload]
+
+
+def payload(data, message: str) -> Payload:
+    body = cr.encode(data, message)
+    return Payload(body, f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+
+
+class ReferenceDataService:
+    """
+    Countries, timezones and phone codes for the selection endpoints.
+
+    The seeded tables are read once into a snapshot of JSON bodies encoded
+    up front, served with an ETag. The snapshot is rebuilt only when the seed
+    version, the row counts and last update of the three tables, changes;
+    reference_data_refresher() checks it every REFERENCE_DATA_CHECK_SECONDS.
+    """
+
+    _snapshot: Optional[Snapshot] = None
+    _lock = asyncio.Lock()
+
+    @staticmethod
+    async def version() -> str:
+        columns = []
+        for model in (Country, Timezone, PhoneCode):
+            columns += [
+                select(func.count()).select_from(model).scalar_subquery(),
+                select(func.max(model.updated_at)).scalar_subquery(),
+            ]
+        async with db_session(read=True) as session:
+            row = (await session.execute(select(*columns))).one()
+        return hashlib.sha1(repr(tuple(row)).encode()).hexdigest()[:20]
+
+    @staticmethod
+    async def build(version: str) -> Snapshot:
+        countries = await Country.filter()
+        countries_data = [
+            {
+                "id": country.id,
+                "name": country.name,
+                "code": country.iso_code_2,
+                "iso_code_2": country.iso_code_2,  # US
+                "iso_code_3": country.iso_code_3,  # USA
+                "phone_code": country.phone_code,  # +977
+            }
+            for country in countries
+        ]
+
+        timezones = await Timezone.filter(related_items=[selectinload(Timezone.country)])
+        timezones_data = [
+            {
+                "id": tz.id,
+                "name": tz.name,
+                "display_name": tz.display_name,
+                "country_id": tz.country_id,
+                "country_code": tz.country.iso_code_2 if tz.country else None,
+                "country_name": tz.country.name if tz.country else None,
+            }
+            for tz in timezones
+        ]
+        by_country: dict[int, list] = {}
+        for tz in timezones_data:
+            by_country.setdefault(tz["country_id"], []).append(tz)
+
+        phone_codes = await PhoneCode.get_all()
+
+        return Snapshot(
+            version=version,
+            countries=payload({"countries": countries_data}, COUNTRIES_MESSAGE),
+            timezones=payload({"timezones": timezones_data}, TIMEZONES_MESSAGE),
+            timezones_by_country={
+                country_id: payload({"timezones": data}, TIMEZONES_MESSAGE)
+                for country_id, data in by_country.items()
+            },
+            no_timezones=payload({"timezones": []}, TIMEZONES_MESSAGE),
+            phone_codes=(
+                payload(jsonable_encoder(phone_codes), PHONE_CODES_MESSAGE)
+                if phone_codes
+                else None
+            ),
+        )
+
+    @classmethod
+    async def get(cls) -> Snapshot:
+        if cls._snapshot is None:
+            async with cls._lock:
+                if cls._snapshot is None:
+                    cls._snapshot = await cls.build(await cls.version())
+        return cls._snapshot
+
+    @classmethod
+    async def refresh(cls) -> bool:
+        """Rebuilds the snapshot when the seed version changed"""
+        version = await cls.version()
+        if cls._snapshot is not None and cls._snapshot.version == version:
+            return False
+        async with cls._lock:
+            cls._snapshot = await cls.build(version)
+        logger.info("Reference data snapshot %s loaded", version)
+        return True
+
+
+async def reference_data_refresher():
+    """Loads the snapshot at startup, then follows seed changes"""
+    while True:
+        try:
+            await ReferenceDataService.refresh()
+        except Exception:
+            logger.exception("Reference data refresh failed, keeping the current snapshot")
+        await asyncio.sleep(settings.REFERENCE_DATA_CHECK_SECONDS)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.db.config import async_session
+from src.modules.organizations.models import OrganizationSequence
+
+
+class SequenceService:
+    """
+    Per-organization numbering (guest names, ...): values are unique and
+    increasing, but may have gaps.
+
+    The next value is handed out by a single upsert on the counter row in its
+    own short transaction, so concurrent callers get distinct values and only
+    wait on each other for the duration of that statement, not of their
+    request. That transaction commits before the caller's, so a request that
+    fails or rolls back afterwards burns its number.
+    """
+
+    @staticmethod
+    async def next(organization_id: int, name: str) -> int:
+        """Increments the organization's `name` counter and returns it, 1 first"""
+        table = OrganizationSequence.__table__
+        now = datetime.utcnow()
+        async with async_session() as session:
+            insert = postgresql.insert if session.bind.dialect.name == "postgresql" else sqlite.insert
+            statement = (
+                insert(table)
+                .values(organization_id=organization_id, name=name, value=1, created_at=now, updated_at=now)
+                .on_conflict_do_update(
+                    index_elements=[table.c.organization_id, table.c.name],
+                    set_={"value": table.c.value + 1, "updated_at": now},
+                )
+                .returning(table.c.value)
+            )
+            value = (await session.execute(statement)).scalar_one()
+            await session.commit()
+        return value
@@ -8,6 +8,13 @@ from src.websocket.chat_namespaces.agent_chat_namespace import AgentChatNamespac
 from src.websocket.chat_namespaces.customer_chat_namespace import CustomerChatNamespace
 from src.websocket.namespace.ticket.sla_namespace import TicketSLANameSpace
 from src.websocket.namespace.ticket.ticket_namespace import TicketNameSpace
+from src.websocket.constants.chat_namespace_constants import AGENT_CHAT_NAMESPACE, CUSTOMER_CHAT_NAMESPACE
+from src.websocket.subscribers.dispatcher import ChatDispatcher
+from src.websocket.utils.presence_store import presence_heartbeat
+from src.services.auth_cache_service import AuthCacheService
+from src.services.permission_service import PermissionService
+from src.services.presence_service import presence_flusher
+from src.services.reference_data_service import reference_data_refresher
 
 redis_url = settings.REDIS_URL
 mgr = AsyncRedisManager(redis_url)
@@ -46,6 +53,15 @@ sio.register_namespace(AgentChatNamespace())
 # Global task reference to prevent garbage collection
 redis_listener_task = None
 
+# Ordered per-conversation worker pool the listener hands chat events to
+chat_dispatcher = ChatDispatcher(sio)
+
+presence_heartbeat_task = None
+presence_flusher_task = None
+auth_cache_listener_task = None
+permission_listener_task = None
+reference_data_task = None
+
 
 # Wire redis subscriber at app startup to avoid circular imports in chat_handler
 @app.on_event("startup")
@@ -57,7 +73,7 @@ async def start_ws_redis_listener():
     print("🚀 Starting WebSocket Redis listener...")
     try:
         # Create task with proper error handling
-        redis_listener_task = asyncio.create_task(redis_listener(sio))
+        redis_listener_task = asyncio.create_task(redis_listener(sio, chat_dispatcher))
 
         # Add error callback to catch silent failures
         def task_done_callback(task):
@@ -79,6 +95,41 @@ async def start_ws_redis_listener():
         traceback.print_exc()
 
 
+@app.on_event("startup")
+async def start_presence_heartbeat():
+    import asyncio
+
+    global presence_heartbeat_task, presence_flusher_task
+    presence_heartbeat_task = asyncio.create_task(
+        presence_heartbeat(sio, [AGENT_CHAT_NAMESPACE, CUSTOMER_CHAT_NAMESPACE])
+    )
+    presence_flusher_task = asyncio.create_task(presence_flusher())
+
+
+@app.on_event("startup")
+async def start_auth_cache_listener():
+    import asyncio
+
+    global auth_cache_listener_task
+    auth_cache_listener_task = asyncio.create_task(AuthCacheService.listen())
+
+
+@app.on_event("startup")
+async def start_permission_listener():
+    import asyncio
+
+    global permission_listener_task
+    permission_listener_task = asyncio.create_task(PermissionService.listen())
+
+
+@app.on_event("startup")
+async def start_reference_data_refresher():
+    import asyncio
+
+    global reference_data_task
+    reference_data_task = asyncio.create_task(reference_data_refresher())
+
+
 @app.on_event("shutdown")
 async def stop_ws_redis_listener():
     import asyncio
@@ -94,6 +145,28 @@ async def stop_ws_redis_listener():
         except Exception as e:
             print(f"⚠️ Error stopping Redis listener: {e}")
 
+    await chat_dispatcher.stop()
+
+    if presence_heartbeat_task:
+        presence_heartbeat_task.cancel()
+
+    if auth_cache_listener_task:
+        auth_cache_listener_task.cancel()
+
+    if permission_listener_task:
+        permission_listener_task.cancel()
+
+    if reference_data_task:
+        reference_data_task.cancel()
+
+    # the flusher writes the remaining presence buffer before it exits
+    if presence_flusher_task and not presence_flusher_task.done():
+        presence_flusher_task.cancel()
+        try:
+            await presence_flusher_task
+        except asyncio.CancelledError:
+            pass
+
 
 ticket_ns = TicketNameSpace()
 ticket_sla_ns = TicketSLANameSpace()
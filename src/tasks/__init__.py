@@ -4,3 +4,4 @@ from .auth_task import send_forgot_password_email, send_verification_email
 
 from .organization_task import send_invitation_email
 from .ticket_task import send_ticket_task_email
+from .visitor_task import enrich_visit_log
@@ -1,11 +1,15 @@
 import logging
 import sys
+from collections import defaultdict
 
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from src.config.settings import settings
+from src.db.session import db_session
 from src.modules.ticket.models.ticket import Ticket
 from src.modules.ticket.services.sla import sla_service
-from src.modules.ticket.services.status import ticket_status_service
+from src.modules.ticket.services.sla_scheduler import member, sla_scheduler
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -17,48 +21,55 @@ logger.addHandler(handler)
 
 async def check_sla_breach():
     """
-    Checks the sla breach of every tickets
+    Sends the SLA warnings whose thresholds are due
     """
-    logger.info("Checking")
-    all_tickets = await Ticket.filter_without_tenant()
-
-    if not all_tickets:
-        logger.info("No tickets")
+    due = await sla_scheduler.pop_due(limit=settings.SLA_SCAN_BATCH)
+    if not due:
         return
 
-    # getting the default ticket status with close_status set by organization
-    closed_ticket_status = await ticket_status_service.get_all_status_category_by_name(
-        name="closed"
-    )
-    tickets = await Ticket.filter_without_tenant(
-        where={
-            "status_id": {"ne": closed_ticket_status.id},
-            "opened_at": {"ne": None},
-            # "resolved_at": None,
-        },
-        related_items=[
-            selectinload(Ticket.sla),
-            selectinload(Ticket.assignees),
-            selectinload(Ticket.organization),
-            selectinload(Ticket.customer),
-        ],
-    )
-    logger.info("The tickets number %d", len(tickets))
+    # one check per ticket and alert type, however many of its levels are due
+    popped = defaultdict(list)
+    for ticket_id, alert_type, level in due:
+        popped[(ticket_id, alert_type)].append(member(ticket_id, alert_type, level))
+    logger.info("%d SLA thresholds due on %d tickets", len(due), len(popped))
 
-    for ticket in tickets:
-        logger.info("The tickets title %s", ticket.title)
-        if not ticket.opened_at:
-            return
-        response_remaining_time = sla_service.calculate_sla_response_time_percentage(
-            ticket.sla.response_time, int(ticket.opened_at.timestamp())
-        )
-        resolution_remaining_time = (
-            sla_service.calculate_sla_resolution_time_percentage(
-                ticket.sla.resolution_time, int(ticket.opened_at.timestamp())
+    async with db_session() as session:
+        tickets = await session.scalars(
+            select(Ticket)
+            .where(
+                Ticket.id.in_({ticket_id for ticket_id, _ in popped}),
+                Ticket.deleted_at.is_(None),
+            )
+            .options(
+                selectinload(Ticket.sla),
+                selectinload(Ticket.status),
+                selectinload(Ticket.assignees),
+                selectinload(Ticket.organization),
+                selectinload(Ticket.customer),
             )
         )
-        logger.error("Response time %d", response_remaining_time)
-        logger.error("Resolution time %d", resolution_remaining_time)
-        await sla_service.sla_breach_notification(
-            ticket, response_remaining_time, resolution_remaining_time
+        tickets = {ticket.id: ticket for ticket in tickets}
+
+    checks = []
+    for ticket_id, alert_type in popped:
+        ticket = tickets.get(ticket_id)
+        if (
+            ticket is None
+            or ticket.opened_at is None
+            or ticket.sla is None
+            or (ticket.status and ticket.status.status_category == "closed")
+        ):
+            continue
+        checks.append((ticket, alert_type))
+
+    failed = await sla_service.sla_breach_notifications(checks)
+    if failed:
+        logger.warning("%d SLA alerts failed, retrying", len(failed))
+        await sla_scheduler.retry(
+            (
+                key
+                for ticket, alert_type in failed
+                for key in popped[(ticket.id, alert_type)]
+            ),
+            settings.SLA_RETRY_SECONDS,
         )
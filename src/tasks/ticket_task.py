@@ -7,7 +7,10 @@ from pydantic import EmailStr
 from sqlalchemy.orm import selectinload
 
 from src.factory.notification import NotificationFactory
-from src.modules.sendgrid.services import send_sendgrid_email
+from src.modules.sendgrid.services import (
+    send_sendgrid_batch_email,
+    send_sendgrid_email,
+)
 from src.modules.ticket.enums import TicketLogActionEnum, TicketLogEntityEnum
 from src.modules.ticket.models.ticket import Ticket
 from src.modules.ticket.models.ticket_log import TicketLog
@@ -58,6 +61,50 @@ async def send_ticket_task_email(
         await TicketLog.create(**log_data)
 
 
+@dramatiq.actor
+async def send_ticket_task_batch_email(
+    subject: str,
+    recipients: list[str],
+    body_html: str,
+    from_email: tuple[str, str],
+    ticket_id: int,
+    organization_id: int,
+    mail_type: TicketLogActionEnum,
+):
+    """
+    Sends one email to all the recipients in batched API calls and logs it
+    once for the batch
+    """
+    log_data = {
+        "ticket_id": ticket_id,
+        "organization_id": organization_id,
+        "entity_type": TicketLogEntityEnum.TICKET,
+        "new_value": {"recipients": recipients},
+    }
+    try:
+        logger.info(f"Sending {subject} email to {len(recipients)} recipients")
+        calls = send_sendgrid_batch_email(
+            from_email=from_email,
+            to_emails=recipients,
+            subject=subject,
+            html_content=body_html,
+            ticket_id=ticket_id,
+            org_id=organization_id,
+        )
+        await TicketLog.create(
+            **log_data,
+            action=mail_type,
+            description=f"Sent to {len(recipients)} recipients in {calls} requests",
+        )
+    except Exception as e:
+        logger.exception(e)
+        await TicketLog.create(
+            **log_data,
+            action=TicketLogActionEnum.EMAIL_SENT_FAILED,
+            description=f"Error while sending {mail_type}",
+        )
+
+
 @dramatiq.actor
 async def send_ticket_task_message_email(
     subject: str,
@@ -0,0 +1,30 @@
+import logging
+
+import dramatiq
+
+from src.modules.visitor.models import CustomerVisitLogs
+from src.services.ip_service import IPService
+
+logger = logging.getLogger(__name__)
+
+
+@dramatiq.actor(max_retries=3)
+async def enrich_visit_log(log_id: int, ip: str):
+    """Fills in the location of a visit log saved on the request path"""
+    info = await IPService.get_ip_info(ip)
+    if info is None:
+        raise RuntimeError(f"Geolocation of {ip} is unavailable")
+    if not any(info.values()):
+        return
+
+    log = await CustomerVisitLogs.update(
+        log_id,
+        city=info["city"],
+        country=info["country"],
+        latitude=None if info["latitude"] is None else str(info["latitude"]),
+        longitude=None if info["longitude"] is None else str(info["longitude"]),
+    )
+    if log is None:
+        # retried, in case the request saving it has not committed yet
+        raise RuntimeError(f"Visit log {log_id} not found")
+    logger.info(f"Visit log {log_id} located in {info['city']}, {info['country']}")
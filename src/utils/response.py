@@ -1,7 +1,8 @@
-from typing import Any, Generic, List, Optional, TypeVar, Union
+import json
+from typing import Any, Generic, Iterable, List, Optional, TypeVar, Union
 
-from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic.generics import GenericModel
 
 T = TypeVar("T")
@@ -25,6 +26,48 @@ class CustomResponse:
         content = {"success": True, "message": message, "data": data}
         return JSONResponse(status_code=status_code, content=content)
 
+    @staticmethod
+    def stream(
+        data: Iterable[Any],
+        message: str = "Successful",
+        status_code: int = status.HTTP_200_OK,
+        **extra: Any,
+    ):
+        """
+        Same envelope as success() but the data list is serialized one item at
+        a time, so a large page is never held as a single JSON string.
+        """
+
+        def body():
+            head = json.dumps({"success": True, "message": message, **extra})
+            yield head[:-1] + ', "data": ['
+            for index, item in enumerate(data):
+                yield ("," if index else "") + json.dumps(item)
+            yield "]}"
+
+        return StreamingResponse(
+            body(), status_code=status_code, media_type="application/json"
+        )
+
+    @staticmethod
+    def encode(data: Any = None, message: str = "Successful") -> bytes:
+        """The body of success(), for payloads encoded once and served many times"""
+        content = {"success": True, "message": message, "data": data}
+        return JSONResponse(content=content).body
+
+    @staticmethod
+    def cached(request: Request, body: bytes, etag: str, max_age: int):
+        """
+        A body from encode() with its ETag, or 304 Not Modified when the
+        client sent that ETag in If-None-Match
+        """
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+        if_none_match = request.headers.get("if-none-match", "")
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
     @staticmethod
     def error(
         data: Optional[Any] = None,
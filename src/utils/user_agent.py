@@ -0,0 +1,118 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from src.config.settings import settings
+
+# length of the org_customer_logs.user_agent column
+MAX_USER_AGENT = 512
+# longest browser, OS or device name kept, within the shortest of their columns
+MAX_NAME = 50
+
+BOT = re.compile(r"bot|crawl|spider|slurp|facebookexternalhit|headless|lighthouse", re.I)
+BOT_NAME = re.compile(r"(\w*(?:bot|crawler|spider|externalhit)\w*)/(\d+)", re.I)
+# clients that are not browsers: curl/8.4.0, PostmanRuntime/7.37.3
+PRODUCT = re.compile(r"^([\w-]+)/(\d+)")
+
+# first match wins: most browsers also claim to be Chrome, Safari or Mozilla
+BROWSERS = [
+    ("Edge", re.compile(r"Edg(?:e|A|iOS)?/(\d+)")),
+    ("Opera", re.compile(r"(?:OPR|OPT|Opera)/(\d+)")),
+    ("Samsung Internet", re.compile(r"SamsungBrowser/(\d+)")),
+    ("UC Browser", re.compile(r"UCBrowser/(\d+)")),
+    ("Yandex", re.compile(r"YaBrowser/(\d+)")),
+    ("Facebook", re.compile(r"FBAV/(\d+)")),
+    ("Instagram", re.compile(r"Instagram (\d+)")),
+    ("Firefox", re.compile(r"(?:Firefox|FxiOS)/(\d+)")),
+    ("Chrome", re.compile(r"(?:Chrome|CriOS)/(\d+)")),
+    ("Safari", re.compile(r"Version/(\d+)[\d.]* (?:Mobile/\S+ )?Safari/")),
+    ("Internet Explorer", re.compile(r"(?:MSIE |Trident/.*rv:)(\d+)")),
+]
+
+WINDOWS = {"10.0": "10", "6.3": "8.1", "6.2": "8", "6.1": "7", "6.0": "Vista", "5.1": "XP"}
+
+OS_PATTERNS = [
+    ("Windows", re.compile(r"Windows NT ([\d.]+)")),
+    ("iOS", re.compile(r"(?:iPhone|CPU) OS (\d+(?:_\d+)?)")),
+    ("macOS", re.compile(r"Mac OS X (\d+(?:[_.]\d+)?)")),
+    ("Android", re.compile(r"Android (\d+(?:\.\d+)?)")),
+    ("Chrome OS", re.compile(r"CrOS \S+ ([\d.]+)")),
+    ("Linux", re.compile(r"Linux|X11")),
+]
+
+ANDROID_MODEL = re.compile(r"Android [\d.]+; (?:[a-z]{2}[-_][a-z]{2}; )?([^;)]+?)(?: Build/[^;)]*)?\)", re.I)
+
+
+class UserAgent(NamedTuple):
+    browser: Optional[str]
+    os: Optional[str]
+    device_type: Optional[str]
+    device: Optional[str]
+
+
+def _plausible(name: Optional[str], fallback: Optional[str] = None) -> Optional[str]:
+    """The name, or the fallback when it is too long to be a real product or model"""
+    return name if name is None or len(name) <= MAX_NAME else fallback
+
+
+def _browser(ua: str) -> Optional[str]:
+    match = BOT_NAME.search(ua)
+    if match:
+        return f"{match.group(1)} {match.group(2)}"
+    for family, pattern in BROWSERS:
+        match = pattern.search(ua)
+        if match:
+            return f"{family} {match.group(1)}"
+    match = PRODUCT.match(ua)
+    if match and match.group(1) != "Mozilla":
+        return f"{match.group(1)} {match.group(2)}"
+    return None
+
+
+def _os(ua: str) -> Optional[str]:
+    for family, pattern in OS_PATTERNS:
+        match = pattern.search(ua)
+        if not match:
+            continue
+        if not match.groups():
+            return family
+        version = match.group(1).replace("_", ".")
+        if family == "Windows":
+            version = WINDOWS.get(version, version)
+        return f"{family} {version}"
+    return None
+
+
+def _device(ua: str) -> tuple[str, str]:
+    """(device_type, device) of the user agent"""
+    if BOT.search(ua):
+        return "bot", "Bot"
+    if "iPad" in ua:
+        return "tablet", "iPad"
+    if "iPhone" in ua or "iPod" in ua:
+        return "mobile", "iPhone"
+    if "Android" in ua:
+        match = ANDROID_MODEL.search(ua)
+        model = match.group(1).strip() if match else ""
+        # reduced user agents report the model as "K"
+        model = "Android" if model in ("", "K") else _plausible(model, "Android")
+        # Android tablets leave "Mobile" out of the user agent
+        return ("mobile" if "Mobile" in ua else "tablet"), model
+    if "Macintosh" in ua:
+        return "desktop", "Mac"
+    if "Windows" in ua or "X11" in ua or "CrOS" in ua:
+        return "desktop", "PC"
+    return "desktop", "Other"
+
+
+@lru_cache(maxsize=settings.USER_AGENT_CACHE_SIZE)
+def parse_user_agent(ua: str) -> UserAgent:
+    """
+    Browser, OS and device of a User-Agent header. Cached per string: a few
+    user agents make up most of the traffic.
+    """
+    if not ua:
+        return UserAgent(None, None, None, None)
+    device_type, device = _device(ua)
+    # the header is the client's: a name that long is made up, and would not fit its column
+    return UserAgent(_plausible(_browser(ua)), _plausible(_os(ua)), device_type, device)
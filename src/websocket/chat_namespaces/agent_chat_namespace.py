@@ -23,10 +23,13 @@ class AgentChatNamespace(BaseChatNamespace):
     def __init__(self):
         super().__init__(AGENT_CHAT_NAMESPACE)
 
-    async def _notify_to_user_customers(self, org_id: int, user_id: int,sid:str):
+    async def _notify_to_user_customers(self, org_id: int, user,sid:str):
         print("notify users in the same workspace that an agent has connected")
-        from src.models import User
-        user = await User.update(user_id,is_online=True)
+        from src.services.presence_service import PresenceService
+
+        # the presence buffer is flushed to the database in batches
+        await PresenceService.set_user_online(user.id, True)
+        user.is_online = True
 
         await self.redis_publish(
             channel=AGENT_ONLINE_CHANNEL,
@@ -34,7 +37,7 @@ class AgentChatNamespace(BaseChatNamespace):
                     "event": self.agent_connected,
                     "mode": "online",
                     "organization_id": org_id,
-                    "user_id": user_id,
+                    "user_id": user.id,
                     "sid": sid,
                     "user": user.to_json()
                 }
@@ -64,7 +67,7 @@ class AgentChatNamespace(BaseChatNamespace):
             return False
 
         await self.conversation_service.join_agent_group(sid, organization_id, user.id)
-        await self._notify_to_user_customers(organization_id, user.id,sid)
+        await self._notify_to_user_customers(organization_id, user,sid)
         
         
 
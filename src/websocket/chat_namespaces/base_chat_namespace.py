@@ -1,6 +1,7 @@
 from .base_namespace import BaseNameSpace
-from src.websocket.constants.channel_names import TYPING_CHANNEL, TYPING_STOP_CHANNEL, MESSAGE_SEEN_CHANNEL,CUSTOMER_OFFLINE_CHANNEL,AGENT_OFFLINE_CHANNEL
+from src.websocket.constants.channel_names import MESSAGE_SEEN_CHANNEL,CUSTOMER_OFFLINE_CHANNEL,AGENT_OFFLINE_CHANNEL
 from src.websocket.services.conversation_service import ConversationService
+from src.websocket.services.typing_aggregator import TypingAggregator
 from src.websocket.constants.chat_event_constants import receive_message,stop_typing,message_seen,message_notification,customer_disconnected,receive_typing,customer_land,agent_connected,agent_disconnected
 
 
@@ -22,21 +23,32 @@ class BaseChatNamespace(BaseNameSpace):
         super().__init__(namespace)
         self.is_customer = is_customer
         self.conversation_service = ConversationService()
+        self.typing_aggregator = TypingAggregator(self.redis_publish)
     
 
     async def on_disconnect(self, sid):
         from src.models import Customer,User
+        from src.services.presence_service import PresenceService
         print("agent disconnected..")
         # on disconnect
         await self.disconnect(sid)
+        await self.typing_aggregator.stop_sid(sid)
         try:
+            # one round trip drops the sid and hands back who it belonged to
+            presence = await self.conversation_service.conversation_utils.remove_sid(sid)
 
             if self.is_customer:
-                customerId = await self.conversation_service.conversation_utils.get_customer_id(sid)
-                await self.conversation_service.customer_leave_conversation(sid)
+                customerId = presence.get("id")
+                await self.conversation_service.customer_leave_conversation(
+                    sid,
+                    conversation_id=presence.get("conversation_id"),
+                    customer_id=customerId,
+                )
                 print(f'customer_id {customerId} and customer leaving ..')
 
-                customer = await Customer.update(int(customerId), is_online=False)
+                customer = await Customer.get(int(customerId))
+                await PresenceService.set_customer_online(customer.id, False)
+                customer.is_online = False
                 await customer.update_log()
 
                 await self.redis_publish(
@@ -50,11 +62,13 @@ class BaseChatNamespace(BaseNameSpace):
                     }
                 )
             else:
-                agentId = await self.conversation_service.conversation_utils.get_agent_id(sid)
+                agentId = presence.get("id")
                 print(f'agentId {agentId} and agent leaving ..')
             
                 # await self.conversation_service.agent_leave_conversation(sid)
-                user = await User.update(int(agentId),is_online=False)
+                user = await User.get(int(agentId))
+                await PresenceService.set_user_online(user.id, False)
+                user.is_online = False
                 print(f'agent id {agentId}')
                 
                 await self.redis_publish(
@@ -82,15 +96,14 @@ class BaseChatNamespace(BaseNameSpace):
     async def on_typing(self, sid, data: dict):
         conversation_id = data.get('conversation_id')
         organization_id = data.get("organization_id")
-        
-       
-        
+
         if not conversation_id or not organization_id:
             return False
 
-        await self.redis_publish(
-            channel=TYPING_CHANNEL,
-            message={
+        # bursts are coalesced and auto-expire into stop_typing
+        await self.typing_aggregator.typing(
+            sid,
+            {
                 "event": self.receive_typing,
                 "sid": sid,
                 "message": data.get("message", ""),
@@ -103,23 +116,11 @@ class BaseChatNamespace(BaseNameSpace):
 
     async def on_stop_typing(self, sid, data: dict):
         conversation_id = data.get('conversation_id')
-        organization_id = data.get("organization_id")
-        print(f"conversation id {conversation_id}")
 
         if not conversation_id:
             return False
 
-        await self.redis_publish(
-            channel=TYPING_STOP_CHANNEL,
-            message={
-                "event": self.stop_typing,
-                "sid": sid,
-                "conversation_id": conversation_id,
-                "is_customer": self.is_customer,
-                "organization_id": organization_id,
-
-            },
-        )
+        await self.typing_aggregator.stop(sid, conversation_id)
 
     async def on_message_seen(self, sid, data: dict):
         print(f"message seen {sid}")
@@ -132,6 +133,13 @@ class BaseChatNamespace(BaseNameSpace):
         message = await self.conversation_service.chatUtils.save_message_seen(messageId)
         if not message:
             return False
+
+        if not self.is_customer and organization_id:
+            from src.modules.chat.services.inbox_service import InboxService
+
+            agent_id = await self.conversation_service.conversation_utils.get_agent_id(sid)
+            if agent_id:
+                await InboxService.mark_read(organization_id, message.conversation_id, agent_id)
     
         await self.redis_publish(
             channel=MESSAGE_SEEN_CHANNEL,
@@ -1,6 +1,9 @@
+from typing import Any, Iterable, Optional
+
 import socketio
 from src.config.redis.redis_listener import get_redis
 from src.services.redis_service import RedisService
+from src.websocket.utils.multicast import multicast
 
 
 class BaseNameSpace(socketio.AsyncNamespace):
@@ -17,3 +20,9 @@ class BaseNameSpace(socketio.AsyncNamespace):
         """Direct Redis pub/sub publish - more reliable than broadcaster library"""
 
         await RedisService.redis_publish(channel=channel, message=message)
+
+    async def multicast(
+        self, event: str, data: Any, rooms: Iterable[str], skip_sid: Optional[str] = None
+    ):
+        """Emits the event to all the rooms with one emit (and one Redis publish)"""
+        await multicast(self.server, event, data, rooms, self.namespace, skip_sid=skip_sid)
@@ -36,6 +36,7 @@ class CustomerChatNamespace(BaseChatNamespace):
     async def on_connect(self, sid, environ, auth: dict):
         print(f"🔌Customer Socket connection attempt: {sid}")
         from src.models import Customer
+        from src.services.presence_service import PresenceService
 
         if not auth:
             print("No auth data provided")
@@ -48,7 +49,7 @@ class CustomerChatNamespace(BaseChatNamespace):
             return False
         organization_id = auth.get("organization_id")
         conversation_id = auth.get("conversation_id")
-        customer = await Customer.update(customer_id,is_online=True)
+        customer = await Customer.get(customer_id)
 
         if not customer or not organization_id:
             print(
@@ -56,6 +57,9 @@ class CustomerChatNamespace(BaseChatNamespace):
             )
             return False
 
+        await PresenceService.set_customer_online(customer.id, True)
+        customer.is_online = True
+
         await self.conversation_service.customer_connect(sid, customer_id, organization_id)
         
         await self._notify_to_users(organization_id, customer)
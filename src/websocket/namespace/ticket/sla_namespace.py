@@ -46,20 +46,18 @@ class TicketSLANameSpace(BaseNameSpace):
         level: int,
     ):
         """
-        This method broadcasts the message to the entire room
+        This method sends the alert to the rooms of all the receivers at once
         """
         if not receivers_id or not message:
             return
 
-        for uid in receivers_id:
-            await self.sio.emit(
-                "ticket_sla_alert",
-                {
-                    "message": message,
-                    "payload": payload,
-                    "alert_type": alert_type,
-                    "level": level,
-                },
-                room=f"user:{uid}",
-                namespace=self.namespace,
-            )
+        await self.multicast(
+            "ticket_sla_alert",
+            {
+                "message": message,
+                "payload": payload,
+                "alert_type": alert_type,
+                "level": level,
+            },
+            rooms=[f"user:{uid}" for uid in receivers_id],
+        )
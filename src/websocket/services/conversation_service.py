@@ -123,9 +123,10 @@ class ConversationService:
         except Exception as e:
             print(f"Error joining agent {user_id} to conversation {conversation_id}: {e}")
 
-    async def customer_leave_conversation(self, sid:str):
+    async def customer_leave_conversation(self, sid:str, conversation_id:int=None, customer_id:int=None):
         try:
-            conversation_id = await self.conversation_utils.get_conversation_id(sid)
+            if conversation_id is None:
+                conversation_id = await self.conversation_utils.get_conversation_id(sid)
             room = self.get_room_name(conversation_id)
 
             
@@ -137,7 +138,8 @@ class ConversationService:
 
             await self.sio.leave_room(sid=sid, room=room, namespace=self.customer_namespace)
 
-            customer_id = await self.conversation_utils.get_customer_id(sid)
+            if customer_id is None:
+                customer_id = await self.conversation_utils.get_customer_id(sid)
             await self.conversation_utils.remove_sid_from_conversation(sid,conversation_id=conversation_id)
             
 
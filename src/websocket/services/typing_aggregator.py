@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from src.config.settings import settings
+from src.websocket.constants.channel_names import TYPING_CHANNEL, TYPING_STOP_CHANNEL
+from src.websocket.constants.chat_event_constants import stop_typing
+
+logger = logging.getLogger(__name__)
+
+Publish = Callable[..., Awaitable]
+
+
+@dataclass
+class TypingState:
+    message: dict
+    last_input: float
+    pending: bool = False
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class TypingAggregator:
+    """
+    Coalesces typing events per (conversation, sid).
+
+    The first keystroke of a burst is published right away (leading event),
+    later keystrokes inside the window only replace the pending message which
+    is published once when the window closes (trailing event). When no input
+    arrives for the idle timeout a stop_typing event is published, so clients
+    do not have to send stop_typing reliably.
+    """
+
+    def __init__(
+        self,
+        publish: Publish,
+        window: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+    ):
+        self.publish = publish
+        self.window = window if window is not None else settings.TYPING_WINDOW_SECONDS
+        self.idle_timeout = (
+            idle_timeout
+            if idle_timeout is not None
+            else settings.TYPING_IDLE_TIMEOUT_SECONDS
+        )
+        self._states: dict[tuple, TypingState] = {}
+
+    @staticmethod
+    def key(sid: str, conversation_id) -> tuple:
+        return (str(conversation_id), sid)
+
+    async def typing(self, sid: str, message: dict):
+        key = self.key(sid, message.get("conversation_id"))
+        now = asyncio.get_running_loop().time()
+        state = self._states.get(key)
+
+        if state:
+            state.message = message
+            state.last_input = now
+            state.pending = True
+            return
+
+        state = TypingState(message=message, last_input=now)
+        self._states[key] = state
+        state.task = asyncio.create_task(self._run(key, state))
+        await self.publish(channel=TYPING_CHANNEL, message=message)
+
+    async def stop(self, sid: str, conversation_id) -> bool:
+        """Ends the burst of the sid; returns False when it was not typing"""
+        state = self._states.pop(self.key(sid, conversation_id), None)
+        if not state:
+            return False
+        if state.task and state.task is not asyncio.current_task():
+            state.task.cancel()
+        await self.publish(channel=TYPING_STOP_CHANNEL, message=self._stop_message(state))
+        return True
+
+    async def stop_sid(self, sid: str):
+        """Ends every burst of a sid, used when the socket disconnects"""
+        for conversation_id, key_sid in list(self._states):
+            if key_sid == sid:
+                await self.stop(sid, conversation_id)
+
+    def active(self) -> int:
+        return len(self._states)
+
+    @staticmethod
+    def _stop_message(state: TypingState) -> dict:
+        message = state.message
+        return {
+            "event": stop_typing,
+            "sid": message.get("sid"),
+            "conversation_id": message.get("conversation_id"),
+            "is_customer": message.get("is_customer"),
+            "organization_id": message.get("organization_id"),
+        }
+
+    async def _run(self, key: tuple, state: TypingState):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._states.get(key) is state:
+                await asyncio.sleep(self.window)
+                if self._states.get(key) is not state:
+                    return
+                if state.pending:
+                    state.pending = False
+                    await self.publish(channel=TYPING_CHANNEL, message=state.message)
+                elif loop.time() - state.last_input >= self.idle_timeout:
+                    await self.stop(key[1], key[0])
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Typing aggregator failed for %s", key)
+            self._states.pop(key, None)
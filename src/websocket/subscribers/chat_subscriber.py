@@ -1,3 +1,5 @@
+from typing import Union
+
 import socketio
 from src.websocket.constants.chat_namespace_constants import AGENT_CHAT_NAMESPACE, CUSTOMER_CHAT_NAMESPACE
 
@@ -15,6 +17,7 @@ from src.websocket.constants.channel_names import (
     CUSTOMER_OFFLINE_CHANNEL,
 )
 from src.websocket.constants.chat_event_constants import message_notification
+from src.websocket.utils.multicast import multicast
 
 
 
@@ -36,7 +39,7 @@ class ChatSubscriber:
         self.organizationId = payload.get("organization_id")
         self.conversationId = payload.get("conversation_id")
 
-    async def emit(self, room: str, namespace: str = None, sid: str = None):
+    async def emit(self, room: Union[str, list[str]], namespace: str = None, sid: str = None):
         namespace = namespace if namespace else self.namespace
         print(f"emit to room {room} ")
         print(f"emit to namespace {namespace}")
@@ -48,12 +51,10 @@ class ChatSubscriber:
         # print(f"emit to payload {self.payload}")
         
         try:
-            result = await self.sio.emit(
-                event=self.event,
-                room=room,
-                data=self.payload,
-                namespace=namespace,
-                skip_sid=sid,
+            # several rooms go out as one emit and one Redis publish
+            rooms = [room] if isinstance(room, str) else room
+            result = await multicast(
+                self.sio, self.event, self.payload, rooms, namespace, skip_sid=sid
             )
             print(f"✅ Emitted event '{self.event}' to room '{room}' in namespace '{namespace}'")
             return result
@@ -193,74 +194,30 @@ class ChatSubscriber:
 
 
 
-async def chat_subscriber(sio: socketio.AsyncServer, channel: str, payload: dict):
-    from src.websocket.utils.chat_utils import ChatUtils
-    print(f"🔔 Chat subscriber called for channel: {channel}")
-   
-
-    subscriber = ChatSubscriber(sio, payload=payload, chatUtils=ChatUtils)
-
-    # handle chat events
-    if channel == AGENT_NOTIFICATION_CHANNEL:
-        print("📢 Processing agent notification")
-        await subscriber.agent_notification()
-
-
-
-    elif channel == AGENT_ONLINE_CHANNEL:
-        print("👥 Processing agent availability notification")
-        await subscriber.agent_notification()
-        await subscriber.customer_notification()
-    elif channel == AGENT_OFFLINE_CHANNEL:
-        print("👥 Processing agent offline notification")
-        await subscriber.agent_notification()
-        await subscriber.customer_notification()
-      
-    
-    elif channel==CUSTOMER_OFFLINE_CHANNEL:
-        print('customer offline')
-        await subscriber.agent_notification()
-
-    elif channel ==CUSTOMER_LAND_WEBSITE:
-        print('processing customer land website')
-        await subscriber.agent_notification()
-    
-
-
-    elif channel == MESSAGE_CHANNEL:
-        print("💬 Processing message")
-        await subscriber.message()
-
-    elif channel == TYPING_CHANNEL:
-        print("⌨️ Processing typing")
-        await subscriber.broadcast_conversation()
+# channel -> subscriber handlers, run in order for every message on the channel
+CHANNEL_HANDLERS = {
+    AGENT_NOTIFICATION_CHANNEL: ("agent_notification",),
+    AGENT_ONLINE_CHANNEL: ("agent_notification", "customer_notification"),
+    AGENT_OFFLINE_CHANNEL: ("agent_notification", "customer_notification"),
+    CUSTOMER_OFFLINE_CHANNEL: ("agent_notification",),
+    CUSTOMER_LAND_WEBSITE: ("agent_notification",),
+    MESSAGE_CHANNEL: ("message",),
+    TYPING_CHANNEL: ("broadcast_conversation",),
+    TYPING_STOP_CHANNEL: ("broadcast_conversation",),
+    CUSTOMER_JOIN_CONVERSATION: ("agent_notification",),
+    MESSAGE_SEEN_CHANNEL: ("message_seen",),
+    CONVERSATION_UNRESOLVED_CHANNEL: ("conversation_unresolved",),
+}
 
-    elif channel == TYPING_STOP_CHANNEL:
-        print("⏹️ Processing stop typing")
-        await subscriber.broadcast_conversation()
 
-    elif channel ==CUSTOMER_JOIN_CONVERSATION:
-        await subscriber.agent_notification()
-
-
-
-
-    elif channel == MESSAGE_SEEN_CHANNEL:
-        print("👁️ Processing message seen")
-        await subscriber.message_seen()
-    elif channel == CONVERSATION_UNRESOLVED_CHANNEL:
-        print("🔄 Processing conversation unresolved")
-        await subscriber.conversation_unresolved()
-    
-    
-    
-
-    
-    
-    
+async def chat_subscriber(sio: socketio.AsyncServer, channel: str, payload: dict):
+    from src.websocket.utils.chat_utils import ChatUtils
 
-    
- 
-    
-    else:
+    handlers = CHANNEL_HANDLERS.get(channel)
+    if not handlers:
         print(f"⚠️ Unknown channel: {channel}")
+        return
+
+    subscriber = ChatSubscriber(sio, payload=payload, chatUtils=ChatUtils)
+    for handler in handlers:
+        await getattr(subscriber, handler)()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+import zlib
+from typing import Optional
+
+import socketio
+
+from src.config.settings import settings
+from src.websocket.subscribers.chat_subscriber import chat_subscriber
+
+logger = logging.getLogger(__name__)
+
+
+class ChatDispatcher:
+    """
+    Fans chat pub/sub messages out to a fixed pool of ordered worker queues.
+
+    Messages are sharded by conversation (falling back to organization, then
+    channel), so events of one conversation are handled in publish order while
+    different conversations are emitted concurrently.
+    """
+
+    def __init__(
+        self,
+        sio: socketio.AsyncServer,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.sio = sio
+        self.workers = workers or settings.CHAT_DISPATCH_WORKERS
+        self.queue_size = queue_size or settings.CHAT_DISPATCH_QUEUE_SIZE
+        self.queues: list[asyncio.Queue] = []
+        self.tasks: list[asyncio.Task] = []
+        self.processed = [0] * self.workers
+        self.failed = [0] * self.workers
+        self.last_lag_ms = [0.0] * self.workers
+        self.max_lag_ms = [0.0] * self.workers
+
+    @staticmethod
+    def shard_key(channel: str, payload: dict) -> str:
+        key = payload.get("conversation_id") or payload.get("organization_id")
+        return str(key) if key is not None else channel
+
+    def shard_for(self, channel: str, payload: dict) -> int:
+        key = self.shard_key(channel, payload)
+        return zlib.crc32(key.encode("utf-8")) % self.workers
+
+    def start(self):
+        if self.tasks:
+            return
+        self.queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self.tasks = [
+            asyncio.create_task(self._worker(index)) for index in range(self.workers)
+        ]
+        logger.info("Chat dispatcher started with %d workers", self.workers)
+
+    async def stop(self, timeout: float = 5.0):
+        """Drains the queued events (bounded by timeout) and stops the workers"""
+        if not self.tasks:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self.queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Chat dispatcher stopped with %d queued events", self.depth())
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def dispatch(self, channel: str, payload: dict):
+        """
+        Enqueues the event on its shard. Waits when the shard is full so a
+        slow room applies backpressure instead of dropping events.
+        """
+        if not self.tasks:
+            self.start()
+        index = self.shard_for(channel, payload)
+        await self.queues[index].put((time.monotonic(), channel, payload))
+
+    async def _worker(self, index: int):
+        queue = self.queues[index]
+        while True:
+            enqueued_at, channel, payload = await queue.get()
+            lag_ms = (time.monotonic() - enqueued_at) * 1000
+            self.last_lag_ms[index] = lag_ms
+            self.max_lag_ms[index] = max(self.max_lag_ms[index], lag_ms)
+            try:
+                await chat_subscriber(self.sio, channel=channel, payload=payload)
+                self.processed[index] += 1
+            except Exception:
+                self.failed[index] += 1
+                logger.exception("Error processing chat channel %s", channel)
+            finally:
+                queue.task_done()
+
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self.queues)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "depth": self.depth(),
+            "processed": sum(self.processed),
+            "failed": sum(self.failed),
+            "max_lag_ms": round(max(self.max_lag_ms, default=0.0), 3),
+            "shards": [
+                {
+                    "depth": queue.qsize(),
+                    "processed": self.processed[index],
+                    "failed": self.failed[index],
+                    "last_lag_ms": round(self.last_lag_ms[index], 3),
+                    "max_lag_ms": round(self.max_lag_ms[index], 3),
+                }
+                for index, queue in enumerate(self.queues)
+            ],
+        }
@@ -74,17 +74,10 @@ class ChatUtils:
         if payload.get("organization_id"):
             data["organization_id"] = payload.get("organization_id")
 
-        msg = await Message.create(**data)
-
-        for file in payload.get("files", []):
-            await MessageAttachment.create(
-                message_id=msg.id,
-                file_url=file.get("url"),
-                file_name=file.get("file_name"),
-                file_type=file.get("file_type"),
-                file_size=file.get("file_size"),
-            )
-        await ChatUtils.save_last_message(conversation_id, msg.id)
+        # message, attachments and last_message in one transaction
+        msg, _, _, _ = await Message.create_with_attachments(
+            attachments=payload.get("files", []), **data
+        )
 
         return msg
 
@@ -0,0 +1,30 @@
+from typing import Any, Iterable, Optional
+
+import socketio
+
+
+async def multicast(
+    sio: socketio.AsyncServer,
+    event: str,
+    data: Any,
+    rooms: Iterable[str],
+    namespace: str,
+    skip_sid: Optional[str] = None,
+):
+    """
+    Emits one event to several rooms of a namespace at once.
+
+    The server takes a list of rooms: the packet is encoded once, each client
+    in more than one of the rooms gets it once, and the Redis manager relays
+    the emit to the other hosts with a single publish instead of one per room.
+    """
+    rooms = list(dict.fromkeys(room for room in rooms if room))
+    if not rooms:
+        return
+    await sio.emit(
+        event,
+        data,
+        room=rooms if len(rooms) > 1 else rooms[0],
+        namespace=namespace,
+        skip_sid=skip_sid,
+    )
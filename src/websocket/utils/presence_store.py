@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from typing import Iterable, Optional
+
+from src.config.settings import settings
+from src.services.redis_service import RedisService
+
+PRESENCE_SID_KEY = "ws:presence:sid:"  # ws:presence:sid:{sid} -> hash(kind, id, conversation_id)
+PRESENCE_HEARTBEAT_KEY = "ws:presence:heartbeats"  # zset sid -> last heartbeat
+PRESENCE_SID_ROOMS_KEY = "ws:presence:sid_rooms"  # hash sid -> conversation_id
+REDIS_ROOM_KEY = "ws:chat:room::"  # ws:chat:room::{conversation_id} -> set of sids
+
+logger = logging.getLogger(__name__)
+
+AGENT = "agent"
+CUSTOMER = "customer"
+
+# Removes every trace of a sid in one round trip and returns its presence hash
+REMOVE_SID_SCRIPT = """
+local presence = redis.call('HGETALL', KEYS[1])
+local fields = {}
+for i = 1, #presence, 2 do fields[presence[i]] = presence[i + 1] end
+local conversation_id = fields['conversation_id'] or redis.call('HGET', KEYS[3], ARGV[1])
+if fields['kind'] and fields['id'] then
+    local owner = fields['kind'] .. '_id:' .. fields['id']
+    if redis.call('GET', owner) == ARGV[1] then redis.call('DEL', owner) end
+end
+if conversation_id then redis.call('SREM', ARGV[2] .. conversation_id, ARGV[1]) end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return presence
+"""
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _to_dict(items) -> dict:
+    if isinstance(items, dict):
+        return {_decode(k): _decode(v) for k, v in items.items()}
+    return {_decode(items[i]): _decode(items[i + 1]) for i in range(0, len(items), 2)}
+
+
+class PresenceStore:
+    """
+    Socket presence kept in Redis hashes with a TTL.
+
+    Every write is a single MULTI/EXEC pipeline, heartbeats refresh the TTL of
+    the sids connected to this node and the sweep clears sids whose node died
+    without a disconnect.
+    """
+
+    _remove_script = None
+
+    @staticmethod
+    def sid_key(sid: str) -> str:
+        return f"{PRESENCE_SID_KEY}{sid}"
+
+    @staticmethod
+    def owner_key(kind: str, owner_id) -> str:
+        return f"{kind}_id:{owner_id}"
+
+    @staticmethod
+    def room_key(conversation_id) -> str:
+        return f"{REDIS_ROOM_KEY}{conversation_id}"
+
+    @staticmethod
+    async def connect(sid: str, kind: str, owner_id: int):
+        ttl = settings.PRESENCE_TTL_SECONDS
+        redis = await RedisService.get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(PresenceStore.sid_key(sid), mapping={"kind": kind, "id": owner_id})
+            pipe.expire(PresenceStore.sid_key(sid), ttl)
+            pipe.set(PresenceStore.owner_key(kind, owner_id), sid, ex=ttl)
+            pipe.zadd(PRESENCE_HEARTBEAT_KEY, {sid: time.time()})
+            await pipe.execute()
+
+    @staticmethod
+    async def join_conversation(sid: str, conversation_id: int):
+        ttl = settings.PRESENCE_TTL_SECONDS
+        redis = await RedisService.get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(PresenceStore.sid_key(sid), "conversation_id", conversation_id)
+            pipe.expire(PresenceStore.sid_key(sid), ttl)
+            pipe.hset(PRESENCE_SID_ROOMS_KEY, sid, conversation_id)
+            pipe.sadd(PresenceStore.room_key(conversation_id), sid)
+            await pipe.execute()
+
+    @staticmethod
+    async def leave_conversation(sid: str, conversation_id: int):
+        redis = await RedisService.get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.srem(PresenceStore.room_key(conversation_id), sid)
+            pipe.hdel(PresenceStore.sid_key(sid), "conversation_id")
+            pipe.hdel(PRESENCE_SID_ROOMS_KEY, sid)
+            await pipe.execute()
+
+    @classmethod
+    async def _script(cls):
+        if cls._remove_script is None:
+            redis = await RedisService.get_redis()
+            cls._remove_script = redis.register_script(REMOVE_SID_SCRIPT)
+        return cls._remove_script
+
+    @classmethod
+    async def remove(cls, sid: str) -> dict:
+        """Drops the sid and returns the presence it had (kind, id, conversation_id)"""
+        script = await cls._script()
+        presence = await script(
+            keys=[cls.sid_key(sid), PRESENCE_HEARTBEAT_KEY, PRESENCE_SID_ROOMS_KEY],
+            args=[sid, REDIS_ROOM_KEY],
+        )
+        return _to_dict(presence or [])
+
+    @staticmethod
+    async def get(sid: str) -> dict:
+        redis = await RedisService.get_redis()
+        return _to_dict(await redis.hgetall(PresenceStore.sid_key(sid)))
+
+    @staticmethod
+    async def get_field(sid: str, field: str) -> Optional[str]:
+        redis = await RedisService.get_redis()
+        return _decode(await redis.hget(PresenceStore.sid_key(sid), field))
+
+    @staticmethod
+    async def get_many(sids: Iterable[str]) -> dict[str, dict]:
+        """Bulk sid -> presence lookup in one round trip; unknown sids are left out"""
+        sids = list(sids)
+        if not sids:
+            return {}
+        redis = await RedisService.get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for sid in sids:
+                pipe.hgetall(PresenceStore.sid_key(sid))
+            results = await pipe.execute()
+        return {sid: _to_dict(result) for sid, result in zip(sids, results) if result}
+
+    @staticmethod
+    async def heartbeat(sids: Iterable[str]):
+        """Refreshes the TTL of the sids that are still connected"""
+        sids = list(sids)
+        if not sids:
+            return
+        ttl = settings.PRESENCE_TTL_SECONDS
+        presences = await PresenceStore.get_many(sids)
+        now = time.time()
+        redis = await RedisService.get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for sid, presence in presences.items():
+                pipe.expire(PresenceStore.sid_key(sid), ttl)
+                if presence.get("kind") and presence.get("id"):
+                    pipe.expire(PresenceStore.owner_key(presence["kind"], presence["id"]), ttl)
+            if presences:
+                pipe.zadd(PRESENCE_HEARTBEAT_KEY, {sid: now for sid in presences})
+            await pipe.execute()
+
+    @classmethod
+    async def sweep(cls) -> int:
+        """Removes sids that missed their heartbeats; returns how many were removed"""
+        redis = await RedisService.get_redis()
+        deadline = time.time() - settings.PRESENCE_TTL_SECONDS
+        stale = await redis.zrangebyscore(PRESENCE_HEARTBEAT_KEY, "-inf", deadline)
+        if not stale:
+            return 0
+        script = await cls._script()
+        async with redis.pipeline(transaction=False) as pipe:
+            for sid in stale:
+                sid = _decode(sid)
+                await script(
+                    keys=[cls.sid_key(sid), PRESENCE_HEARTBEAT_KEY, PRESENCE_SID_ROOMS_KEY],
+                    args=[sid, REDIS_ROOM_KEY],
+                    client=pipe,
+                )
+            await pipe.execute()
+        return len(stale)
+
+
+async def presence_heartbeat(sio, namespaces: list[str]):
+    """Refreshes the presence of the sids connected to this node and sweeps dead ones"""
+    while True:
+        await asyncio.sleep(settings.PRESENCE_HEARTBEAT_SECONDS)
+        try:
+            sids = [
+                sid
+                for namespace in namespaces
+                for sid in sio.manager.rooms.get(namespace, {}).get(None, {})
+            ]
+            await PresenceStore.heartbeat(sids)
+            removed = await PresenceStore.sweep()
+            if removed:
+                logger.info("Presence sweep removed %d dead sids", removed)
+        except Exception:
+            logger.exception("Presence heartbeat failed")
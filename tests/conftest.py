@@ -0,0 +1,57 @@
+import pytest
+
+
+def parse_db_stats(response) -> dict:
+    """x-db-stats: sessions=1; round-trips=9; queries=8; ... -> dict"""
+    header = response.headers.get("x-db-stats")
+    if not header:
+        return {}
+    return {
+        key.strip(): float(value)
+        for key, value in (item.split("=") for item in header.split(";"))
+    }
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fails the test when an endpoint runs more statements than its budget.
+
+    The server must run with DB_DEBUG_HEADER and DB_INSTRUMENTATION enabled,
+    otherwise the check is skipped.
+
+        response = await ac.get(...)
+        query_budget(response, 10)
+    """
+
+    def check(response, budget: int):
+        stats = parse_db_stats(response)
+        if "queries" not in stats:
+            pytest.skip("server runs without DB_DEBUG_HEADER/DB_INSTRUMENTATION")
+        queries = int(stats["queries"])
+        repeated = "\n".join(response.headers.get_list("x-db-repeated"))
+        assert queries <= budget, (
+            f"{response.request.method} {response.request.url.path} ran {queries} "
+            f"queries, budget is {budget}\n{repeated}"
+        )
+
+    return check
+
+
+@pytest.fixture
+def replica_reads():
+    """
+    Returns how many reads of a response's request the replica served.
+
+    The server must run with DB_DEBUG_HEADER and ASYNC_REPLICA_DATABASE_URL
+    set (a second database, or the primary's URL as a stand-in), otherwise
+    the check is skipped.
+    """
+
+    def count(response) -> int:
+        stats = parse_db_stats(response)
+        if "replica-reads" not in stats:
+            pytest.skip("server runs without DB_DEBUG_HEADER/ASYNC_REPLICA_DATABASE_URL")
+        return int(stats["replica-reads"])
+
+    return count
@@ -34,3 +34,27 @@ async def test_list_ticket_by_id():
     assert ("success" in data) and data["success"] is True
     assert ("message" in data) and data["message"] == "Successfully listed the ticket"
     assert ("data" in data) and isinstance(data["data"], List)
+
+
+@pytest.mark.asyncio
+async def test_list_tickets_query_budget(query_budget):
+    access_token = get_login_token()
+    async with AsyncClient(follow_redirects=True) as ac:
+        response = await ac.get(
+            "http://localhost:8000/tickets",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+    assert response.status_code == 200
+    query_budget(response, 15)
+
+
+@pytest.mark.asyncio
+async def test_list_tickets_reads_replica(replica_reads):
+    access_token = get_login_token()
+    async with AsyncClient(follow_redirects=True) as ac:
+        response = await ac.get(
+            "http://localhost:8000/tickets",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+    assert response.status_code == 200
+    assert replica_reads(response) > 0
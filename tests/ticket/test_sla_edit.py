@@ -0,0 +1,89 @@
+import fakeredis
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import SQLModel
+
+import src.db.session as db_session
+import src.tasks  # noqa: F401  imports the models in their usual order
+from src.common.context import TenantContext, UserContext
+from src.middleware.session_middleware import UnitOfWorkMiddleware
+from src.models import User
+from src.modules.ticket.models import TicketSLA
+from src.modules.ticket.schemas.sla_schemas import EditTicketSLASchema
+from src.modules.ticket.services.sla import sla_service
+from src.services.redis_service import RedisService
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path, monkeypatch):
+    """A two-connection SQLite pool that the request sessions draw from"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'sla.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=1,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(db_session, "async_session", session)
+
+    redis = fakeredis.FakeAsyncRedis()
+
+    async def get_redis():
+        return redis
+
+    monkeypatch.setattr(RedisService, "get_redis", staticmethod(get_redis))
+
+    async def save_to_log(self, **kwargs):
+        pass
+
+    # the log row needs audit columns this test does not set up
+    monkeypatch.setattr(TicketSLA, "save_to_log", save_to_log)
+
+    async with session() as s:
+        s.add(User(id=1, email="agent@chatboq.com", password="x" * 8, two_fa_secret="", two_fa_auth_url=""))
+        s.add(
+            TicketSLA(
+                id=1, name="default", response_time=3600, resolution_time=7200, priority_id=1,
+                organization_id=1, created_by_id=1, updated_by_id=1,
+            )
+        )
+        await s.commit()
+    yield engine
+    await engine.dispose()
+
+
+async def edit_request(response_time: int):
+    """PUT /tickets/sla/1 through the unit of work, as the app runs it"""
+    sent = []
+
+    async def app(scope, receive, send):
+        TenantContext.set(1)
+        UserContext.set(1)
+        response = await sla_service.edit_sla(1, EditTicketSLASchema(response_time=response_time))
+        await response(scope, receive, send)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "PUT", "path": "/tickets/sla/1", "headers": []}
+    await UnitOfWorkMiddleware(app)(scope, receive, send)
+    return sent[0]["status"]
+
+
+@pytest.mark.asyncio
+async def test_edit_sla_releases_connections(engine):
+    # the thresholds are rescheduled after the commit, outside the request's session
+    for response_time in (1800, 2400, 3000):
+        assert await edit_request(response_time) == 200
+        assert engine.pool.checkedout() == 0
+
+    async with db_session.async_session() as s:
+        assert (await s.get(TicketSLA, 1)).response_time == 3000
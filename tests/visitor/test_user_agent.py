@@ -0,0 +1,42 @@
+import pytest
+
+from src.modules.visitor.models import CustomerVisitLogs
+from src.utils.user_agent import MAX_USER_AGENT, parse_user_agent
+
+CHROME = (
+    "Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36"
+)
+
+
+def column_length(name: str) -> int:
+    return CustomerVisitLogs.__table__.c[name].type.length
+
+
+def test_parses_a_real_user_agent():
+    agent = parse_user_agent(CHROME)
+    assert agent == ("Chrome 124", "Android 14", "mobile", "SM-S918B")
+
+
+@pytest.mark.parametrize(
+    "ua",
+    [
+        "a" * 150 + "/1",
+        "Mozilla/5.0 (Linux; Android 14; " + "M" * 400 + ") Chrome/124.0 Mobile Safari/537.36",
+        "Mozilla/5.0 (Windows NT " + "1." * 200 + ") Firefox/" + "9" * 300,
+        "X" * 300 + "bot/" + "1" * 300,
+        ("Mozilla/5.0 (iPhone; CPU iPhone OS " + "1_" * 300)[:MAX_USER_AGENT],
+    ],
+)
+def test_oversized_user_agents_fit_the_columns(ua):
+    agent = parse_user_agent(ua[:MAX_USER_AGENT])
+    for field, value in agent._asdict().items():
+        assert value is None or len(value) <= column_length(field), field
+
+
+def test_oversized_names_fall_back():
+    assert parse_user_agent("a" * 150 + "/1").browser is None
+    android = parse_user_agent(
+        "Mozilla/5.0 (Linux; Android 14; " + "M" * 400 + ") Chrome/124.0 Mobile Safari/537.36"
+    )
+    assert (android.browser, android.device_type, android.device) == ("Chrome 124", "mobile", "Android")